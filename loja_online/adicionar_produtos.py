@@ -6,9 +6,6 @@ Execute uma única vez para adicionar produtos ao banco de dados.
 from src.banco_dados import BancoDados
 from src.modelo import Produto
 
-# Inicializa o banco
-db = BancoDados()
-
 # Lista de produtos para adicionar
 produtos_exemplo = [
     Produto("Notebook Dell", "Notebook Dell Inspiron 15, Intel i7, 16GB RAM, SSD 512GB", 3500.00, 5, "Eletrônicos"),
@@ -33,15 +30,19 @@ produtos_exemplo = [
     Produto("Ventilador RGB", "Ventilador 120mm RGB, controle remoto, silencioso", 69.90, 22, "Componentes"),
 ]
 
-print("=" * 60)
-print("ADICIONANDO PRODUTOS À LOJA")
-print("=" * 60)
-
-for produto in produtos_exemplo:
-    produto_id = db.criar_produto(produto)
-    print(f"✅ Produto adicionado: {produto.nome} (ID: {produto_id})")
-
-print("\n" + "=" * 60)
-print(f"✨ Total de {len(produtos_exemplo)} produtos adicionados com sucesso!")
-print("=" * 60)
-print("\nAgora você pode rodar: streamlit run app.py")
+if __name__ == "__main__":
+    # Inicializa o banco
+    db = BancoDados()
+    
+    print("=" * 60)
+    print("ADICIONANDO PRODUTOS À LOJA")
+    print("=" * 60)
+    
+    for produto in produtos_exemplo:
+        produto_id = db.criar_produto(produto)
+        print(f"✅ Produto adicionado: {produto.nome} (ID: {produto_id})")
+    
+    print("\n" + "=" * 60)
+    print(f"✨ Total de {len(produtos_exemplo)} produtos adicionados com sucesso!")
+    print("=" * 60)
+    print("\nAgora você pode rodar: streamlit run app.py")
@@ -2,12 +2,23 @@
 Aplicação principal - Loja Online com Streamlit
 """
 
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
 import streamlit as st
 from src.banco_dados import BancoDados
+from src.cache import CacheCatalogo, TTL_PADRAO
+from src.carrinhos import ArmazemCarrinhos
+from src.catalogo_vetorizado import CatalogoVetorizado, numpy_disponivel
+from src.instrumentacao import Instrumentacao
 from src.utilitarios import (
     formatar_moeda, calcular_frete, gerar_carrinho_padrao,
     adicionar_ao_carrinho, remover_do_carrinho, obter_total_carrinho,
-    obter_quantidade_carrinho, limpar_carrinho, efetuou_login, fazer_logout
+    obter_quantidade_carrinho, limpar_carrinho, efetuou_login, fazer_logout,
+    efetuar_login, configurar_carrinhos, obter_itens_carrinho,
+    obter_cursor_pagina, exibir_paginacao, medir_execucao, registrar_tempo_execucao
 )
 from src.modelo import Usuario, Pedido, ItemCarrinho, Avaliacao
 
@@ -19,8 +30,54 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+inicio_execucao = time.perf_counter()
+
+PRODUTOS_POR_PAGINA = 24
+
+ORDENACOES = {
+    "Nome": "nome",
+    "Menor preço": "preco",
+    "Maior preço": "preco_desc",
+    "Melhor avaliação": "avaliacao",
+    "Mais recentes": "recentes",
+}
+
+@st.cache_resource
+def obter_banco() -> BancoDados:
+    """Cria o banco uma vez por processo; o cache do catálogo sobrevive aos reruns.
+    
+    Com a variável LOJA_SQL_LENTO_MS definida, as consultas SQL são
+    instrumentadas e as acima desse tempo vão para o log. LOJA_BANCO troca
+    o arquivo do banco (padrão: dados/loja.db).
+    """
+    limite_lento = os.environ.get("LOJA_SQL_LENTO_MS")
+    instrumentacao = Instrumentacao(float(limite_lento)) if limite_lento else None
+    return BancoDados(os.environ.get("LOJA_BANCO", "dados/loja.db"), usar_pool=True,
+                      cache=CacheCatalogo(), instrumentacao=instrumentacao)
+
+
+@st.cache_resource
+def obter_armazem_carrinhos() -> ArmazemCarrinhos:
+    """Carrinhos no banco: qualquer processo do app atende o mesmo comprador."""
+    return ArmazemCarrinhos(obter_banco())
+
+
+@st.cache_resource
+def obter_catalogo():
+    """Retrato NumPy do catálogo para os filtros da Home (None sem NumPy).
+    
+    Escritas de outros processos (API, importação, outros servidores) aparecem
+    com a mesma defasagem máxima das listas no CacheCatalogo.
+    """
+    if not numpy_disponivel():
+        return None
+    return CatalogoVetorizado(obter_banco(), idade_maxima=TTL_PADRAO['lista'])
+
+
 # Inicializa o banco de dados
-db = BancoDados()
+db = obter_banco()
+catalogo = obter_catalogo()
+configurar_carrinhos(obter_armazem_carrinhos())
 
 # Inicializa a sessão
 gerar_carrinho_padrao()
@@ -70,32 +127,90 @@ else:
     st.sidebar.warning("⚠️ Você não está logado")
     st.sidebar.info("👉 Clique em '👤 Conta' no menu para fazer login")
 
-# ===== PÁGINAS =====
+# Métricas SQL (só com LOJA_SQL_LENTO_MS definida)
+if db.instrumentacao is not None:
+    with st.sidebar.expander("🩺 Consultas SQL"):
+        metricas = db.instrumentacao.exportar_json()
+        st.dataframe(
+            [{"método": metodo, **valores} for metodo, valores in metricas["metodos"].items()],
+            hide_index=True
+        )
+        st.caption(f"{len(metricas['lentas'])} consulta(s) lenta(s) registrada(s)")
 
-if menu == "🏠 Home":
-    # Banner principal
-    st.title("🛍️ Bem-vindo à Loja Online!")
-    st.write("Encontre os melhores produtos com preços incríveis!")
-    
-    # Abas de navegação
-    tab1, tab2, tab3 = st.tabs(["🔍 Todos os Produtos", "📂 Por Categoria", "🔎 Buscar"])
-    
-    with tab1:
+# Tempo dos reruns e fragmentos (só com LOJA_MEDIR_RERUNS definida)
+if os.environ.get("LOJA_MEDIR_RERUNS"):
+    with st.sidebar.expander("⏱️ Tempo das execuções"):
+        st.dataframe(
+            [{"trecho": nome, "execuções": len(tempos),
+              "mediana (ms)": round(statistics.median(tempos) * 1000, 1),
+              "última (ms)": round(tempos[-1] * 1000, 1)}
+             for nome, tempos in st.session_state.get("tempos_execucao", {}).items()],
+            hide_index=True
+        )
+
+# ===== SEÇÕES DA HOME =====
+# Cada seção é um fragmento: mexer nos filtros, paginar ou adicionar ao
+# carrinho reexecuta só a seção visível, não o script inteiro.
+
+@contextmanager
+def resumo_carrinho():
+    """Contador do carrinho no topo da seção, preenchido depois dos botões
+    "Adicionar" para já incluir o clique desta execução."""
+    espaco = st.empty()
+    try:
+        yield
+    finally:
+        quantidade = obter_quantidade_carrinho()
+        if quantidade:
+            espaco.caption(f"🛒 {quantidade} item(ns) no carrinho · {formatar_moeda(obter_total_carrinho())}")
+        else:
+            espaco.caption("🛒 Carrinho vazio")
+
+
+def exibir_botao_adicionar(produto, chave: str, mensagem: str, **opcoes):
+    if st.button("🛒 Adicionar", key=chave, **opcoes):
+        if produto.estoque > 0:
+            adicionar_ao_carrinho(produto.id, 1, produto.preco)
+            st.success(mensagem)
+        else:
+            st.error("❌ Sem estoque!")
+
+
+@st.fragment
+def exibir_todos_produtos():
+    with medir_execucao("Home: Todos os Produtos"):
         st.subheader("Todos os Produtos")
         
-        # Filtro de preço
+        # Filtros
         col1, col2 = st.columns(2)
         with col1:
             preco_min = st.slider("Preço Mínimo (R$)", 0, 1000, 0, key="preco_min_tab1")
         with col2:
             preco_max = st.slider("Preço Máximo (R$)", 0, 1000, 1000, key="preco_max_tab1")
         
-        produtos = db.obter_todos_produtos()
-        produtos_filtrados = [p for p in produtos if preco_min <= p.preco <= preco_max]
+        col1, col2 = st.columns(2)
+        with col1:
+            ordem = st.selectbox("Ordenar por:", list(ORDENACOES), key="ordem_tab1")
+        with col2:
+            somente_em_estoque = st.checkbox("Somente com estoque", key="estoque_tab1")
         
-        if not produtos_filtrados:
-            st.warning("Nenhum produto encontrado nessa faixa de preço.")
-        else:
+        filtros = (preco_min, preco_max, ordem, somente_em_estoque)
+        consultar = catalogo.consultar_produtos if catalogo is not None else db.consultar_produtos
+        pagina = consultar(
+            preco_min=preco_min,
+            preco_max=preco_max,
+            somente_em_estoque=somente_em_estoque,
+            ordenar_por=ORDENACOES[ordem],
+            cursor=obter_cursor_pagina("todos", filtros),
+            limite=PRODUTOS_POR_PAGINA
+        )
+        produtos_filtrados = pagina.produtos
+        
+        with resumo_carrinho():
+            if not produtos_filtrados:
+                st.warning("Nenhum produto encontrado nessa faixa de preço.")
+                return
+            
             # Exibe produtos em grid
             cols = st.columns(3)
             for idx, produto in enumerate(produtos_filtrados):
@@ -110,99 +225,138 @@ if menu == "🏠 Home":
                     </div>
                     """, unsafe_allow_html=True)
                     
-                    if st.button("🛒 Adicionar", key=f"add_{produto.id}", use_container_width=True):
-                        if produto.estoque > 0:
-                            adicionar_ao_carrinho(produto.id, 1, produto.preco)
-                            st.success(f"✅ {produto.nome} adicionado ao carrinho!")
-                        else:
-                            st.error("❌ Produto sem estoque!")
-    
-    with tab2:
+                    exibir_botao_adicionar(produto, f"add_{produto.id}",
+                                           f"✅ {produto.nome} adicionado ao carrinho!",
+                                           use_container_width=True)
+            
+            exibir_paginacao("todos", pagina.proximo_cursor, escopo="fragment")
+
+
+@st.fragment
+def exibir_por_categoria():
+    with medir_execucao("Home: Por Categoria"):
         st.subheader("Produtos por Categoria")
         
         categorias = db.obter_categorias()
         
         if not categorias:
             st.info("Nenhuma categoria disponível ainda.")
-        else:
-            categoria_selecionada = st.selectbox("Escolha uma categoria:", categorias)
-            
-            produtos = db.obter_produtos_por_categoria(categoria_selecionada)
-            
+            return
+        
+        categoria_selecionada = st.selectbox("Escolha uma categoria:", categorias)
+        
+        pagina = db.consultar_produtos(
+            categoria=categoria_selecionada,
+            cursor=obter_cursor_pagina("categoria", (categoria_selecionada,)),
+            limite=PRODUTOS_POR_PAGINA
+        )
+        produtos = pagina.produtos
+        
+        with resumo_carrinho():
             if not produtos:
                 st.warning("Nenhum produto nessa categoria.")
-            else:
-                cols = st.columns(3)
-                for idx, produto in enumerate(produtos):
-                    with cols[idx % 3]:
-                        st.markdown(f"""
-                        <div class="produto-card">
-                            <h4>{produto.nome}</h4>
-                            <p class="preco">{formatar_moeda(produto.preco)}</p>
-                            <p>Estoque: {produto.estoque}</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        if st.button("🛒 Adicionar", key=f"add_cat_{produto.id}"):
-                            if produto.estoque > 0:
-                                adicionar_ao_carrinho(produto.id, 1, produto.preco)
-                                st.success(f"✅ {produto.nome} adicionado!")
-                            else:
-                                st.error("❌ Sem estoque!")
-    
-    with tab3:
+                return
+            
+            cols = st.columns(3)
+            for idx, produto in enumerate(produtos):
+                with cols[idx % 3]:
+                    st.markdown(f"""
+                    <div class="produto-card">
+                        <h4>{produto.nome}</h4>
+                        <p class="preco">{formatar_moeda(produto.preco)}</p>
+                        <p>Estoque: {produto.estoque}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+                    
+                    exibir_botao_adicionar(produto, f"add_cat_{produto.id}", f"✅ {produto.nome} adicionado!")
+            
+            exibir_paginacao("categoria", pagina.proximo_cursor, escopo="fragment")
+
+
+@st.fragment
+def exibir_busca():
+    with medir_execucao("Home: Buscar"):
         st.subheader("Buscar Produtos")
         
         termo = st.text_input("Digite o nome ou descrição do produto:")
-        
-        if termo:
-            produtos = db.buscar_produtos(termo)
+        with resumo_carrinho():
+            if not termo:
+                return
+            
+            pagina = db.consultar_produtos(
+                termo=termo,
+                ordenar_por="relevancia",
+                cursor=obter_cursor_pagina("busca", (termo,)),
+                limite=PRODUTOS_POR_PAGINA
+            )
+            produtos = pagina.produtos
             
             if not produtos:
                 st.warning(f"Nenhum produto encontrado para '{termo}'")
-            else:
-                st.write(f"Encontrados {len(produtos)} produto(s)")
-                
-                cols = st.columns(2)
-                for idx, produto in enumerate(produtos):
-                    with cols[idx % 2]:
-                        st.markdown(f"""
-                        <div class="produto-card">
-                            <h4>{produto.nome}</h4>
-                            <p>{produto.descricao}</p>
-                            <p class="preco">{formatar_moeda(produto.preco)}</p>
-                            <p>Estoque: {produto.estoque}</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        if st.button("🛒 Adicionar", key=f"add_bus_{produto.id}"):
-                            if produto.estoque > 0:
-                                adicionar_ao_carrinho(produto.id, 1, produto.preco)
-                                st.success(f"✅ Adicionado!")
-                            else:
-                                st.error("❌ Sem estoque!")
+                return
+            
+            st.write(f"Mostrando {len(produtos)} produto(s)")
+            
+            cols = st.columns(2)
+            for idx, produto in enumerate(produtos):
+                trecho = pagina.trechos.get(produto.id)
+                with cols[idx % 2]:
+                    st.markdown(f"""
+                    <div class="produto-card">
+                        <h4>{produto.nome}</h4>
+                        <p>{trecho or produto.descricao}</p>
+                        <p class="preco">{formatar_moeda(produto.preco)}</p>
+                        <p>Estoque: {produto.estoque}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+                    
+                    exibir_botao_adicionar(produto, f"add_bus_{produto.id}", "✅ Adicionado!")
+            
+            exibir_paginacao("busca", pagina.proximo_cursor, escopo="fragment")
+
+
+SECOES_HOME = {
+    "🔍 Todos os Produtos": exibir_todos_produtos,
+    "📂 Por Categoria": exibir_por_categoria,
+    "🔎 Buscar": exibir_busca,
+}
+
+# ===== PÁGINAS =====
+
+if menu == "🏠 Home":
+    # Banner principal
+    st.title("🛍️ Bem-vindo à Loja Online!")
+    st.write("Encontre os melhores produtos com preços incríveis!")
+    
+    # Seções de navegação: ao contrário de st.tabs, só a seção escolhida roda
+    secao = st.radio("Seção", list(SECOES_HOME), horizontal=True,
+                     key="secao_home", label_visibility="collapsed")
+    SECOES_HOME[secao]()
 
 elif menu == "🛒 Carrinho":
     st.title("🛒 Seu Carrinho")
     
     gerar_carrinho_padrao()
     
-    if not st.session_state.carrinho:
+    itens = obter_itens_carrinho()
+    
+    if not itens:
         st.info("Seu carrinho está vazio! 😢")
     else:
         # Tabela do carrinho
         st.subheader("Itens do Carrinho")
         
+        produtos = db.obter_produtos_por_ids(itens.keys())
+        
         carrinho_data = []
-        for produto_id, item in st.session_state.carrinho.items():
-            produto = db.obter_produto(produto_id)
-            if produto:
-                carrinho_data.append({
-                    "Produto": produto.nome,
-                    "Preço": formatar_moeda(item['preco_unitario']),
-                    "Quantidade": item['quantidade'],
-                    "Subtotal": formatar_moeda(item['quantidade'] * item['preco_unitario'])
-                })
+        for produto in produtos:
+            item = itens[produto.id]
+            carrinho_data.append({
+                "Produto": produto.nome,
+                "Preço": formatar_moeda(item['preco_unitario']),
+                "Quantidade": item['quantidade'],
+                "Subtotal": formatar_moeda(item['quantidade'] * item['preco_unitario'])
+            })
         
         st.table(carrinho_data)
         
@@ -256,8 +410,7 @@ elif menu == "🛒 Carrinho":
                             usuario_id = db.verificar_login(email, senha)
                             if usuario_id:
                                 usuario = db.obter_usuario(usuario_id)
-                                st.session_state.usuario_id = usuario_id
-                                st.session_state.usuario_nome = usuario.nome
+                                efetuar_login(usuario_id, usuario.nome)
                                 st.session_state.mostrar_login_carrinho = False
                                 st.success("✅ Login efetuado com sucesso!")
                                 st.rerun()
@@ -281,16 +434,18 @@ if st.session_state.get("em_checkout", False):
     # Resumo dos itens
     st.subheader("📦 Resumo do Pedido")
     
+    itens = obter_itens_carrinho()
+    produtos = db.obter_produtos_por_ids(itens.keys())
+    
     carrinho_data = []
-    for produto_id, item in st.session_state.carrinho.items():
-        produto = db.obter_produto(produto_id)
-        if produto:
-            carrinho_data.append({
-                "Produto": produto.nome,
-                "Preço Unitário": formatar_moeda(item['preco_unitario']),
-                "Quantidade": item['quantidade'],
-                "Subtotal": formatar_moeda(item['quantidade'] * item['preco_unitario'])
-            })
+    for produto in produtos:
+        item = itens[produto.id]
+        carrinho_data.append({
+            "Produto": produto.nome,
+            "Preço Unitário": formatar_moeda(item['preco_unitario']),
+            "Quantidade": item['quantidade'],
+            "Subtotal": formatar_moeda(item['quantidade'] * item['preco_unitario'])
+        })
     
     st.table(carrinho_data)
     
@@ -358,7 +513,7 @@ if st.session_state.get("em_checkout", False):
             if st.button("✅ Confirmar Pedido", type="primary", use_container_width=True):
                 # Criar pedido
                 items_pedido = []
-                for produto_id, item in st.session_state.carrinho.items():
+                for produto_id, item in itens.items():
                     items_pedido.append(ItemCarrinho(
                         produto_id=produto_id,
                         quantidade=item['quantidade'],
@@ -375,12 +530,19 @@ if st.session_state.get("em_checkout", False):
                 # Atualizar status do pedido
                 pedido.status = "Pagamento Confirmado"
                 
-                # Salvar no banco
-                pedido_id = db.criar_pedido(pedido)
+                # Salvar no banco e baixar o estoque numa única transação
+                resultado = db.finalizar_pedido(pedido)
+                
+                if not resultado.sucesso:
+                    nomes = {produto.id: produto.nome for produto in produtos}
+                    for item in resultado.itens_indisponiveis:
+                        nome = nomes.get(item['produto_id'], f"Produto #{item['produto_id']}")
+                        st.error(f"❌ {nome}: você pediu {item['solicitado']}, "
+                                 f"mas só há {item['disponivel']} em estoque.")
+                    st.warning("Ajuste o carrinho e tente novamente. Nenhum valor foi cobrado.")
+                    st.stop()
                 
-                # Atualizar estoque
-                for produto_id, item in st.session_state.carrinho.items():
-                    db.atualizar_estoque(produto_id, item['quantidade'])
+                pedido_id = resultado.pedido_id
                 
                 # Guardar dados para exibição
                 valor_total = pedido.obter_total()
@@ -439,19 +601,31 @@ elif menu == "📦 Meus Pedidos":
                     usuario_id = db.verificar_login(email, senha)
                     if usuario_id:
                         usuario = db.obter_usuario(usuario_id)
-                        st.session_state.usuario_id = usuario_id
-                        st.session_state.usuario_nome = usuario.nome
+                        efetuar_login(usuario_id, usuario.nome)
                         st.success("✅ Login efetuado com sucesso!")
                         st.rerun()
                     else:
                         st.error("❌ Email ou senha incorretos!")
     else:
-        pedidos = db.obter_pedidos_usuario(st.session_state.usuario_id)
+        usuario_id = st.session_state.usuario_id
+        resumo = db.obter_resumo_usuario(usuario_id)
         
-        if not pedidos:
+        if not resumo['total_pedidos']:
             st.info("Você ainda não fez nenhum pedido.")
         else:
-            for pedido in pedidos:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Pedidos", resumo['total_pedidos'])
+            with col2:
+                st.metric("Total gasto", formatar_moeda(resumo['valor_total']))
+            with col3:
+                st.metric("Último pedido", str(resumo['ultimo_pedido_em'])[:10])
+            
+            pagina = db.consultar_pedidos_usuario(
+                usuario_id, cursor=obter_cursor_pagina("pedidos", (usuario_id,)), limite=10
+            )
+            
+            for pedido in pagina.pedidos:
                 with st.expander(f"Pedido #{pedido['id']} - {pedido['status']} - {formatar_moeda(pedido['valor_total'])}"):
                     col1, col2, col3 = st.columns(3)
                     with col1:
@@ -463,6 +637,19 @@ elif menu == "📦 Meus Pedidos":
                     
                     st.write(f"**Endereço de Entrega:** {pedido['endereco_entrega']}")
 
+                    if pedido['itens']:
+                        st.table([
+                            {
+                                "Produto": item['nome'] or f"Produto #{item['produto_id']}",
+                                "Preço": formatar_moeda(item['preco_unitario']),
+                                "Quantidade": item['quantidade'],
+                                "Subtotal": formatar_moeda(item['quantidade'] * item['preco_unitario'])
+                            }
+                            for item in pedido['itens']
+                        ])
+            
+            exibir_paginacao("pedidos", pagina.proximo_cursor)
+
 elif menu == "👤 Conta":
     st.title("👤 Minha Conta")
     
@@ -515,8 +702,7 @@ elif menu == "👤 Conta":
                             usuario_id = db.verificar_login(email, senha)
                             if usuario_id:
                                 usuario = db.obter_usuario(usuario_id)
-                                st.session_state.usuario_id = usuario_id
-                                st.session_state.usuario_nome = usuario.nome
+                                efetuar_login(usuario_id, usuario.nome)
                                 st.success("✅ Login efetuado com sucesso!")
                                 st.balloons()
                                 st.rerun()
@@ -597,3 +783,5 @@ st.markdown(
     "</div>",
     unsafe_allow_html=True
 )
+
+registrar_tempo_execucao(f"Página: {menu}", time.perf_counter() - inicio_execucao)
@@ -0,0 +1,6 @@
+"""
+Benchmarks da loja online.
+
+Execute a partir da pasta loja_online, por exemplo:
+    python -m benchmarks.busca
+"""
@@ -0,0 +1,178 @@
+"""
+Teste de carga local da API JSON (src/api.py).
+
+Sobe o servidor num banco sintético com 1 ou mais processos trabalhadores e
+dispara clientes (processos, cada um com uma conexão keep-alive) com uma
+mistura de listagem, busca, detalhe, GET condicional (If-None-Match),
+histórico de pedidos e checkout. Informa requisições/s, percentis de
+latência, a taxa de 304 e os bytes economizados com gzip.
+
+Uso:
+    python -m benchmarks.api --trabalhadores 1 4 --clientes 16 --requisicoes 500
+"""
+
+import argparse
+import gzip
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import socket
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.comum import percentil, resumo_latencias
+from benchmarks.gerador import gerar_banco
+
+ORDENACOES = ['nome', 'preco', 'preco_desc', 'avaliacao', 'recentes']
+TERMOS = ['cabo', 'monitor', 'teclado', 'usb', 'gamer', 'ssd']
+
+
+def porta_livre() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _iniciar_servidor(caminho_db: str, porta: int, trabalhadores: int):
+    from src.api import servir
+    servir(caminho_db, porta=porta, trabalhadores=trabalhadores, segredo="benchmark",
+           ao_iniciar=lambda _mensagem: None)
+
+
+def _esperar_servidor(porta: int, tempo_maximo: float = 30.0):
+    limite = time.monotonic() + tempo_maximo
+    while time.monotonic() < limite:
+        try:
+            socket.create_connection(('127.0.0.1', porta), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("O servidor da API não subiu")
+
+
+def executar_cliente(indice: int, porta: int, requisicoes: int, produtos: int, usuarios: int) -> dict:
+    """Um cliente com conexão persistente; retorna latências por cenário."""
+    aleatorio = random.Random(indice)
+    conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=30)
+    etags = {}
+    resultado = {'latencias': [], 'por_cenario': {}, 'nao_modificadas': 0, 'erros': 0,
+                 'bytes_transferidos': 0, 'bytes_json': 0}
+
+    def chamar(metodo, caminho, corpo=None, cabecalhos=None):
+        cabecalhos = dict(cabecalhos or {}, **{'Accept-Encoding': 'gzip'})
+        dados = json.dumps(corpo).encode() if corpo is not None else None
+        inicio = time.perf_counter()
+        conexao.request(metodo, caminho, body=dados, headers=cabecalhos)
+        resposta = conexao.getresponse()
+        bruto = resposta.read()
+        latencia = time.perf_counter() - inicio
+        resultado['bytes_transferidos'] += len(bruto)
+        if resposta.getheader('Content-Encoding') == 'gzip':
+            bruto = gzip.decompress(bruto)
+        resultado['bytes_json'] += len(bruto)
+        if resposta.status >= 400 and resposta.status != 409:
+            resultado['erros'] += 1
+        return resposta, bruto, latencia
+
+    _resposta, bruto, _latencia = chamar('POST', '/api/login', {
+        'email': f"cliente42-{indice % usuarios + 1}@bench.local", 'senha': "senha123"})
+    autorizacao = {'Authorization': 'Bearer ' + json.loads(bruto)['token']}
+
+    for _ in range(requisicoes):
+        sorteio = aleatorio.random()
+        if sorteio < 0.35:
+            cenario = 'listagem'
+            caminho = (f"/api/produtos?ordenar={aleatorio.choice(ORDENACOES)}"
+                       f"&preco_min={aleatorio.choice([0, 50, 200])}&em_estoque=1")
+            resposta, _bruto, latencia = chamar('GET', caminho)
+        elif sorteio < 0.50:
+            cenario = 'busca'
+            resposta, _bruto, latencia = chamar('GET', f"/api/produtos?q={aleatorio.choice(TERMOS)}")
+        elif sorteio < 0.75:
+            cenario = 'detalhe'
+            resposta, _bruto, latencia = chamar('GET', f"/api/produtos/{aleatorio.randint(1, produtos)}")
+        elif sorteio < 0.88:
+            # Revalida uma página já vista (como o cache de um app)
+            cenario = 'condicional'
+            caminho = f"/api/produtos?ordenar={aleatorio.choice(ORDENACOES)}"
+            cabecalhos = {'If-None-Match': etags[caminho]} if caminho in etags else {}
+            resposta, _bruto, latencia = chamar('GET', caminho, cabecalhos=cabecalhos)
+            if resposta.status == 304:
+                resultado['nao_modificadas'] += 1
+            elif resposta.getheader('ETag'):
+                etags[caminho] = resposta.getheader('ETag')
+        elif sorteio < 0.96:
+            cenario = 'historico'
+            resposta, _bruto, latencia = chamar('GET', '/api/pedidos', cabecalhos=autorizacao)
+        else:
+            cenario = 'checkout'
+            itens = [{'produto_id': aleatorio.randint(1, produtos), 'quantidade': 1}
+                     for _ in range(aleatorio.randint(1, 3))]
+            resposta, _bruto, latencia = chamar('POST', '/api/pedidos', {
+                'itens': itens, 'endereco_entrega': "Rua do Benchmark, 1"}, autorizacao)
+        resultado['latencias'].append(latencia)
+        resultado['por_cenario'].setdefault(cenario, []).append(latencia)
+
+    conexao.close()
+    return resultado
+
+
+def medir(caminho_db: str, trabalhadores: int, clientes: int, requisicoes: int,
+          produtos: int, usuarios: int):
+    porta = porta_livre()
+    contexto = multiprocessing.get_context('fork')
+    servidor = contexto.Process(target=_iniciar_servidor, args=(caminho_db, porta, trabalhadores))
+    servidor.start()
+    try:
+        _esperar_servidor(porta)
+        inicio = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=clientes, mp_context=contexto) as executor:
+            resultados = list(executor.map(
+                executar_cliente, range(clientes), [porta] * clientes, [requisicoes] * clientes,
+                [produtos] * clientes, [usuarios] * clientes))
+        duracao = time.perf_counter() - inicio
+    finally:
+        servidor.terminate()
+        servidor.join()
+
+    latencias = [latencia for resultado in resultados for latencia in resultado['latencias']]
+    total = len(latencias)
+    print(f"\n{trabalhadores} processo(s), {clientes} clientes: {total / duracao:,.0f} req/s "
+          f"({total} requisições em {duracao:.1f}s)")
+    print(f"  todas:       {resumo_latencias(latencias)}")
+    for cenario in ('listagem', 'busca', 'detalhe', 'condicional', 'historico', 'checkout'):
+        valores = [latencia for resultado in resultados
+                   for latencia in resultado['por_cenario'].get(cenario, [])]
+        if valores:
+            print(f"  {cenario:<12} p50 {percentil(valores, 50) * 1000:.1f} ms | "
+                  f"p99 {percentil(valores, 99) * 1000:.1f} ms ({len(valores)})")
+    transferidos = sum(resultado['bytes_transferidos'] for resultado in resultados)
+    em_json = sum(resultado['bytes_json'] for resultado in resultados)
+    print(f"  304: {sum(resultado['nao_modificadas'] for resultado in resultados)} | "
+          f"erros: {sum(resultado['erros'] for resultado in resultados)} | "
+          f"bytes: {transferidos:,} transferidos de {em_json:,} em JSON")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--produtos", type=int, default=20000)
+    parser.add_argument("--usuarios", type=int, default=500)
+    parser.add_argument("--trabalhadores", type=int, nargs='+', default=[1, 4])
+    parser.add_argument("--clientes", type=int, default=16)
+    parser.add_argument("--requisicoes", type=int, default=300, help="Por cliente")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho_db = os.path.join(diretorio, "api.db")
+        print(f"Gerando {args.produtos} produtos e {args.usuarios} usuários... ({os.cpu_count()} CPUs)")
+        gerar_banco(caminho_db, produtos=args.produtos, usuarios=args.usuarios, pedidos=args.usuarios * 4,
+                    avaliacoes=args.produtos, ao_progredir=lambda _mensagem: None)
+        for trabalhadores in args.trabalhadores:
+            medir(caminho_db, trabalhadores, args.clientes, args.requisicoes, args.produtos, args.usuarios)
+
+
+if __name__ == "__main__":
+    main()
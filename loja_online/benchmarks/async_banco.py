@@ -0,0 +1,123 @@
+"""
+Benchmark do BancoDadosAsync x BancoDados síncrono chamado de corrotinas.
+
+N corrotinas fazem uma carga mista de leituras (obter_produto,
+consultar_produtos, obter_produtos_por_ids, obter_pedidos_usuario). Com o
+BancoDados síncrono cada chamada bloqueia o event loop, então as corrotinas
+andam uma de cada vez; com o BancoDadosAsync elas rodam no executor, em até
+max_concorrencia threads (o sqlite3 libera o GIL durante as consultas).
+
+Além de ops/s, mede o atraso do event loop: uma corrotina que dorme 1 ms
+em laço registra quanto acordou atrasada, como um servidor asyncio que
+precisa responder outras requisições durante a carga. Em leituras curtas
+com poucas CPUs o async faz menos ops/s (a ida ao executor custa mais que a
+consulta); o que ele garante é o loop livre.
+
+Uso:
+    python -m benchmarks.async_banco --produtos 100000 --chamadas 2000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.comum import resumo_latencias
+from benchmarks.gerador import gerar_banco
+from src.banco_dados import BancoDados
+from src.banco_dados_async import BancoDadosAsync
+
+CONCORRENCIAS = [1, 2, 4, 8, 16]
+
+
+def sortear_chamadas(aleatorio: random.Random, quantidade: int, produtos: int, usuarios: int) -> list:
+    """Lista de (nome do método, args, kwargs) da carga mista."""
+    chamadas = []
+    for _ in range(quantidade):
+        sorteio = aleatorio.random()
+        if sorteio < 0.4:
+            chamadas.append(('obter_produto', (aleatorio.randint(1, produtos),), {}))
+        elif sorteio < 0.7:
+            chamadas.append(('consultar_produtos', (), {
+                'preco_min': aleatorio.choice([None, 50, 200]),
+                'somente_em_estoque': aleatorio.random() < 0.5,
+                'ordenar_por': aleatorio.choice(['nome', 'preco', 'avaliacao']),
+            }))
+        elif sorteio < 0.9:
+            ids = [aleatorio.randint(1, produtos) for _ in range(24)]
+            chamadas.append(('obter_produtos_por_ids', (ids,), {}))
+        else:
+            chamadas.append(('obter_pedidos_usuario', (aleatorio.randint(1, usuarios),), {}))
+    return chamadas
+
+
+async def rodar(chamar, chamadas: list, concorrencia: int):
+    """Divide as chamadas entre concorrencia corrotinas; retorna (segundos, latências, atrasos do loop)."""
+    latencias, atrasos = [], []
+    terminou = asyncio.Event()
+
+    async def trabalhador(minhas: list):
+        for nome, args, kwargs in minhas:
+            inicio = time.perf_counter()
+            await chamar(nome, args, kwargs)
+            latencias.append(time.perf_counter() - inicio)
+
+    async def relogio():
+        while not terminou.is_set():
+            inicio = time.perf_counter()
+            await asyncio.sleep(0.001)
+            atrasos.append(max(0.0, time.perf_counter() - inicio - 0.001))
+
+    inicio = time.perf_counter()
+    medidor = asyncio.create_task(relogio())
+    await asyncio.sleep(0)  # O relógio começa antes da carga
+    await asyncio.gather(*(trabalhador(chamadas[i::concorrencia]) for i in range(concorrencia)))
+    segundos = time.perf_counter() - inicio
+    terminou.set()
+    await medidor
+    return segundos, latencias, atrasos
+
+
+async def medir(caminho_db: str, chamadas: list):
+    db = BancoDados(caminho_db, usar_pool=True)
+
+    async def sincrono(nome, args, kwargs):
+        return getattr(db, nome)(*args, **kwargs)
+
+    for concorrencia in CONCORRENCIAS:
+        banco_async = BancoDadosAsync(caminho_db, max_concorrencia=concorrencia)
+
+        async def assincrono(nome, args, kwargs):
+            return await getattr(banco_async, nome)(*args, **kwargs)
+
+        await rodar(assincrono, chamadas[:100], concorrencia)  # Aquece as conexões
+        for rotulo, chamar in (('síncrono', sincrono), ('async', assincrono)):
+            segundos, latencias, atrasos = await rodar(chamar, chamadas, concorrencia)
+            print(f"  {concorrencia:>2} corrotinas | {rotulo:<8} | {len(chamadas) / segundos:>7,.0f} ops/s | "
+                  f"{resumo_latencias(latencias)} | loop atrasou até {max(atrasos) * 1000:,.1f} ms")
+        await banco_async.fechar()
+    db.fechar_pools()  # O pool é compartilhado por caminho entre as instâncias
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--produtos", type=int, default=100000)
+    parser.add_argument("--usuarios", type=int, default=5000)
+    parser.add_argument("--pedidos", type=int, default=20000)
+    parser.add_argument("--chamadas", type=int, default=2000)
+    args = parser.parse_args()
+
+    chamadas = sortear_chamadas(random.Random(11), args.chamadas, args.produtos, args.usuarios)
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho_db = os.path.join(diretorio, "async.db")
+        print(f"Gerando {args.produtos} produtos, {args.usuarios} usuários, {args.pedidos} pedidos...")
+        gerar_banco(caminho_db, produtos=args.produtos, usuarios=args.usuarios, pedidos=args.pedidos,
+                    avaliacoes=0, ao_progredir=lambda _mensagem: None)
+        print(f"{args.chamadas} chamadas (carga mista de leitura), {os.cpu_count()} CPUs")
+        asyncio.run(medir(caminho_db, chamadas))
+
+
+if __name__ == "__main__":
+    main()
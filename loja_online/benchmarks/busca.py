@@ -0,0 +1,87 @@
+"""
+Benchmark da busca de produtos: LIKE '%termo%' (caminho antigo) x FTS5.
+
+Uso:
+    python -m benchmarks.busca --produtos 100000 --repeticoes 20
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from src.banco_dados import BancoDados
+
+PALAVRAS = [
+    "Teclado", "Mecânico", "Mouse", "Monitor", "Notebook", "Cabo", "Adaptador",
+    "Gamer", "RGB", "Sem Fio", "USB", "HDMI", "Placa", "Vídeo", "Memória", "SSD",
+    "Fonte", "Gabinete", "Cooler", "Headset", "Webcam", "Hub", "Processador",
+]
+TERMOS = ["teclado", "mecanico", "rgb usb", "proces", "inexistente"]
+
+
+def popular(db: BancoDados, quantidade: int, semente: int = 42):
+    """Insere produtos sintéticos diretamente, em uma única transação."""
+    aleatorio = random.Random(semente)
+    conexao = db.obter_conexao()
+    conexao.executemany(
+        'INSERT INTO produtos (nome, descricao, preco, estoque, categoria) VALUES (?, ?, ?, ?, ?)',
+        (
+            (
+                " ".join(aleatorio.sample(PALAVRAS, 3)),
+                " ".join(aleatorio.choices(PALAVRAS, k=12)),
+                round(aleatorio.uniform(10, 5000), 2),
+                aleatorio.randint(0, 50),
+                aleatorio.choice(["Periféricos", "Componentes", "Cabos"]),
+            )
+            for _ in range(quantidade)
+        ),
+    )
+    conexao.commit()
+    conexao.close()
+
+
+def buscar_com_like(db: BancoDados, termo: str) -> int:
+    """Reproduz a busca anterior ao FTS5."""
+    conexao = db.obter_conexao()
+    termo_busca = f"%{termo}%"
+    linhas = conexao.execute('''
+        SELECT * FROM produtos
+        WHERE nome LIKE ? OR descricao LIKE ?
+        ORDER BY nome
+    ''', (termo_busca, termo_busca)).fetchall()
+    conexao.close()
+    return len(linhas)
+
+
+def medir(funcao, repeticoes: int) -> float:
+    """Tempo médio por chamada, em milissegundos."""
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--produtos", type=int, default=100000)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        db = BancoDados(os.path.join(diretorio, "busca.db"), usar_pool=True)
+        popular(db, args.produtos)
+
+        print(f"{args.produtos} produtos, {args.repeticoes} repetições por termo")
+        print(f"{'termo':<14}{'LIKE (ms)':>12}{'FTS5 (ms)':>12}{'ganho':>9}")
+        for termo in TERMOS:
+            like = medir(lambda: buscar_com_like(db, termo), args.repeticoes)
+            fts = medir(lambda: db.buscar_produtos(termo), args.repeticoes)
+            print(f"{termo:<14}{like:>12.2f}{fts:>12.2f}{like / fts:>8.1f}x")
+
+        db.fechar_pools()
+
+
+if __name__ == "__main__":
+    main()
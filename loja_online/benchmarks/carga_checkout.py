@@ -0,0 +1,160 @@
+"""
+Teste de carga do checkout: vários compradores disputando pouco estoque.
+
+Cada comprador (thread ou processo) cria sua conta, faz login e repete o
+fluxo carrinho -> checkout pela API do BancoDados, sempre incluindo itens
+de estoque baixo (como a "GPU RTX 3060", com 3 unidades). No fim são
+conferidos os invariantes de estoque: nada vendido além do disponível.
+
+Uso:
+    python -m benchmarks.carga_checkout --compradores 16 --pedidos 50
+    python -m benchmarks.carga_checkout --modo processos --legado
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from adicionar_produtos import produtos_exemplo
+from benchmarks.comum import resumo_latencias
+from src.banco_dados import BancoDados
+from src.pool_conexoes import fechar_pools
+from src.modelo import ItemCarrinho, Pedido, Usuario
+
+# Chance de cada pedido incluir um dos produtos de estoque baixo
+CHANCE_ESTOQUE_BAIXO = 0.5
+LIMITE_ESTOQUE_BAIXO = 5
+TAMANHO_POOL = 32
+
+
+def _checkout_legado(db: BancoDados, pedido: Pedido) -> bool:
+    """Caminho anterior: criar_pedido e uma baixa de estoque sem verificação por item."""
+    db.criar_pedido(pedido)
+    for item in pedido.items:
+        db.atualizar_estoque(item.produto_id, item.quantidade)
+    return True
+
+
+def executar_comprador(indice: int, caminho_db: str, pedidos: int, legado: bool,
+                       semente: int, estoque_baixo: list, demais: list) -> dict:
+    """Fluxo de um comprador: cadastro, login e N checkouts."""
+    aleatorio = random.Random(semente + indice)
+    # Em modo threads todos os compradores compartilham o pool do processo
+    db = BancoDados(caminho_db, usar_pool=True, tamanho_pool=TAMANHO_POOL)
+    estatisticas = {'latencias': [], 'confirmados': 0, 'recusados': 0,
+                    'bloqueios': 0, 'erros': 0}
+
+    email = f"comprador{indice}@carga.local"
+    db.criar_usuario(Usuario(f"Comprador {indice}", email, "senha123", endereco="Rua da Carga, 1"))
+    usuario_id = db.verificar_login(email, "senha123")
+    usuario = db.obter_usuario(usuario_id)
+
+    for _ in range(pedidos):
+        carrinho = aleatorio.sample(demais, aleatorio.randint(1, 3))
+        if estoque_baixo and aleatorio.random() < CHANCE_ESTOQUE_BAIXO:
+            carrinho.append(aleatorio.choice(estoque_baixo))
+
+        inicio = time.perf_counter()
+        try:
+            produtos = db.obter_produtos_por_ids(carrinho)
+            itens = [ItemCarrinho(p.id, 1, p.preco) for p in produtos if p.estoque > 0]
+            if not itens:
+                estatisticas['recusados'] += 1
+                continue
+            pedido = Pedido(usuario_id, itens, usuario.endereco, valor_frete=0.0)
+            pedido.status = Pedido.STATUS_PAGAMENTO_CONFIRMADO
+
+            if legado:
+                confirmado = _checkout_legado(db, pedido)
+            else:
+                confirmado = db.finalizar_pedido(pedido).sucesso
+        except sqlite3.OperationalError as erro:
+            chave = 'bloqueios' if 'locked' in str(erro) or 'busy' in str(erro) else 'erros'
+            estatisticas[chave] += 1
+            continue
+        finally:
+            estatisticas['latencias'].append(time.perf_counter() - inicio)
+
+        estatisticas['confirmados' if confirmado else 'recusados'] += 1
+
+    return estatisticas
+
+
+def verificar_estoque(caminho_db: str, estoque_inicial: dict) -> dict:
+    """Confere o estoque final contra o vendido em itens_pedido."""
+    conexao = sqlite3.connect(caminho_db)
+    vendidos = dict(conexao.execute(
+        'SELECT produto_id, SUM(quantidade) FROM itens_pedido GROUP BY produto_id'
+    ).fetchall())
+    finais = dict(conexao.execute('SELECT id, estoque FROM produtos').fetchall())
+    conexao.close()
+
+    vendido_a_mais = sum(max(0, vendidos.get(pid, 0) - inicial) for pid, inicial in estoque_inicial.items())
+    negativos = sum(1 for estoque in finais.values() if estoque < 0)
+    divergentes = sum(1 for pid, inicial in estoque_inicial.items()
+                      if inicial - vendidos.get(pid, 0) != finais[pid])
+    return {'vendido_a_mais': vendido_a_mais, 'estoques_negativos': negativos,
+            'divergentes': divergentes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--compradores", type=int, default=16)
+    parser.add_argument("--pedidos", type=int, default=50, help="Checkouts por comprador")
+    parser.add_argument("--modo", choices=["threads", "processos"], default="threads")
+    parser.add_argument("--legado", action="store_true",
+                        help="Usa criar_pedido + atualizar_estoque em vez de finalizar_pedido")
+    parser.add_argument("--multiplicador-estoque", type=int, default=1,
+                        help="Multiplica o estoque dos produtos que não são de estoque baixo")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho_db = os.path.join(diretorio, "carga.db")
+        db = BancoDados(caminho_db, usar_pool=True)
+        for produto in produtos_exemplo:
+            if produto.estoque > LIMITE_ESTOQUE_BAIXO:
+                produto.estoque *= args.multiplicador_estoque
+            db.criar_produto(produto)
+        estoque_inicial = {p.id: p.estoque for p in db.obter_todos_produtos()}
+        estoque_baixo = [pid for pid, estoque in estoque_inicial.items() if estoque <= LIMITE_ESTOQUE_BAIXO]
+        demais = [pid for pid, estoque in estoque_inicial.items() if estoque > LIMITE_ESTOQUE_BAIXO]
+        db.fechar_pools()
+
+        executor_cls = ThreadPoolExecutor if args.modo == "threads" else ProcessPoolExecutor
+        inicio = time.perf_counter()
+        with executor_cls(max_workers=args.compradores) as executor:
+            futuros = [
+                executor.submit(executar_comprador, indice, caminho_db, args.pedidos,
+                                args.legado, args.semente, estoque_baixo, demais)
+                for indice in range(args.compradores)
+            ]
+            resultados = [futuro.result() for futuro in futuros]
+        duracao = time.perf_counter() - inicio
+        fechar_pools()
+
+        latencias = [lat for r in resultados for lat in r['latencias']]
+        totais = {chave: sum(r[chave] for r in resultados)
+                  for chave in ('confirmados', 'recusados', 'bloqueios', 'erros')}
+        invariantes = verificar_estoque(caminho_db, estoque_inicial)
+
+    caminho = "legado (criar_pedido + atualizar_estoque)" if args.legado else "finalizar_pedido"
+    print(f"Checkout: {caminho} | {args.compradores} compradores ({args.modo}) x {args.pedidos} pedidos")
+    print(f"Duração: {duracao:.2f} s | {totais['confirmados'] / duracao:.1f} pedidos/s")
+    print(f"Latência: {resumo_latencias(latencias)}")
+    print(f"Confirmados: {totais['confirmados']} | Recusados (sem estoque): {totais['recusados']} | "
+          f"'database is locked': {totais['bloqueios']} | Outros erros: {totais['erros']}")
+    print(f"Unidades vendidas além do estoque: {invariantes['vendido_a_mais']} | "
+          f"Estoques negativos: {invariantes['estoques_negativos']} | "
+          f"Produtos com estoque divergente: {invariantes['divergentes']}")
+
+    if any(invariantes.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark do catálogo vetorizado (NumPy) x consultar_produtos (SQL).
+
+Mede a carga do retrato, a latência dos filtros da Home (faixa de preço,
+estoque, categoria, ordenações) e a atualização incremental após escritas.
+
+Uso:
+    python -m benchmarks.catalogo_vetorizado --produtos 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.comum import resumo_latencias
+from benchmarks.gerador import gerar_banco
+from src.banco_dados import BancoDados
+from src.catalogo_vetorizado import CatalogoVetorizado, numpy_disponivel
+
+ORDENACOES = ['nome', 'preco', 'preco_desc', 'avaliacao', 'recentes']
+CATEGORIAS = [None, "Periféricos", "Cabos", "Monitores"]
+
+
+def sortear_filtros(aleatorio: random.Random) -> dict:
+    minimo = aleatorio.choice([0, 50, 200])
+    return {
+        'preco_min': minimo,
+        'preco_max': minimo + aleatorio.choice([100, 500, 1000]),
+        'categoria': aleatorio.choice(CATEGORIAS),
+        'somente_em_estoque': aleatorio.random() < 0.5,
+        'ordenar_por': aleatorio.choice(ORDENACOES),
+    }
+
+
+def medir(consulta, filtros: list) -> list:
+    latencias = []
+    for argumentos in filtros:
+        inicio = time.perf_counter()
+        consulta(**argumentos)
+        latencias.append(time.perf_counter() - inicio)
+    return latencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--produtos", type=int, default=200000)
+    parser.add_argument("--consultas", type=int, default=300)
+    args = parser.parse_args()
+
+    if not numpy_disponivel():
+        sys.exit("Este benchmark precisa do NumPy (pip install numpy)")
+
+    aleatorio = random.Random(7)
+    filtros = [sortear_filtros(aleatorio) for _ in range(args.consultas)]
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho_db = os.path.join(diretorio, "vetorizado.db")
+        print(f"Gerando {args.produtos} produtos...")
+        gerar_banco(caminho_db, produtos=args.produtos, usuarios=100, pedidos=0, avaliacoes=0,
+                    ao_progredir=lambda _mensagem: None)
+        db = BancoDados(caminho_db, usar_pool=True)
+        catalogo = CatalogoVetorizado(db)
+
+        inicio = time.perf_counter()
+        catalogo.contar()
+        print(f"Carga do retrato: {time.perf_counter() - inicio:.2f}s")
+        inicio = time.perf_counter()
+        for ordenacao in ORDENACOES:
+            catalogo.consultar_ids(ordenar_por=ordenacao)
+        print(f"Ordenações pré-calculadas: {time.perf_counter() - inicio:.2f}s\n")
+
+        print(f"{args.consultas} consultas com filtros sorteados (só IDs da página)")
+        print(f"  SQL:      {resumo_latencias(medir(db.consultar_produtos, filtros))}")
+        print(f"  NumPy:    {resumo_latencias(medir(catalogo.consultar_ids, filtros))}")
+        print(f"  NumPy + produtos da página: "
+              f"{resumo_latencias(medir(catalogo.consultar_produtos, filtros))}")
+
+        # Escritas: estoque só muda um filtro; preço exige refazer a ordenação por preço
+        for produto_id in aleatorio.sample(range(1, args.produtos + 1), 20):
+            db.atualizar_estoque(produto_id, 1)
+        inicio = time.perf_counter()
+        catalogo.consultar_ids(ordenar_por='preco')
+        print(f"\nAplicar 20 baixas de estoque: {(time.perf_counter() - inicio) * 1000:.2f} ms")
+
+        db.fechar_pools()
+
+
+if __name__ == "__main__":
+    main()
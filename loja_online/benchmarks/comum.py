@@ -0,0 +1,23 @@
+"""
+Funções compartilhadas pelos benchmarks.
+"""
+
+import math
+from typing import List, Sequence
+
+
+def percentil(valores: Sequence[float], p: float) -> float:
+    """Percentil p (0-100) pelo método do vizinho mais próximo."""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    posicao = max(0, math.ceil(p / 100 * len(ordenados)) - 1)
+    return ordenados[posicao]
+
+
+def resumo_latencias(latencias: List[float]) -> str:
+    """Texto com p50/p95/p99/máximo, em milissegundos."""
+    return (f"p50 {percentil(latencias, 50) * 1000:.1f} ms | "
+            f"p95 {percentil(latencias, 95) * 1000:.1f} ms | "
+            f"p99 {percentil(latencias, 99) * 1000:.1f} ms | "
+            f"máx {max(latencias, default=0) * 1000:.1f} ms")
@@ -0,0 +1,144 @@
+"""
+Avaliações gravadas na hora x pela fila de escritas (group commit).
+
+Simula uma onda de avaliações: cada thread avaliadora envia uma avaliação
+e espera a confirmação antes da próxima. No modo direto a confirmação é o
+retorno de criar_avaliacao; com a FilaEscritas a resposta volta ao agendar
+e a confirmação é o Future resolvido depois do commit do grupo. Threads
+compradoras fazem checkout ao mesmo tempo, disputando a conexão de escrita.
+
+O ganho depende do custo do commit: com --synchronous FULL cada commit faz
+fsync do WAL, e a fila paga um fsync por grupo em vez de um por avaliação.
+
+Uso:
+    python -m benchmarks.escrita_adiada --avaliadores 32 --compradores 4 --segundos 10
+    python -m benchmarks.escrita_adiada --synchronous FULL
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from benchmarks.comum import resumo_latencias
+from benchmarks.gerador import gerar_banco
+from src.banco_dados import BancoDados
+from src.escrita_adiada import FilaEscritas
+from src.modelo import Avaliacao, ItemCarrinho, Pedido
+
+
+def medir(db: BancoDados, fila, avaliadores: int, compradores: int, segundos: float) -> dict:
+    conexao = db.obter_conexao_leitura()
+    maior_produto = conexao.execute('SELECT MAX(id) FROM produtos').fetchone()[0]
+    maior_usuario = conexao.execute('SELECT MAX(id) FROM usuarios').fetchone()[0]
+    conexao.close()
+
+    parar = threading.Event()
+    trava = threading.Lock()
+    resultado = {'resposta': [], 'confirmacao': [], 'checkouts': [], 'erros': 0}
+
+    def avaliador(indice: int):
+        aleatorio = random.Random(indice)
+        respostas, confirmacoes, erros = [], [], 0
+        while not parar.is_set():
+            avaliacao = Avaliacao(aleatorio.randint(1, maior_produto), aleatorio.randint(1, maior_usuario),
+                                  aleatorio.randint(1, 5), "Chegou rápido")
+            inicio = time.perf_counter()
+            try:
+                if fila is None:
+                    db.criar_avaliacao(avaliacao)
+                    respostas.append(time.perf_counter() - inicio)
+                else:
+                    futuro = fila.criar_avaliacao(avaliacao)
+                    respostas.append(time.perf_counter() - inicio)
+                    futuro.result()
+                confirmacoes.append(time.perf_counter() - inicio)
+            except sqlite3.Error:
+                erros += 1
+        with trava:
+            resultado['resposta'] += respostas
+            resultado['confirmacao'] += confirmacoes
+            resultado['erros'] += erros
+
+    def comprador(indice: int):
+        aleatorio = random.Random(1000 + indice)
+        latencias, erros = [], 0
+        while not parar.is_set():
+            itens = [ItemCarrinho(aleatorio.randint(1, maior_produto), 1, 10.0)
+                     for _ in range(aleatorio.randint(1, 3))]
+            inicio = time.perf_counter()
+            try:
+                db.finalizar_pedido(Pedido(aleatorio.randint(1, maior_usuario), itens, "Rua do Benchmark, 1"))
+                latencias.append(time.perf_counter() - inicio)
+            except sqlite3.Error:
+                erros += 1
+        with trava:
+            resultado['checkouts'] += latencias
+            resultado['erros'] += erros
+
+    threads = ([threading.Thread(target=avaliador, args=(i,)) for i in range(avaliadores)] +
+               [threading.Thread(target=comprador, args=(i,)) for i in range(compradores)])
+    for thread in threads:
+        thread.start()
+    time.sleep(segundos)
+    parar.set()
+    for thread in threads:
+        thread.join()
+    return resultado
+
+
+def _imprimir(nome: str, resultado: dict, segundos: float, fila):
+    print(f"\n{nome}")
+    print(f"  resposta:     {resumo_latencias(resultado['resposta'])}")
+    print(f"  confirmação:  {resumo_latencias(resultado['confirmacao'])} "
+          f"({len(resultado['confirmacao']) / segundos:,.0f} avaliações/s)")
+    if resultado['checkouts']:
+        print(f"  checkout:     {resumo_latencias(resultado['checkouts'])} "
+              f"({len(resultado['checkouts']) / segundos:,.0f}/s)")
+    if fila is not None:
+        print(f"  {fila.metricas()['por_lote']:.1f} avaliações por commit")
+    print(f"  {resultado['erros']} erros")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--produtos", type=int, default=20000)
+    parser.add_argument("--avaliadores", type=int, default=32)
+    parser.add_argument("--compradores", type=int, default=4)
+    parser.add_argument("--segundos", type=float, default=10.0)
+    parser.add_argument("--janela", type=float, default=0.002, help="Janela do grupo, em segundos")
+    parser.add_argument("--synchronous", default="NORMAL", choices=["NORMAL", "FULL"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        original = os.path.join(diretorio, "original.db")
+        gerar_banco(original, produtos=args.produtos, usuarios=1000, pedidos=args.produtos,
+                    avaliacoes=args.produtos, ao_progredir=lambda _mensagem: None)
+        conexao = sqlite3.connect(original)
+        conexao.execute('UPDATE produtos SET estoque = 1000000')
+        conexao.commit()
+        conexao.close()
+        print(f"{args.produtos} produtos, {args.avaliadores} avaliadores, {args.compradores} compradores, "
+              f"{args.segundos:.0f}s por cenário, synchronous={args.synchronous} ({os.cpu_count()} CPUs)")
+
+        for indice, (nome, com_fila) in enumerate((
+            ("Avaliação gravada na hora (criar_avaliacao)", False),
+            (f"FilaEscritas (janela de {args.janela * 1000:g} ms)", True),
+        )):
+            caminho = os.path.join(diretorio, f"cenario{indice}.db")
+            shutil.copy(original, caminho)
+            db = BancoDados(caminho, usar_pool=True, pragmas={'synchronous': args.synchronous})
+            fila = FilaEscritas(db, janela=args.janela) if com_fila else None
+            resultado = medir(db, fila, args.avaliadores, args.compradores, args.segundos)
+            if fila is not None:
+                fila.fechar()
+            db.fechar_pools()
+            _imprimir(nome, resultado, args.segundos, fila)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Gerador de dados sintéticos para os benchmarks.
+
+Preenche produtos, usuários, pedidos (com itens) e avaliações em volumes
+configuráveis, sempre com o mesmo resultado para a mesma semente. As
+distribuições imitam uma loja real: poucas categorias concentram a maior
+parte do catálogo, preços seguem uma lognormal por categoria, alguns
+produtos e clientes respondem pela maioria das vendas e as notas se
+concentram em 4 e 5 estrelas.
+
+Uso:
+    python -m benchmarks.gerador dados/bench.db --escala media
+    python -m benchmarks.gerador dados/bench.db --produtos 50000 --pedidos 2000000
+"""
+
+import argparse
+import bisect
+import itertools
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from src.banco_dados import BancoDados
+from src.migracoes import RECALCULAR_AVALIACOES, RECALCULAR_RESUMO_USUARIOS, RECALCULAR_VENDAS
+
+# (categoria, peso no catálogo, preço mediano)
+CATEGORIAS = [
+    ("Periféricos", 30, 150.0),
+    ("Componentes", 22, 600.0),
+    ("Cabos", 14, 45.0),
+    ("Monitores", 8, 1200.0),
+    ("Notebooks", 6, 4500.0),
+    ("Armazenamento", 7, 400.0),
+    ("Redes", 5, 250.0),
+    ("Áudio", 4, 300.0),
+    ("Acessórios", 3, 80.0),
+    ("Cadeiras", 1, 1500.0),
+]
+PALAVRAS = [
+    "Teclado", "Mecânico", "Mouse", "Monitor", "Notebook", "Cabo", "Adaptador",
+    "Gamer", "RGB", "Sem Fio", "USB", "HDMI", "Placa", "Vídeo", "Memória", "SSD",
+    "Fonte", "Gabinete", "Cooler", "Headset", "Webcam", "Hub", "Processador",
+    "Roteador", "Switch", "Caixa de Som", "Microfone", "Suporte", "Cadeira", "Pro",
+]
+STATUS = ["Pendente", "Confirmado", "Enviado", "Entregue", "Cancelado"]
+PESOS_STATUS = [5, 10, 15, 65, 5]
+PESOS_NOTAS = [8, 4, 10, 25, 53]  # notas 1 a 5
+COMENTARIOS = ["Ótimo produto", "Chegou rápido", "Bom custo-benefício",
+               "Não gostei", "Qualidade razoável", "Recomendo", ""]
+
+# Volumes pré-definidos; qualquer um pode ser sobrescrito pela linha de comando
+ESCALAS = {
+    'pequena': {'produtos': 10000, 'usuarios': 2000, 'pedidos': 50000, 'avaliacoes': 20000},
+    'media': {'produtos': 100000, 'usuarios': 20000, 'pedidos': 500000, 'avaliacoes': 200000},
+    'grande': {'produtos': 1000000, 'usuarios': 200000, 'pedidos': 5000000, 'avaliacoes': 2000000},
+}
+
+LINHAS_POR_TRANSACAO = 50000
+DIAS_DE_HISTORICO = 730
+
+
+class _Popularidade:
+    """Sorteia índices 0..n-1 com cauda longa (poucos muito populares)."""
+
+    def __init__(self, aleatorio: random.Random, quantidade: int, expoente: float = 1.1):
+        acumulados = itertools.accumulate(1 / (posicao + 1) ** expoente for posicao in range(quantidade))
+        self.acumulados = list(acumulados)
+        # Embaralha para que os populares não sejam sempre os primeiros ids
+        self.ordem = list(range(quantidade))
+        aleatorio.shuffle(self.ordem)
+        self.aleatorio = aleatorio
+
+    def sortear(self) -> int:
+        alvo = self.aleatorio.random() * self.acumulados[-1]
+        return self.ordem[bisect.bisect_left(self.acumulados, alvo)]
+
+
+def _em_lotes(linhas, tamanho: int):
+    iterador = iter(linhas)
+    while True:
+        lote = list(itertools.islice(iterador, tamanho))
+        if not lote:
+            return
+        yield lote
+
+
+def _inserir(conexao, sql: str, linhas) -> int:
+    total = 0
+    for lote in _em_lotes(linhas, LINHAS_POR_TRANSACAO):
+        conexao.execute('BEGIN')
+        conexao.executemany(sql, lote)
+        conexao.commit()
+        total += len(lote)
+    return total
+
+
+def gerar_banco(caminho_db: str, produtos: int, usuarios: int, pedidos: int, avaliacoes: int,
+                semente: int = 42, ao_progredir=print) -> Dict[str, int]:
+    """Cria (ou completa) o banco com os volumes pedidos e retorna as contagens."""
+    aleatorio = random.Random(semente)
+    db = BancoDados(caminho_db)
+    conexao = db.obter_conexao()
+    conexao.execute('PRAGMA synchronous = OFF')
+    agora = datetime(2025, 6, 30, 12, 0, 0)
+
+    def data_aleatoria() -> str:
+        atraso = timedelta(seconds=aleatorio.randrange(DIAS_DE_HISTORICO * 86400))
+        return (agora - atraso).strftime('%Y-%m-%d %H:%M:%S')
+
+    inicio = time.perf_counter()
+    nomes_categorias = [nome for nome, _peso, _preco in CATEGORIAS]
+    pesos_categorias = [peso for _nome, peso, _preco in CATEGORIAS]
+    medianas = {nome: preco for nome, _peso, preco in CATEGORIAS}
+    precos: List[float] = []
+
+    def linhas_produtos():
+        for numero in range(produtos):
+            categoria = aleatorio.choices(nomes_categorias, pesos_categorias)[0]
+            preco = round(medianas[categoria] * aleatorio.lognormvariate(0, 0.6), 2)
+            precos.append(preco)
+            estoque = 0 if aleatorio.random() < 0.1 else int(aleatorio.expovariate(1 / 40)) + 1
+            yield (
+                f"SKU-{semente}-{numero:08d}",
+                " ".join(aleatorio.sample(PALAVRAS, 3)),
+                " ".join(aleatorio.choices(PALAVRAS, k=12)),
+                preco, estoque, categoria, data_aleatoria(),
+            )
+
+    _inserir(conexao, '''
+        INSERT INTO produtos (sku, nome, descricao, preco, estoque, categoria, data_criacao)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', linhas_produtos())
+    primeiro_produto = conexao.execute('SELECT MAX(id) FROM produtos').fetchone()[0] - produtos + 1
+    ao_progredir(f"  {produtos} produtos ({time.perf_counter() - inicio:.1f}s)")
+
+    _inserir(conexao, '''
+        INSERT INTO usuarios (nome, email, senha, telefone, endereco, data_cadastro)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (
+        (f"Cliente {numero}", f"cliente{semente}-{numero}@bench.local", "senha123",
+         f"(11) 9{numero % 100000000:08d}", f"Rua {numero % 997}, {numero % 1000}", data_aleatoria())
+        for numero in range(usuarios)
+    ))
+    primeiro_usuario = conexao.execute('SELECT MAX(id) FROM usuarios').fetchone()[0] - usuarios + 1
+    ao_progredir(f"  {usuarios} usuários ({time.perf_counter() - inicio:.1f}s)")
+
+    mais_vendidos = _Popularidade(aleatorio, produtos)
+    melhores_clientes = _Popularidade(aleatorio, usuarios, expoente=0.8)
+    proximo_pedido = (conexao.execute('SELECT MAX(id) FROM pedidos').fetchone()[0] or 0) + 1
+    itens: list = []
+
+    def linhas_pedidos():
+        for pedido_id in range(proximo_pedido, proximo_pedido + pedidos):
+            subtotal = 0.0
+            for _ in range(min(8, int(aleatorio.expovariate(1 / 1.5)) + 1)):
+                indice = mais_vendidos.sortear()
+                quantidade = aleatorio.choices([1, 2, 3], [80, 15, 5])[0]
+                itens.append((pedido_id, primeiro_produto + indice, quantidade, precos[indice]))
+                subtotal += precos[indice] * quantidade
+            frete = 0.0 if subtotal >= 200 else 15.0
+            yield (
+                pedido_id, primeiro_usuario + melhores_clientes.sortear(), "Rua do Benchmark, 1",
+                round(subtotal, 2), frete, round(subtotal + frete, 2),
+                aleatorio.choices(STATUS, PESOS_STATUS)[0], data_aleatoria(),
+            )
+
+    sql_pedidos = '''
+        INSERT INTO pedidos (id, usuario_id, endereco_entrega, valor_subtotal, valor_frete,
+                             valor_total, status, data_pedido)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    sql_itens = '''
+        INSERT INTO itens_pedido (pedido_id, produto_id, quantidade, preco_unitario)
+        VALUES (?, ?, ?, ?)
+    '''
+    total_itens = 0
+    for lote in _em_lotes(linhas_pedidos(), LINHAS_POR_TRANSACAO):
+        conexao.execute('BEGIN')
+        conexao.executemany(sql_pedidos, lote)
+        conexao.executemany(sql_itens, itens)
+        conexao.commit()
+        total_itens += len(itens)
+        itens.clear()
+    conexao.execute('BEGIN')
+    for comando in RECALCULAR_RESUMO_USUARIOS + RECALCULAR_VENDAS:
+        conexao.execute(comando)
+    conexao.commit()
+    ao_progredir(f"  {pedidos} pedidos, {total_itens} itens ({time.perf_counter() - inicio:.1f}s)")
+
+    _inserir(conexao, '''
+        INSERT INTO avaliacoes (produto_id, usuario_id, nota, comentario, data_avaliacao)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (
+        (primeiro_produto + mais_vendidos.sortear(), primeiro_usuario + melhores_clientes.sortear(),
+         aleatorio.choices(range(1, 6), PESOS_NOTAS)[0], aleatorio.choice(COMENTARIOS), data_aleatoria())
+        for _ in range(avaliacoes)
+    ))
+    conexao.execute('BEGIN')
+    for comando in RECALCULAR_AVALIACOES:
+        conexao.execute(comando)
+    conexao.commit()
+    conexao.execute('ANALYZE')
+    ao_progredir(f"  {avaliacoes} avaliações ({time.perf_counter() - inicio:.1f}s)")
+
+    contagens = {
+        tabela: conexao.execute(f'SELECT COUNT(*) FROM {tabela}').fetchone()[0]
+        for tabela in ('produtos', 'usuarios', 'pedidos', 'itens_pedido', 'avaliacoes')
+    }
+    conexao.close()
+    return contagens
+
+
+def adicionar_argumentos_volume(parser: argparse.ArgumentParser):
+    """Opções de volume compartilhadas com a suíte de benchmarks."""
+    parser.add_argument("--escala", choices=sorted(ESCALAS), default="pequena")
+    parser.add_argument("--produtos", type=int, help="Sobrescreve o volume da escala")
+    parser.add_argument("--usuarios", type=int)
+    parser.add_argument("--pedidos", type=int)
+    parser.add_argument("--avaliacoes", type=int)
+    parser.add_argument("--semente", type=int, default=42)
+
+
+def volumes(args) -> Dict[str, int]:
+    escolhidos = dict(ESCALAS[args.escala])
+    for tabela in escolhidos:
+        if getattr(args, tabela) is not None:
+            escolhidos[tabela] = getattr(args, tabela)
+    return escolhidos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("destino", help="Arquivo SQLite a criar")
+    adicionar_argumentos_volume(parser)
+    args = parser.parse_args()
+
+    if os.path.exists(args.destino):
+        parser.error(f"{args.destino} já existe; escolha outro arquivo")
+
+    print(f"Gerando {args.destino} ({args.escala}, semente {args.semente})")
+    contagens = gerar_banco(args.destino, semente=args.semente, **volumes(args))
+    for tabela, total in contagens.items():
+        print(f"{tabela:<14}{total:>12}")
+
+
+if __name__ == "__main__":
+    main()
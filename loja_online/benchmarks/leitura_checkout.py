@@ -0,0 +1,155 @@
+"""
+Latência da navegação no catálogo com o checkout saturado.
+
+Compara o caminho anterior, em que leituras e escritas dividem um único pool
+de conexões de leitura e escrita, com o atual: leituras em conexões somente
+leitura (mode=ro, query_only) sobre o WAL e escritas em fila numa só
+conexão. Threads compradoras repetem finalizar_pedido sem pausa enquanto
+threads navegadoras medem listagem, detalhe, busca e categoria.
+
+O cenário atual usa --leitores conexões de leitura (padrão:
+TAMANHO_POOL_LEITURA, duas por CPU). Com mais leitores que isso, o escritor
+único perde CPU para eles e o checkout cai.
+
+Uso:
+    python -m benchmarks.leitura_checkout --produtos 20000 --compradores 16 --navegadores 8 --segundos 10
+    python -m benchmarks.leitura_checkout --leitores 8
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from benchmarks.comum import resumo_latencias
+from benchmarks.gerador import gerar_banco
+from src.banco_dados import BancoDados
+from src.modelo import ItemCarrinho, Pedido
+from src.pool_conexoes import TAMANHO_POOL_LEITURA, PoolConexoes
+
+TAMANHO_POOL = 8
+TERMOS = ['cabo', 'monitor', 'teclado', 'usb', 'gamer', 'ssd']
+
+
+class BancoDadosPoolUnico(BancoDados):
+    """Como era antes: o mesmo pool de leitura e escrita para tudo."""
+
+    def __init__(self, caminho_db: str, tamanho_pool: int):
+        super().__init__(caminho_db)
+        self.pool = PoolConexoes(caminho_db, tamanho_pool)
+
+
+def _navegar(db: BancoDados, aleatorio: random.Random, maior_produto: int, categorias: list):
+    sorteio = aleatorio.random()
+    if sorteio < 0.4:
+        db.consultar_produtos(preco_min=aleatorio.choice([0, 50, 200]), somente_em_estoque=True,
+                              ordenar_por=aleatorio.choice(['nome', 'preco', 'avaliacao']))
+    elif sorteio < 0.7:
+        db.obter_produto(aleatorio.randint(1, maior_produto))
+    elif sorteio < 0.85:
+        db.consultar_produtos(termo=aleatorio.choice(TERMOS), ordenar_por='relevancia')
+    else:
+        db.consultar_produtos(categoria=aleatorio.choice(categorias), ordenar_por='preco')
+
+
+def medir(db: BancoDados, compradores: int, navegadores: int, segundos: float) -> dict:
+    conexao = db.obter_conexao()
+    maior_produto = conexao.execute('SELECT MAX(id) FROM produtos').fetchone()[0]
+    maior_usuario = conexao.execute('SELECT MAX(id) FROM usuarios').fetchone()[0]
+    categorias = [linha[0] for linha in conexao.execute('SELECT DISTINCT categoria FROM produtos')]
+    conexao.close()
+
+    parar = threading.Event()
+    trava = threading.Lock()
+    resultado = {'navegacao': [], 'checkouts': [], 'erros_navegacao': 0, 'erros_checkout': 0}
+
+    def comprador(indice: int):
+        aleatorio = random.Random(indice)
+        latencias, erros = [], 0
+        while not parar.is_set():
+            itens = [ItemCarrinho(aleatorio.randint(1, maior_produto), 1, 10.0)
+                     for _ in range(aleatorio.randint(1, 3))]
+            inicio = time.perf_counter()
+            try:
+                db.finalizar_pedido(Pedido(aleatorio.randint(1, maior_usuario), itens, "Rua do Benchmark, 1"))
+                latencias.append(time.perf_counter() - inicio)
+            except sqlite3.OperationalError:
+                erros += 1
+        with trava:
+            resultado['checkouts'] += latencias
+            resultado['erros_checkout'] += erros
+
+    def navegador(indice: int):
+        aleatorio = random.Random(1000 + indice)
+        latencias, erros = [], 0
+        while not parar.is_set():
+            inicio = time.perf_counter()
+            try:
+                _navegar(db, aleatorio, maior_produto, categorias)
+                latencias.append(time.perf_counter() - inicio)
+            except sqlite3.OperationalError:
+                erros += 1
+        with trava:
+            resultado['navegacao'] += latencias
+            resultado['erros_navegacao'] += erros
+
+    threads = ([threading.Thread(target=comprador, args=(i,)) for i in range(compradores)] +
+               [threading.Thread(target=navegador, args=(i,)) for i in range(navegadores)])
+    for thread in threads:
+        thread.start()
+    time.sleep(segundos)
+    parar.set()
+    for thread in threads:
+        thread.join()
+    return resultado
+
+
+def _imprimir(nome: str, resultado: dict, segundos: float):
+    print(f"\n{nome}")
+    print(f"  navegação: {resumo_latencias(resultado['navegacao'])} "
+          f"({len(resultado['navegacao']) / segundos:,.0f}/s, {resultado['erros_navegacao']} erros)")
+    print(f"  checkout:  {resumo_latencias(resultado['checkouts'])} "
+          f"({len(resultado['checkouts']) / segundos:,.0f}/s, {resultado['erros_checkout']} erros)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--produtos", type=int, default=20000)
+    parser.add_argument("--compradores", type=int, default=16)
+    parser.add_argument("--navegadores", type=int, default=8)
+    parser.add_argument("--segundos", type=float, default=10.0)
+    parser.add_argument("--leitores", type=int, default=TAMANHO_POOL_LEITURA,
+                        help="Conexões de leitura do cenário atual")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        original = os.path.join(diretorio, "original.db")
+        gerar_banco(original, produtos=args.produtos, usuarios=1000, pedidos=args.produtos,
+                    avaliacoes=args.produtos, ao_progredir=lambda _mensagem: None)
+        conexao = sqlite3.connect(original)
+        conexao.execute('UPDATE produtos SET estoque = 1000000')
+        conexao.commit()
+        conexao.close()
+        print(f"{args.produtos} produtos, {args.compradores} compradores, {args.navegadores} navegadores, "
+              f"{args.segundos:.0f}s por cenário ({os.cpu_count()} CPUs)")
+
+        for indice, (nome, criar) in enumerate((
+            ("Pool único de leitura e escrita (anterior)",
+             lambda caminho: BancoDadosPoolUnico(caminho, TAMANHO_POOL)),
+            (f"Leituras somente leitura ({args.leitores} conexões) + escritor único (atual)",
+             lambda caminho: BancoDados(caminho, usar_pool=True, tamanho_pool=args.leitores)),
+        )):
+            caminho = os.path.join(diretorio, f"cenario{indice}.db")
+            shutil.copy(original, caminho)
+            db = criar(caminho)
+            resultado = medir(db, args.compradores, args.navegadores, args.segundos)
+            db.fechar_pools()
+            _imprimir(nome, resultado, args.segundos)
+
+
+if __name__ == "__main__":
+    main()
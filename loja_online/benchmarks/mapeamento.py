@@ -0,0 +1,77 @@
+"""
+Benchmark da materialização de produtos: SELECT * com sqlite3.Row e
+Produto(...) por nome de coluna (caminho anterior) x colunas explícitas com
+row_factory de src.mapeamento.
+
+Uso:
+    python -m benchmarks.mapeamento --produtos 200000
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.gerador import gerar_banco
+from src.banco_dados import BancoDados
+from src.modelo import Produto
+
+
+def materializar_com_row(db: BancoDados) -> list:
+    """Reproduz a hidratação anterior, linha a linha por nome de coluna."""
+    conexao = db.obter_conexao()
+    conexao.row_factory = sqlite3.Row
+    linhas = conexao.execute('SELECT * FROM produtos ORDER BY nome').fetchall()
+    conexao.close()
+
+    produtos = []
+    for linha in linhas:
+        produto = Produto(
+            id=linha['id'],
+            nome=linha['nome'],
+            descricao=linha['descricao'],
+            preco=linha['preco'],
+            estoque=linha['estoque'],
+            categoria=linha['categoria']
+        )
+        produto.avaliacao_media = linha['avaliacao_media']
+        produto.total_avaliacoes = linha['total_avaliacoes']
+        produtos.append(produto)
+    return produtos
+
+
+def medir(funcao, repeticoes: int) -> float:
+    """Melhor tempo entre as repetições, em segundos."""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--produtos", type=int, default=200000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho_db = os.path.join(diretorio, "mapeamento.db")
+        gerar_banco(caminho_db, produtos=args.produtos, usuarios=1, pedidos=0, avaliacoes=0,
+                    ao_progredir=lambda _mensagem: None)
+        db = BancoDados(caminho_db, usar_pool=True)
+
+        anterior = medir(lambda: materializar_com_row(db), args.repeticoes)
+        atual = medir(lambda: db.obter_todos_produtos(), args.repeticoes)
+
+        print(f"{args.produtos} produtos, melhor de {args.repeticoes}")
+        print(f"SELECT * + sqlite3.Row:        {anterior:.3f}s ({args.produtos / anterior:,.0f} produtos/s)")
+        print(f"colunas + row_factory:         {atual:.3f}s ({args.produtos / atual:,.0f} produtos/s)")
+        print(f"ganho: {anterior / atual:.2f}x")
+        db.fechar_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark dos modelos: memória e velocidade de construção de N produtos.
+
+Compara o Produto atual (com __slots__ e data lida da linha) com a classe
+anterior (com __dict__ e datetime.now() em todo construtor), hidratando a
+partir de linhas como as que o banco devolve.
+
+Uso:
+    python -m benchmarks.modelos --produtos 1000000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import datetime
+
+from src.modelo import Produto
+
+
+class ProdutoLegado:
+    """Produto como era antes de __slots__ (referência do benchmark)."""
+
+    def __init__(self, nome, descricao, preco, estoque, categoria, id=None):
+        self.id = id
+        self.nome = nome
+        self.descricao = descricao
+        self.preco = preco
+        self.estoque = estoque
+        self.categoria = categoria
+        self.data_criacao = datetime.now()
+        self.avaliacao_media = 0.0
+        self.total_avaliacoes = 0
+
+
+def gerar_linhas(quantidade: int) -> list:
+    # Strings compartilhadas: mede só o custo dos objetos Produto
+    return [(i, f"SKU-{i % 1000}", "Produto", "Descrição", 99.9, 10, "Periféricos",
+             "2025-01-01 12:00:00", 4.5, 10) for i in range(quantidade)]
+
+
+def construir_legado(linhas) -> list:
+    produtos = []
+    for id_, _sku, nome, descricao, preco, estoque, categoria, _data, media, total in linhas:
+        produto = ProdutoLegado(nome, descricao, preco, estoque, categoria, id_)
+        produto.avaliacao_media = media
+        produto.total_avaliacoes = total
+        produtos.append(produto)
+    return produtos
+
+
+def construir_atual(linhas) -> list:
+    return [Produto(nome, descricao, preco, estoque, categoria, id_, sku, data, media, total)
+            for id_, sku, nome, descricao, preco, estoque, categoria, data, media, total in linhas]
+
+
+def medir(construir, linhas) -> tuple:
+    """(segundos, bytes) para construir a lista de produtos."""
+    gc.collect()
+    inicio = time.perf_counter()
+    produtos = construir(linhas)
+    segundos = time.perf_counter() - inicio
+    del produtos
+
+    gc.collect()
+    tracemalloc.start()
+    produtos = construir(linhas)
+    memoria = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del produtos
+    return segundos, memoria
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--produtos", type=int, default=1000000)
+    args = parser.parse_args()
+
+    linhas = gerar_linhas(args.produtos)
+    print(f"{args.produtos} produtos")
+    print(f"{'modelo':<10}{'tempo (s)':>11}{'produtos/s':>14}{'memória (MB)':>15}{'bytes/produto':>15}")
+    resultados = {}
+    for nome, construir in (("anterior", construir_legado), ("atual", construir_atual)):
+        segundos, memoria = medir(construir, linhas)
+        resultados[nome] = (segundos, memoria)
+        print(f"{nome:<10}{segundos:>11.2f}{args.produtos / segundos:>14,.0f}"
+              f"{memoria / 2 ** 20:>15.1f}{memoria / args.produtos:>15.0f}")
+
+    (tempo_antes, memoria_antes), (tempo_depois, memoria_depois) = resultados.values()
+    print(f"\nMemória: {memoria_antes / memoria_depois:.1f}x menor | "
+          f"Construção: {tempo_antes / tempo_depois:.1f}x mais rápida")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Relatórios de vendas: agregação direta no histórico x resumos incrementais.
+
+Gera (ou reaproveita, com --banco) um banco com milhões de pedidos e mede
+cada relatório de src/relatorios.py contra a consulta equivalente sobre
+pedidos + itens_pedido + produtos, conferindo que os resultados batem. No
+fim mede o custo que os resumos acrescentam ao checkout.
+
+Uso:
+    python -m benchmarks.relatorios --pedidos 2000000
+    python -m benchmarks.relatorios --banco dados/bench.db --repeticoes 10
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks.comum import percentil, resumo_latencias
+from benchmarks.gerador import gerar_banco
+from src.banco_dados import BancoDados
+from src.modelo import ItemCarrinho, Pedido
+from src.relatorios import Relatorios
+
+# Último mês do histórico gerado (que termina em 2025-06-30)
+MES = ('2025-06-01', '2025-06-30')
+
+DIRETO_POR_CATEGORIA = '''
+    SELECT COALESCE(pr.categoria, '') AS categoria, COUNT(DISTINCT ip.pedido_id) AS pedidos,
+           SUM(ip.quantidade) AS unidades, ROUND(SUM(ip.quantidade * ip.preco_unitario), 2) AS receita
+    FROM itens_pedido ip
+    JOIN pedidos pe ON pe.id = ip.pedido_id
+    LEFT JOIN produtos pr ON pr.id = ip.produto_id
+    WHERE pe.data_pedido >= ? AND pe.data_pedido < date(?, '+1 day')
+    GROUP BY 1
+    ORDER BY receita DESC
+'''
+
+DIRETO_DIARIO = '''
+    SELECT date(pe.data_pedido) AS dia, SUM(ip.quantidade) AS unidades,
+           ROUND(SUM(ip.quantidade * ip.preco_unitario), 2) AS receita
+    FROM itens_pedido ip
+    JOIN pedidos pe ON pe.id = ip.pedido_id
+    WHERE pe.data_pedido >= ? AND pe.data_pedido < date(?, '+1 day')
+    GROUP BY 1
+    ORDER BY 1
+'''
+
+DIRETO_MAIS_VENDIDOS = '''
+    SELECT v.produto_id, p.nome, p.categoria, v.pedidos, v.unidades, v.receita
+    FROM (
+        SELECT produto_id, COUNT(DISTINCT pedido_id) AS pedidos, SUM(quantidade) AS unidades,
+               ROUND(SUM(quantidade * preco_unitario), 2) AS receita
+        FROM itens_pedido GROUP BY produto_id
+    ) v
+    LEFT JOIN produtos p ON p.id = v.produto_id
+    ORDER BY v.unidades DESC
+    LIMIT ?
+'''
+
+DIRETO_POR_STATUS = '''
+    SELECT status, COUNT(*) AS pedidos, ROUND(SUM(valor_total), 2) AS valor_total
+    FROM pedidos GROUP BY status ORDER BY pedidos DESC
+'''
+
+
+def _consulta_direta(db: BancoDados, sql: str, parametros=()):
+    def consultar():
+        conexao = db.obter_conexao()
+        try:
+            return [dict(linha) for linha in conexao.execute(sql, parametros)]
+        finally:
+            conexao.close()
+    return consultar
+
+
+def _medir(chamada, repeticoes: int, tempo_maximo: float):
+    resultado = chamada()  # aquecimento (e resultado para a conferência)
+    latencias = []
+    inicio = time.perf_counter()
+    while len(latencias) < repeticoes and (not latencias or time.perf_counter() - inicio < tempo_maximo):
+        antes = time.perf_counter()
+        chamada()
+        latencias.append(time.perf_counter() - antes)
+    return resultado, latencias
+
+
+def _iguais(direto: list, resumo: list, chave: str) -> bool:
+    """Compara os relatórios ignorando a ordem de empates e arredondamentos."""
+    por_chave = {linha[chave]: linha for linha in resumo}
+    if len(direto) != len(resumo):
+        return False
+    for linha in direto:
+        outra = por_chave.get(linha[chave])
+        if outra is None:
+            return False
+        for campo, valor in linha.items():
+            if isinstance(valor, float) and abs(valor - outra[campo]) > 0.05:
+                return False
+            if not isinstance(valor, float) and valor != outra[campo]:
+                return False
+    return True
+
+
+def comparar_relatorios(db: BancoDados, repeticoes: int, tempo_maximo: float):
+    relatorios = Relatorios(db)
+    casos = [
+        ("receita por categoria (mês)", 'categoria',
+         _consulta_direta(db, DIRETO_POR_CATEGORIA, MES),
+         lambda: relatorios.receita_por_categoria(*MES)),
+        ("receita por categoria (tudo)", 'categoria',
+         _consulta_direta(db, DIRETO_POR_CATEGORIA, ('1900-01-01', '2999-12-31')),
+         lambda: relatorios.receita_por_categoria()),
+        ("receita diária (mês)", 'dia',
+         _consulta_direta(db, DIRETO_DIARIO, MES),
+         lambda: relatorios.receita_diaria(*MES)),
+        ("mais vendidos (top 10)", 'produto_id',
+         _consulta_direta(db, DIRETO_MAIS_VENDIDOS, (10,)),
+         lambda: relatorios.mais_vendidos(10)),
+        ("pedidos por status", 'status',
+         _consulta_direta(db, DIRETO_POR_STATUS),
+         lambda: relatorios.pedidos_por_status()),
+    ]
+
+    print(f"\n{'relatório':<30}{'direto p50':>13}{'resumo p50':>13}{'ganho':>9}  confere")
+    for nome, chave, direto, resumo in casos:
+        resultado_direto, tempos_direto = _medir(direto, repeticoes, tempo_maximo)
+        resultado_resumo, tempos_resumo = _medir(resumo, repeticoes * 10, tempo_maximo)
+        p50_direto = percentil(tempos_direto, 50)
+        p50_resumo = percentil(tempos_resumo, 50)
+        confere = "✅" if _iguais(resultado_direto, resultado_resumo, chave) else "❌"
+        print(f"{nome:<30}{p50_direto * 1000:>10.1f} ms{p50_resumo * 1000:>10.3f} ms"
+              f"{p50_direto / p50_resumo:>8.0f}x  {confere}")
+
+
+def medir_checkout(db: BancoDados, pedidos: int, semente: int):
+    """Latência do checkout com os resumos e o custo só dos resumos."""
+    aleatorio = random.Random(semente)
+    conexao = db.obter_conexao()
+    maior_produto = conexao.execute('SELECT MAX(id) FROM produtos').fetchone()[0]
+    maior_usuario = conexao.execute('SELECT MAX(id) FROM usuarios').fetchone()[0]
+    conexao.execute('UPDATE produtos SET estoque = estoque + ?', (pedidos * 3,))
+    conexao.commit()
+    conexao.close()
+
+    checkouts, resumos = [], []
+    for _ in range(pedidos):
+        itens = [ItemCarrinho(aleatorio.randint(1, maior_produto), 1, 10.0)
+                 for _ in range(aleatorio.randint(1, 4))]
+        antes = time.perf_counter()
+        resultado = db.finalizar_pedido(Pedido(aleatorio.randint(1, maior_usuario), itens, "Rua do Benchmark, 1"))
+        checkouts.append(time.perf_counter() - antes)
+
+        # Reaplica só os resumos do pedido recém-criado e desfaz
+        conexao = db.obter_conexao()
+        cursor = conexao.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        antes = time.perf_counter()
+        db._atualizar_resumos(cursor, resultado.pedido_id)
+        resumos.append(time.perf_counter() - antes)
+        conexao.rollback()
+        conexao.close()
+
+    print(f"\nCheckout com resumos ({pedidos} pedidos): {resumo_latencias(checkouts)}")
+    print(f"  só os resumos:                       {resumo_latencias(resumos)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--banco", help="Banco já gerado (é copiado antes de medir)")
+    parser.add_argument("--produtos", type=int, default=50000)
+    parser.add_argument("--usuarios", type=int, default=50000)
+    parser.add_argument("--pedidos", type=int, default=1000000)
+    parser.add_argument("--repeticoes", type=int, default=5, help="Da consulta direta (os resumos: 10x)")
+    parser.add_argument("--tempo-maximo", type=float, default=20.0, help="Segundos por consulta")
+    parser.add_argument("--checkouts", type=int, default=500)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho_db = os.path.join(diretorio, "relatorios.db")
+        if args.banco:
+            shutil.copy(args.banco, caminho_db)
+        else:
+            print(f"Gerando {args.pedidos} pedidos...")
+            gerar_banco(caminho_db, produtos=args.produtos, usuarios=args.usuarios, pedidos=args.pedidos,
+                        avaliacoes=0, semente=args.semente)
+
+        db = BancoDados(caminho_db, usar_pool=True)
+        inicio = time.perf_counter()
+        total = db.reconstruir_resumos()
+        print(f"{total} pedidos no histórico; resumos reconstruídos em {time.perf_counter() - inicio:.1f}s")
+        comparar_relatorios(db, args.repeticoes, args.tempo_maximo)
+        medir_checkout(db, args.checkouts, args.semente)
+        db.fechar_pools()
+
+
+if __name__ == "__main__":
+    main()
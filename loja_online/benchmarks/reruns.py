@@ -0,0 +1,147 @@
+"""
+Latência dos reruns do app.py, página por página, com o AppTest do Streamlit.
+
+Cada cenário (abrir uma página, mover um filtro, adicionar ao carrinho,
+paginar...) é repetido e o tempo do rerun é medido. O AppTest sempre roda o
+script inteiro, inclusive quando o clique é num fragmento; o tempo real do
+rerun parcial vem das medições que o próprio app guarda na sessão
+(utilitarios.medir_execucao) e aparece em "medido pelo app".
+
+Para comparar com outra versão do app:
+    git show HEAD~1:loja_online/app.py > app_anterior.py
+    python -m benchmarks.reruns --app app_anterior.py
+    python -m benchmarks.reruns --app app.py
+
+Uso:
+    python -m benchmarks.reruns --produtos 20000 --repeticoes 20
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.comum import percentil
+from benchmarks.gerador import gerar_banco
+
+MENU = "menu_principal"
+SECAO_HOME = "secao_home"
+
+
+def _com_chave(elementos, chave: str):
+    return next((elemento for elemento in elementos if elemento.key == chave), None)
+
+
+def _com_rotulo(elementos, rotulo: str):
+    return next((elemento for elemento in elementos if elemento.label == rotulo), None)
+
+
+def _abrir_secao(app, secao: str):
+    """Seleciona a seção da Home (nas versões com abas, todas já rodam)."""
+    radio = _com_chave(app.radio, SECAO_HOME)
+    if radio is not None and radio.value != secao:
+        radio.set_value(secao).run()
+
+
+def _abrir_menu(app, pagina: str):
+    radio = _com_chave(app.radio, MENU)
+    if radio.value != pagina:
+        radio.set_value(pagina).run()
+
+
+def _primeiro_botao(app, prefixo: str):
+    return next(botao for botao in app.button
+                if botao.key and botao.key.startswith(prefixo) and botao.key[len(prefixo):].isdigit())
+
+
+def cenarios(repeticao: int) -> list:
+    """(nome, preparar, agir): preparar põe o app no estado certo; agir é o rerun medido."""
+    termo = ["cabo", "monitor", "usb", "gamer"][repeticao % 4]
+    return [
+        ("Home: abrir", lambda app: _abrir_menu(app, "🏠 Home"),
+         lambda app: app.run()),
+        ("Home: mover filtro de preço", lambda app: _abrir_secao(app, "🔍 Todos os Produtos"),
+         lambda app: _com_chave(app.slider, "preco_min_tab1").set_value(10 * (repeticao % 2)).run()),
+        ("Home: adicionar ao carrinho", lambda app: _abrir_secao(app, "🔍 Todos os Produtos"),
+         lambda app: _primeiro_botao(app, "add_").click().run()),
+        ("Home: próxima página", lambda app: _abrir_secao(app, "🔍 Todos os Produtos"),
+         lambda app: _com_chave(app.button, "proxima_todos").click().run()),
+        ("Categoria: trocar categoria", lambda app: _abrir_secao(app, "📂 Por Categoria"),
+         lambda app: _trocar_categoria(app)),
+        ("Busca: digitar termo", lambda app: _abrir_secao(app, "🔎 Buscar"),
+         lambda app: _com_rotulo(app.text_input, "Digite o nome ou descrição do produto:")
+         .input(termo).run()),
+        ("Carrinho: abrir", lambda app: _abrir_menu(app, "🏠 Home"),
+         lambda app: _com_chave(app.radio, MENU).set_value("🛒 Carrinho").run()),
+        ("Meus Pedidos: abrir", lambda app: _abrir_menu(app, "🏠 Home"),
+         lambda app: _com_chave(app.radio, MENU).set_value("📦 Meus Pedidos").run()),
+        ("Conta: abrir", lambda app: _abrir_menu(app, "🏠 Home"),
+         lambda app: _com_chave(app.radio, MENU).set_value("👤 Conta").run()),
+    ]
+
+
+def _trocar_categoria(app):
+    seletor = _com_rotulo(app.selectbox, "Escolha uma categoria:")
+    opcoes = seletor.options
+    seletor.set_value(opcoes[(opcoes.index(seletor.value) + 1) % len(opcoes)]).run()
+
+
+def _tempos_fragmentos(app) -> dict:
+    try:
+        return dict(app.session_state["tempos_execucao"])
+    except KeyError:
+        return {}
+
+
+def medir(caminho_app: str, repeticoes: int, usuario_id: int):
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(caminho_app, default_timeout=120)
+    app.session_state["usuario_id"] = usuario_id
+    app.session_state["usuario_nome"] = "Benchmark"
+    inicio = time.perf_counter()
+    app.run()
+    print(f"Primeira execução: {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+    tempos = {}
+    for repeticao in range(repeticoes):
+        for nome, preparar, agir in cenarios(repeticao):
+            preparar(app)
+            inicio = time.perf_counter()
+            agir(app)
+            tempos.setdefault(nome, []).append(time.perf_counter() - inicio)
+            if app.exception:
+                raise RuntimeError(f"{nome}: {app.exception[0].message}")
+
+    print(f"\n{'cenário':<32} {'p50':>9} {'p95':>9}")
+    for nome, valores in tempos.items():
+        print(f"{nome:<32} {statistics.median(valores) * 1000:>6.1f} ms "
+              f"{percentil(valores, 95) * 1000:>6.1f} ms")
+
+    fragmentos = _tempos_fragmentos(app)
+    if fragmentos:
+        print(f"\n{'medido pelo app (página/fragmento)':<32} {'p50':>9} {'p95':>9}")
+        for nome, valores in sorted(fragmentos.items()):
+            print(f"{nome:<32} {statistics.median(valores) * 1000:>6.1f} ms "
+                  f"{percentil(valores, 95) * 1000:>6.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default="app.py", help="Script do Streamlit a medir")
+    parser.add_argument("--produtos", type=int, default=20000)
+    parser.add_argument("--repeticoes", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho_db = os.path.join(diretorio, "reruns.db")
+        gerar_banco(caminho_db, produtos=args.produtos, usuarios=50, pedidos=500, avaliacoes=args.produtos,
+                    ao_progredir=lambda _mensagem: None)
+        os.environ["LOJA_BANCO"] = caminho_db
+        print(f"{args.app}: {args.produtos} produtos, {args.repeticoes} repetições por cenário")
+        medir(args.app, args.repeticoes, usuario_id=1)
+
+
+if __name__ == "__main__":
+    main()
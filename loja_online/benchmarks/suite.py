@@ -0,0 +1,212 @@
+"""
+Suíte de benchmarks: mede cada método público do BancoDados sobre um banco
+gerado por benchmarks.gerador e salva o resultado em JSON.
+
+Uso:
+    python -m benchmarks.suite --escala media --saida resultados/base.json
+    python -m benchmarks.suite --banco dados/bench.db --saida resultados/novo.json
+    python -m benchmarks.suite --comparar resultados/base.json resultados/novo.json --limite 0.15
+
+Na comparação, um método é regressão quando a mediana piora mais que o
+limite (fração) e mais que --minimo-ms; o comando sai com código 1.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict
+
+from benchmarks.comum import percentil
+from benchmarks.gerador import adicionar_argumentos_volume, gerar_banco, volumes
+from src.banco_dados import BancoDados
+from src.modelo import Avaliacao, ItemCarrinho, Pedido, Produto, Usuario
+from src.planos_consulta import metodos_publicos
+
+# Métodos que percorrem tabelas inteiras: poucas repetições
+METODOS_PESADOS = {'obter_todos_produtos', 'iterar_produtos', 'reconstruir_indice_busca',
+                   'reconciliar_avaliacoes', 'reconstruir_resumos'}
+
+
+def _casos(db: BancoDados, aleatorio: random.Random) -> Dict[str, Callable[[], object]]:
+    """Uma chamada representativa por método, com argumentos sorteados do banco."""
+    conexao = db.obter_conexao()
+    maior_produto = conexao.execute('SELECT MAX(id) FROM produtos').fetchone()[0]
+    maior_usuario = conexao.execute('SELECT MAX(id) FROM usuarios').fetchone()[0]
+    categorias = [linha[0] for linha in conexao.execute('SELECT DISTINCT categoria FROM produtos')]
+    email, senha = conexao.execute('SELECT email, senha FROM usuarios WHERE id = ?',
+                                   (maior_usuario,)).fetchone()
+    conexao.close()
+
+    produto = lambda: aleatorio.randint(1, maior_produto)
+    usuario = lambda: aleatorio.randint(1, maior_usuario)
+    categoria = lambda: aleatorio.choice(categorias)
+    contador = iter(range(sys.maxsize))
+
+    def lote():
+        inicio = next(contador) * 100 % 5000
+        return [Produto(f"Lote {numero}", "Importado", 50.0, 5, categoria(), sku=f"SUITE-{numero}")
+                for numero in range(inicio, inicio + 100)]
+
+    def pedido():
+        return Pedido(usuario(), [ItemCarrinho(produto(), 1, 10.0) for _ in range(3)], "Rua do Benchmark, 1")
+
+    return {
+        'criar_produto': lambda: db.criar_produto(
+            Produto("Produto bench", "Criado pela suíte", 99.9, 10, categoria())),
+        'salvar_produtos_em_lote': lambda: db.salvar_produtos_em_lote(lote()),
+        'obter_produto': lambda: db.obter_produto(produto()),
+        'obter_produtos_por_ids': lambda: db.obter_produtos_por_ids([produto() for _ in range(20)]),
+        'obter_todos_produtos': lambda: db.obter_todos_produtos(),
+        'iterar_produtos': lambda: sum(1 for _ in db.iterar_produtos()),
+        'obter_produtos_por_categoria': lambda: db.obter_produtos_por_categoria(categoria()),
+        'consultar_produtos': lambda: db.consultar_produtos(
+            preco_min=50, preco_max=aleatorio.choice([300, 1000, 5000]), categoria=categoria(),
+            somente_em_estoque=True, ordenar_por=aleatorio.choice(['nome', 'preco', 'avaliacao'])),
+        'buscar_produtos': lambda: db.buscar_produtos(aleatorio.choice(["teclado", "rgb usb", "proces"])),
+        'buscar_produtos_com_trecho': lambda: db.buscar_produtos_com_trecho(
+            aleatorio.choice(["mecanico", "ssd", "hdmi"])),
+        'reconstruir_indice_busca': lambda: db.reconstruir_indice_busca(),
+        'atualizar_estoque': lambda: db.atualizar_estoque(produto(), 0),
+        'criar_usuario': lambda: db.criar_usuario(
+            Usuario("Novo", f"suite{next(contador)}-{time.time_ns()}@bench.local", "x")),
+        'obter_usuario': lambda: db.obter_usuario(usuario()),
+        'verificar_login': lambda: db.verificar_login(email, senha),
+        'criar_pedido': lambda: db.criar_pedido(pedido()),
+        'finalizar_pedido': lambda: db.finalizar_pedido(pedido()),
+        'obter_pedidos_usuario': lambda: db.obter_pedidos_usuario(usuario()),
+        'iterar_pedidos_usuario': lambda: sum(1 for _ in db.iterar_pedidos_usuario(usuario())),
+        'consultar_pedidos_usuario': lambda: db.consultar_pedidos_usuario(usuario()),
+        'obter_resumo_usuario': lambda: db.obter_resumo_usuario(usuario()),
+        'iterar_itens_pedidos': lambda: sum(1 for _ in db.iterar_itens_pedidos(0, '2025-06-01', '2025-06-07')),
+        'criar_avaliacao': lambda: db.criar_avaliacao(
+            Avaliacao(produto(), usuario(), aleatorio.randint(1, 5), "Bench")),
+        'obter_avaliacoes_produto': lambda: db.obter_avaliacoes_produto(produto()),
+        'iterar_avaliacoes_produto': lambda: sum(1 for _ in db.iterar_avaliacoes_produto(produto())),
+        'iterar_avaliacoes': lambda: sum(1 for _ in db.iterar_avaliacoes(0, '2025-06-01', '2025-06-07')),
+        'obter_histograma_avaliacoes': lambda: db.obter_histograma_avaliacoes(produto()),
+        'reconciliar_avaliacoes': lambda: db.reconciliar_avaliacoes(),
+        'reconstruir_resumos': lambda: db.reconstruir_resumos(),
+        'obter_categorias': lambda: db.obter_categorias(),
+    }
+
+
+def medir(chamada: Callable[[], object], repeticoes: int, tempo_maximo: float) -> dict:
+    """Executa a chamada até repeticoes vezes (ou tempo_maximo segundos)."""
+    chamada()  # aquecimento
+    latencias = []
+    inicio = time.perf_counter()
+    while len(latencias) < repeticoes and time.perf_counter() - inicio < tempo_maximo:
+        antes = time.perf_counter()
+        chamada()
+        latencias.append(time.perf_counter() - antes)
+    return {
+        'repeticoes': len(latencias),
+        'media_ms': sum(latencias) / len(latencias) * 1000,
+        'p50_ms': percentil(latencias, 50) * 1000,
+        'p95_ms': percentil(latencias, 95) * 1000,
+        'max_ms': max(latencias) * 1000,
+    }
+
+
+def executar_suite(caminho_db: str, repeticoes: int, tempo_maximo: float, semente: int,
+                   filtro=None) -> Dict[str, dict]:
+    aleatorio = random.Random(semente)
+    db = BancoDados(caminho_db, usar_pool=True)
+    casos = _casos(db, aleatorio)
+
+    sem_caso = [nome for nome in metodos_publicos() if nome not in casos]
+    if sem_caso:
+        print(f"⚠️  Métodos sem caso na suíte: {', '.join(sem_caso)}")
+
+    resultados = {}
+    for nome, chamada in casos.items():
+        if filtro and filtro not in nome:
+            continue
+        vezes = max(1, repeticoes // 20) if nome in METODOS_PESADOS else repeticoes
+        resultados[nome] = medir(chamada, vezes, tempo_maximo)
+        r = resultados[nome]
+        print(f"{nome:<30}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['repeticoes']:>8}")
+
+    db.fechar_pools()
+    return resultados
+
+
+def comparar(base: dict, novo: dict, limite: float, minimo_ms: float) -> int:
+    """Imprime a comparação das medianas e retorna quantas regressões houve."""
+    regressoes = 0
+    print(f"{'método':<30}{'base p50':>11}{'novo p50':>11}{'variação':>10}")
+    for nome in sorted(set(base['resultados']) | set(novo['resultados'])):
+        antes = base['resultados'].get(nome)
+        depois = novo['resultados'].get(nome)
+        if antes is None or depois is None:
+            print(f"{nome:<30}{'(só em ' + ('novo' if antes is None else 'base') + ')':>32}")
+            continue
+        variacao = (depois['p50_ms'] - antes['p50_ms']) / antes['p50_ms'] if antes['p50_ms'] else 0.0
+        regressao = variacao > limite and depois['p50_ms'] - antes['p50_ms'] > minimo_ms
+        regressoes += regressao
+        marca = "  ❌ regressão" if regressao else ("  ✅" if variacao < -limite else "")
+        print(f"{nome:<30}{antes['p50_ms']:>11.3f}{depois['p50_ms']:>11.3f}{variacao:>+10.0%}{marca}")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--banco", help="Banco já gerado (é copiado antes de medir)")
+    adicionar_argumentos_volume(parser)
+    parser.add_argument("--repeticoes", type=int, default=200)
+    parser.add_argument("--tempo-maximo", type=float, default=5.0, help="Segundos por método")
+    parser.add_argument("--filtro", help="Só os métodos que contêm este texto")
+    parser.add_argument("--saida", help="Arquivo JSON com os resultados")
+    parser.add_argument("--comparar", nargs=2, metavar=("BASE", "NOVO"), help="Compara dois resultados")
+    parser.add_argument("--limite", type=float, default=0.15, help="Piora tolerada da mediana (fração)")
+    parser.add_argument("--minimo-ms", type=float, default=0.05, help="Piora absoluta mínima para contar")
+    args = parser.parse_args()
+
+    if args.comparar:
+        with open(args.comparar[0], encoding='utf-8') as arquivo:
+            base = json.load(arquivo)
+        with open(args.comparar[1], encoding='utf-8') as arquivo:
+            novo = json.load(arquivo)
+        regressoes = comparar(base, novo, args.limite, args.minimo_ms)
+        print(f"\n{regressoes} regressão(ões) acima de {args.limite:.0%}")
+        sys.exit(1 if regressoes else 0)
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        # Os métodos de escrita alteram o banco: mede sempre sobre uma cópia
+        caminho_db = os.path.join(diretorio, "suite.db")
+        if args.banco:
+            shutil.copy(args.banco, caminho_db)
+            dados = {'banco': args.banco}
+        else:
+            print(f"Gerando banco ({args.escala})...")
+            dados = volumes(args)
+            gerar_banco(caminho_db, semente=args.semente, **dados)
+
+        print(f"\n{'método':<30}{'p50 ms':>10}{'p95 ms':>10}{'vezes':>8}")
+        resultados = executar_suite(caminho_db, args.repeticoes, args.tempo_maximo, args.semente, args.filtro)
+
+    relatorio = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'maquina': platform.platform(),
+        'dados': dados,
+        'resultados': resultados,
+    }
+    if args.saida:
+        os.makedirs(os.path.dirname(args.saida) or '.', exist_ok=True)
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+        print(f"\nResultados salvos em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
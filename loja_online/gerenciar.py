@@ -0,0 +1,230 @@
+"""
+Comandos de manutenção da loja online.
+
+Exemplos:
+    python gerenciar.py migrar
+    python gerenciar.py migrar --status
+    python gerenciar.py verificar-planos
+    python gerenciar.py reconstruir-busca
+    python gerenciar.py reconciliar-avaliacoes
+    python gerenciar.py reconstruir-resumos
+    python gerenciar.py relatorio --inicio 2025-01-01 --fim 2025-01-31
+    python gerenciar.py importar fornecedor.csv --lote 5000
+    python gerenciar.py expirar-carrinhos --dias 30
+    python gerenciar.py exportar pedidos pedidos.csv --inicio 2025-01-01 --checkpoint pedidos.ckpt
+"""
+
+import argparse
+import sqlite3
+import sys
+
+from src.migracoes import aplicar_migracoes, migracoes_pendentes, obter_versao
+
+
+def comando_migrar(args) -> int:
+    """Aplica (ou lista) as migrações pendentes."""
+    conexao = sqlite3.connect(args.banco)
+    try:
+        pendentes = migracoes_pendentes(conexao)
+        print(f"Versão atual do esquema: {obter_versao(conexao)}")
+
+        if args.status:
+            for numero, descricao in pendentes:
+                print(f"  pendente: {numero} - {descricao}")
+            if not pendentes:
+                print("Esquema atualizado.")
+            return 0
+
+        aplicadas = aplicar_migracoes(conexao)
+        for numero in aplicadas:
+            descricao = dict(pendentes).get(numero, "")
+            print(f"✅ Migração {numero} aplicada: {descricao}")
+        if not aplicadas:
+            print("Nenhuma migração pendente.")
+        print(f"Versão final do esquema: {obter_versao(conexao)}")
+    finally:
+        conexao.close()
+    return 0
+
+
+def comando_verificar_planos(args) -> int:
+    """Reprova consultas do BancoDados que fazem varredura completa."""
+    from src.planos_consulta import verificar_planos
+
+    relatorio, problemas = verificar_planos()
+    if args.detalhes:
+        print("\n".join(relatorio))
+        print()
+
+    if problemas:
+        print("❌ Consultas com plano degradado:")
+        for problema in problemas:
+            print(f"  {problema}")
+        return 1
+
+    print("✅ Nenhuma consulta faz varredura completa de tabela.")
+    return 0
+
+
+def comando_reconstruir_busca(args) -> int:
+    """Reconstrói o índice FTS5 de busca de produtos."""
+    from src.banco_dados import BancoDados
+
+    db = BancoDados(args.banco)
+    db.reconstruir_indice_busca()
+    print("✅ Índice de busca reconstruído.")
+    return 0
+
+
+def comando_reconciliar_avaliacoes(args) -> int:
+    """Recalcula os agregados de avaliação a partir da tabela avaliacoes."""
+    from src.banco_dados import BancoDados
+
+    db = BancoDados(args.banco)
+    divergentes = db.reconciliar_avaliacoes()
+    print(f"✅ Agregados de avaliação recalculados ({divergentes} produto(s) divergente(s) corrigido(s)).")
+    return 0
+
+
+def comando_reconstruir_resumos(args) -> int:
+    """Refaz os resumos de usuários e de vendas a partir dos pedidos."""
+    from src.banco_dados import BancoDados
+
+    db = BancoDados(args.banco)
+    total = db.reconstruir_resumos()
+    print(f"✅ Resumos reconstruídos a partir de {total} pedido(s).")
+    return 0
+
+
+def comando_relatorio(args) -> int:
+    """Mostra os relatórios de vendas (lidos só dos resumos)."""
+    from src.banco_dados import BancoDados
+    from src.relatorios import Relatorios
+
+    relatorios = Relatorios(BancoDados(args.banco))
+
+    print("Receita por categoria:")
+    for linha in relatorios.receita_por_categoria(args.inicio, args.fim):
+        print(f"  {linha['categoria'] or '(sem categoria)':<20}{linha['pedidos']:>10} pedidos"
+              f"{linha['unidades']:>10} un.{linha['receita']:>16,.2f}")
+
+    print("\nMais vendidos (todo o histórico):")
+    for linha in relatorios.mais_vendidos(args.limite):
+        print(f"  #{linha['produto_id']:<8}{(linha['nome'] or '?')[:30]:<32}{linha['unidades']:>8} un."
+              f"{linha['receita']:>16,.2f}")
+
+    print("\nPedidos por status:")
+    for linha in relatorios.pedidos_por_status():
+        print(f"  {linha['status']:<20}{linha['pedidos']:>10}{linha['valor_total']:>16,.2f}")
+    return 0
+
+
+def comando_expirar_carrinhos(args) -> int:
+    """Apaga os carrinhos abandonados há mais de N dias."""
+    from src.banco_dados import BancoDados
+    from src.carrinhos import ArmazemCarrinhos
+
+    armazem = ArmazemCarrinhos(BancoDados(args.banco), validade=args.dias * 24 * 3600)
+    apagados = armazem.expirar()
+    print(f"✅ {apagados} carrinho(s) sem alteração há mais de {args.dias} dia(s) apagado(s).")
+    return 0
+
+
+def comando_importar(args) -> int:
+    """Importa (ou atualiza pelo SKU) produtos de um arquivo CSV ou JSONL."""
+    from src.banco_dados import BancoDados
+    from src.importacao import importar_produtos
+
+    def mostrar_progresso(relatorio):
+        print(f"  {relatorio.lidas} linha(s) lidas, {relatorio.gravadas} gravada(s), "
+              f"{relatorio.rejeitadas} rejeitada(s) - {relatorio.linhas_por_segundo:.0f} linhas/s")
+
+    db = BancoDados(args.banco)
+    relatorio = importar_produtos(db, args.arquivo, args.formato, args.lote, mostrar_progresso)
+
+    for numero, motivo in relatorio.rejeicoes:
+        print(f"  linha {numero}: {motivo}")
+    if relatorio.rejeitadas > len(relatorio.rejeicoes):
+        print(f"  ... e mais {relatorio.rejeitadas - len(relatorio.rejeicoes)} linha(s) rejeitada(s)")
+
+    print(f"✅ {relatorio.lidas} linha(s) em {relatorio.segundos:.1f}s "
+          f"({relatorio.linhas_por_segundo:.0f} linhas/s): {relatorio.gravadas} inserida(s) ou "
+          f"alterada(s), {relatorio.inalteradas} sem mudança, {relatorio.rejeitadas} rejeitada(s)")
+    return 1 if relatorio.lidas and not relatorio.validas else 0
+
+
+def comando_exportar(args) -> int:
+    """Exporta pedidos ou avaliações em memória constante."""
+    from src.banco_dados import BancoDados
+    from src.exportacao import exportar_avaliacoes, exportar_pedidos
+
+    formato = args.formato or ('jsonl' if args.destino.endswith('.jsonl') else 'csv')
+    exportar = exportar_pedidos if args.tabela == 'pedidos' else exportar_avaliacoes
+
+    db = BancoDados(args.banco)
+    total = exportar(db, args.destino, formato, args.inicio, args.fim, args.checkpoint, args.lote)
+    print(f"✅ {total} registro(s) de {args.tabela} exportados para {args.destino}")
+    return 0
+
+
+def criar_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Manutenção da loja online")
+    parser.add_argument("--banco", default="dados/loja.db", help="Caminho do banco SQLite")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    migrar = subparsers.add_parser("migrar", help="Aplica as migrações do esquema")
+    migrar.add_argument("--status", action="store_true", help="Só lista as migrações pendentes")
+    migrar.set_defaults(funcao=comando_migrar)
+
+    planos = subparsers.add_parser("verificar-planos",
+                                   help="Verifica os planos de consulta (EXPLAIN QUERY PLAN)")
+    planos.add_argument("--detalhes", action="store_true", help="Mostra o plano de cada consulta")
+    planos.set_defaults(funcao=comando_verificar_planos)
+
+    busca = subparsers.add_parser("reconstruir-busca", help="Reconstrói o índice de busca textual")
+    busca.set_defaults(funcao=comando_reconstruir_busca)
+
+    reconciliar = subparsers.add_parser("reconciliar-avaliacoes",
+                                        help="Recalcula média, total e histograma das avaliações")
+    reconciliar.set_defaults(funcao=comando_reconciliar_avaliacoes)
+
+    importar = subparsers.add_parser("importar", help="Importa produtos de CSV/JSONL (upsert pelo SKU)")
+    importar.add_argument("arquivo", help="Arquivo com as colunas sku, nome, descricao, preco, estoque, categoria")
+    importar.add_argument("--formato", choices=["csv", "jsonl"], help="Padrão: pela extensão do arquivo")
+    importar.add_argument("--lote", type=int, default=1000, help="Produtos gravados por transação")
+    importar.set_defaults(funcao=comando_importar)
+
+    resumos = subparsers.add_parser("reconstruir-resumos",
+                                    help="Refaz os resumos de usuários e de vendas a partir dos pedidos")
+    resumos.set_defaults(funcao=comando_reconstruir_resumos)
+
+    relatorio = subparsers.add_parser("relatorio", help="Relatórios de vendas (receita, mais vendidos, status)")
+    relatorio.add_argument("--inicio", help="Data inicial (AAAA-MM-DD)")
+    relatorio.add_argument("--fim", help="Data final, inclusiva (AAAA-MM-DD)")
+    relatorio.add_argument("--limite", type=int, default=10, help="Quantos mais vendidos mostrar")
+    relatorio.set_defaults(funcao=comando_relatorio)
+
+    carrinhos = subparsers.add_parser("expirar-carrinhos", help="Apaga carrinhos abandonados")
+    carrinhos.add_argument("--dias", type=int, default=30, help="Dias sem alteração para expirar")
+    carrinhos.set_defaults(funcao=comando_expirar_carrinhos)
+
+    exportar = subparsers.add_parser("exportar", help="Exporta pedidos ou avaliações (CSV/JSONL)")
+    exportar.add_argument("tabela", choices=["pedidos", "avaliacoes"])
+    exportar.add_argument("destino", help="Arquivo de saída")
+    exportar.add_argument("--formato", choices=["csv", "jsonl"], help="Padrão: pela extensão do arquivo")
+    exportar.add_argument("--inicio", help="Data inicial (AAAA-MM-DD)")
+    exportar.add_argument("--fim", help="Data final, inclusiva (AAAA-MM-DD)")
+    exportar.add_argument("--checkpoint", help="Arquivo para retomar uma exportação interrompida")
+    exportar.add_argument("--lote", type=int, default=1000, help="Linhas lidas do banco por vez")
+    exportar.set_defaults(funcao=comando_exportar)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = criar_parser().parse_args(argv)
+    return args.funcao(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+"""
+Servidor da API JSON da loja (sem Streamlit).
+
+Exemplos:
+    python servidor_api.py
+    python servidor_api.py --porta 8080 --trabalhadores 4
+    LOJA_API_SEGREDO=... python servidor_api.py --endereco 0.0.0.0
+"""
+
+import argparse
+import logging
+
+from src.api import servir
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--banco", default="dados/loja.db", help="Caminho do banco SQLite")
+    parser.add_argument("--endereco", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8000)
+    parser.add_argument("--trabalhadores", type=int, default=1,
+                        help="Processos que atendem as conexões (fork)")
+    parser.add_argument("--verbose", action="store_true", help="Registra cada requisição")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    servir(args.banco, args.endereco, args.porta, args.trabalhadores)
+
+
+if __name__ == "__main__":
+    main()
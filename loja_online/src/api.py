@@ -0,0 +1,529 @@
+"""
+API HTTP em JSON da loja, independente do Streamlit.
+
+Rotas:
+    GET  /api/produtos               listagem e busca (mesmos filtros de consultar_produtos)
+    GET  /api/produtos/<id>          detalhe do produto com histograma de notas
+    POST /api/produtos/<id>/avaliacoes  {"nota", "comentario"} (exige token)
+    GET  /api/categorias
+    POST /api/login                  {"email", "senha"} -> token
+    POST /api/carrinho               cotação: preços atuais, frete e disponibilidade
+    POST /api/pedidos                cria o pedido (exige token)
+    GET  /api/pedidos                resumo e histórico paginado com itens (exige token)
+
+As respostas GET têm ETag (hash do corpo) e respondem 304 ao If-None-Match;
+corpos a partir de TAMANHO_MINIMO_GZIP bytes vão comprimidos quando o
+cliente aceita gzip. O token é assinado com HMAC e não guarda estado no
+servidor, então qualquer processo trabalhador valida o token de outro.
+
+As avaliações vão para a FilaEscritas (src/escrita_adiada.py) e a resposta
+202 sai sem esperar o commit do grupo.
+
+servir() abre o socket uma vez e cria os trabalhadores com fork; cada um
+atende as conexões com threads e tem seu próprio BancoDados (e sua fila de
+escritas).
+"""
+
+import base64
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import signal
+import socket
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from src.banco_dados import BancoDados
+from src.cache import CacheCatalogo
+from src.escrita_adiada import FilaEscritas
+from src.frete import calcular_frete
+from src.modelo import Avaliacao, ItemCarrinho, Pedido, Produto
+from src.pool_conexoes import fechar_pools
+
+logger = logging.getLogger("loja.api")
+
+TAMANHO_MINIMO_GZIP = 1024
+TAMANHO_MAXIMO_CORPO = 1024 * 1024
+TAMANHO_MAXIMO_COMENTARIO = 2000
+LIMITE_MAXIMO_PAGINA = 100
+VALIDADE_TOKEN = 7 * 24 * 3600  # segundos
+
+
+class ErroApi(Exception):
+    """Erro com status HTTP, devolvido ao cliente como {"erro": mensagem}."""
+
+    def __init__(self, status: int, mensagem: str, **detalhes):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+        self.detalhes = detalhes
+
+
+# ===== TOKENS =====
+
+def _assinar(mensagem: str, segredo: str) -> str:
+    assinatura = hmac.new(segredo.encode(), mensagem.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(assinatura).rstrip(b'=').decode()
+
+
+def gerar_token(usuario_id: int, segredo: str, validade: int = VALIDADE_TOKEN) -> str:
+    """Token "usuario_id.expiracao.assinatura"."""
+    mensagem = f"{usuario_id}.{int(time.time()) + validade}"
+    return f"{mensagem}.{_assinar(mensagem, segredo)}"
+
+
+def validar_token(token: str, segredo: str) -> Optional[int]:
+    """Retorna o ID do usuário do token, ou None se inválido ou expirado."""
+    partes = token.split('.')
+    if len(partes) != 3:
+        return None
+    usuario_id, expiracao, assinatura = partes
+    if not hmac.compare_digest(assinatura, _assinar(f"{usuario_id}.{expiracao}", segredo)):
+        return None
+    try:
+        if int(expiracao) < time.time():
+            return None
+        return int(usuario_id)
+    except ValueError:
+        return None
+
+
+# ===== CONVERSÃO PARA JSON =====
+
+def produto_para_dict(produto: Produto) -> dict:
+    return {
+        'id': produto.id,
+        'sku': produto.sku,
+        'nome': produto.nome,
+        'descricao': produto.descricao,
+        'preco': produto.preco,
+        'estoque': produto.estoque,
+        'categoria': produto.categoria,
+        'avaliacao_media': produto.avaliacao_media,
+        'total_avaliacoes': produto.total_avaliacoes,
+        'data_criacao': produto.data_criacao.isoformat(sep=' '),
+    }
+
+
+def _inteiro(consulta: dict, nome: str, padrao: Optional[int] = None) -> Optional[int]:
+    valor = consulta.get(nome)
+    if valor in (None, ''):
+        return padrao
+    try:
+        return int(valor)
+    except ValueError:
+        raise ErroApi(HTTPStatus.BAD_REQUEST, f"Parâmetro {nome} deve ser inteiro")
+
+
+def _numero(consulta: dict, nome: str) -> Optional[float]:
+    valor = consulta.get(nome)
+    if valor in (None, ''):
+        return None
+    try:
+        return float(valor)
+    except ValueError:
+        raise ErroApi(HTTPStatus.BAD_REQUEST, f"Parâmetro {nome} deve ser numérico")
+
+
+def _ler_itens(corpo: dict) -> dict:
+    """{produto_id: quantidade} a partir de {"itens": [{"produto_id", "quantidade"}]}."""
+    itens = corpo.get('itens')
+    if not isinstance(itens, list) or not itens:
+        raise ErroApi(HTTPStatus.BAD_REQUEST, "Informe itens: [{produto_id, quantidade}]")
+    quantidades = {}
+    for item in itens:
+        try:
+            produto_id = int(item['produto_id'])
+            quantidade = int(item.get('quantidade', 1))
+        except (TypeError, KeyError, ValueError):
+            raise ErroApi(HTTPStatus.BAD_REQUEST, "Item inválido: informe produto_id e quantidade")
+        if quantidade <= 0:
+            raise ErroApi(HTTPStatus.BAD_REQUEST, f"Quantidade inválida para o produto {produto_id}")
+        quantidades[produto_id] = quantidades.get(produto_id, 0) + quantidade
+    return quantidades
+
+
+# ===== ROTAS =====
+
+class ApiLoja:
+    """Rotas da API sobre um BancoDados, sem nada de HTTP.
+
+    tratar() recebe método, caminho, parâmetros, corpo JSON e o ID do
+    usuário autenticado, e retorna (status, objeto, privado). privado indica
+    resposta específica do usuário (Cache-Control: private).
+
+    Sem escritas (FilaEscritas), as avaliações são gravadas na hora.
+    """
+
+    def __init__(self, db: BancoDados, segredo: str, escritas: Optional[FilaEscritas] = None):
+        self.db = db
+        self.segredo = segredo
+        self.escritas = escritas
+
+    def tratar(self, metodo: str, caminho: str, consulta: dict, corpo: Optional[dict],
+               usuario_id: Optional[int]) -> Tuple[int, object, bool]:
+        partes = [parte for parte in caminho.split('/') if parte]
+        if partes[:1] != ['api'] or len(partes) < 2:
+            raise ErroApi(HTTPStatus.NOT_FOUND, "Rota não encontrada")
+        recurso, resto = partes[1], partes[2:]
+
+        if recurso == 'produtos' and metodo == 'GET':
+            if not resto:
+                return HTTPStatus.OK, self.listar_produtos(consulta), False
+            if len(resto) == 1 and resto[0].isdigit():
+                return HTTPStatus.OK, self.detalhar_produto(int(resto[0])), False
+        elif (recurso == 'produtos' and metodo == 'POST' and len(resto) == 2
+              and resto[0].isdigit() and resto[1] == 'avaliacoes'):
+            usuario_id = self._exigir_usuario(usuario_id)
+            return (*self.avaliar_produto(usuario_id, int(resto[0]), corpo or {}), True)
+        elif recurso == 'categorias' and metodo == 'GET' and not resto:
+            return HTTPStatus.OK, {'categorias': self.db.obter_categorias()}, False
+        elif recurso == 'login' and metodo == 'POST' and not resto:
+            return HTTPStatus.OK, self.login(corpo or {}), True
+        elif recurso == 'carrinho' and metodo == 'POST' and not resto:
+            return HTTPStatus.OK, self.cotar_carrinho(_ler_itens(corpo or {})), False
+        elif recurso == 'pedidos' and not resto:
+            usuario_id = self._exigir_usuario(usuario_id)
+            if metodo == 'GET':
+                return HTTPStatus.OK, self.listar_pedidos(usuario_id, consulta), True
+            if metodo == 'POST':
+                return HTTPStatus.CREATED, self.criar_pedido(usuario_id, corpo or {}), True
+        raise ErroApi(HTTPStatus.NOT_FOUND, "Rota não encontrada")
+
+    def _exigir_usuario(self, usuario_id: Optional[int]) -> int:
+        if usuario_id is None:
+            raise ErroApi(HTTPStatus.UNAUTHORIZED, "Envie o token em Authorization: Bearer <token>")
+        return usuario_id
+
+    def listar_produtos(self, consulta: dict) -> dict:
+        limite = _inteiro(consulta, 'limite', 24)
+        if not 1 <= limite <= LIMITE_MAXIMO_PAGINA:
+            raise ErroApi(HTTPStatus.BAD_REQUEST, f"limite deve estar entre 1 e {LIMITE_MAXIMO_PAGINA}")
+        termo = consulta.get('q') or None
+        try:
+            pagina = self.db.consultar_produtos(
+                preco_min=_numero(consulta, 'preco_min'),
+                preco_max=_numero(consulta, 'preco_max'),
+                categoria=consulta.get('categoria') or None,
+                somente_em_estoque=consulta.get('em_estoque') in ('1', 'true'),
+                avaliacao_minima=_numero(consulta, 'avaliacao_minima'),
+                termo=termo,
+                ordenar_por=consulta.get('ordenar') or ('relevancia' if termo else 'nome'),
+                cursor=consulta.get('cursor') or None,
+                limite=limite,
+            )
+        except ValueError as erro:
+            raise ErroApi(HTTPStatus.BAD_REQUEST, str(erro))
+
+        produtos = [produto_para_dict(produto) for produto in pagina.produtos]
+        for produto in produtos:
+            if produto['id'] in pagina.trechos:
+                produto['trecho'] = pagina.trechos[produto['id']]
+        return {'produtos': produtos, 'proximo_cursor': pagina.proximo_cursor}
+
+    def listar_pedidos(self, usuario_id: int, consulta: dict) -> dict:
+        limite = _inteiro(consulta, 'limite', 10)
+        if not 1 <= limite <= LIMITE_MAXIMO_PAGINA:
+            raise ErroApi(HTTPStatus.BAD_REQUEST, f"limite deve estar entre 1 e {LIMITE_MAXIMO_PAGINA}")
+        try:
+            pagina = self.db.consultar_pedidos_usuario(
+                usuario_id, cursor=consulta.get('cursor') or None, limite=limite)
+        except ValueError as erro:
+            raise ErroApi(HTTPStatus.BAD_REQUEST, str(erro))
+        return {'resumo': self.db.obter_resumo_usuario(usuario_id), 'pedidos': pagina.pedidos,
+                'proximo_cursor': pagina.proximo_cursor}
+
+    def detalhar_produto(self, produto_id: int) -> dict:
+        produto = self.db.obter_produto(produto_id)
+        if produto is None:
+            raise ErroApi(HTTPStatus.NOT_FOUND, f"Produto {produto_id} não encontrado")
+        detalhe = produto_para_dict(produto)
+        detalhe['histograma_notas'] = self.db.obter_histograma_avaliacoes(produto_id)
+        return detalhe
+
+    def avaliar_produto(self, usuario_id: int, produto_id: int, corpo: dict) -> Tuple[int, dict]:
+        """Com a fila, responde 202 antes do commit; sem ela, 201 com o ID."""
+        nota, comentario = corpo.get('nota'), corpo.get('comentario', '')
+        if type(nota) is not int or not 1 <= nota <= 5:
+            raise ErroApi(HTTPStatus.BAD_REQUEST, "nota deve ser um inteiro de 1 a 5")
+        if not isinstance(comentario, str) or len(comentario) > TAMANHO_MAXIMO_COMENTARIO:
+            raise ErroApi(HTTPStatus.BAD_REQUEST,
+                          f"comentario deve ser um texto de até {TAMANHO_MAXIMO_COMENTARIO} caracteres")
+        if self.db.obter_produto(produto_id) is None:
+            raise ErroApi(HTTPStatus.NOT_FOUND, f"Produto {produto_id} não encontrado")
+
+        avaliacao = Avaliacao(produto_id, usuario_id, nota, comentario.strip())
+        if self.escritas is None:
+            return HTTPStatus.CREATED, {'avaliacao_id': self.db.criar_avaliacao(avaliacao)}
+        self.escritas.criar_avaliacao(avaliacao)
+        return HTTPStatus.ACCEPTED, {'status': 'pendente'}
+
+    def login(self, corpo: dict) -> dict:
+        email, senha = corpo.get('email'), corpo.get('senha')
+        if not isinstance(email, str) or not isinstance(senha, str):
+            raise ErroApi(HTTPStatus.BAD_REQUEST, "Informe email e senha")
+        usuario_id = self.db.verificar_login(email, senha)
+        if usuario_id is None:
+            raise ErroApi(HTTPStatus.UNAUTHORIZED, "Email ou senha incorretos")
+        usuario = self.db.obter_usuario(usuario_id)
+        return {
+            'token': gerar_token(usuario_id, self.segredo),
+            'usuario': {'id': usuario.id, 'nome': usuario.nome, 'email': usuario.email},
+        }
+
+    def cotar_carrinho(self, quantidades: dict) -> dict:
+        """Preços e estoque atuais dos itens; não reserva nada."""
+        produtos = {produto.id: produto for produto in self.db.obter_produtos_por_ids(quantidades)}
+        inexistentes = [produto_id for produto_id in quantidades if produto_id not in produtos]
+        if inexistentes:
+            raise ErroApi(HTTPStatus.UNPROCESSABLE_ENTITY, "Produtos não encontrados",
+                          produtos=inexistentes)
+
+        itens = []
+        for produto_id, quantidade in quantidades.items():
+            produto = produtos[produto_id]
+            itens.append({
+                'produto_id': produto_id,
+                'nome': produto.nome,
+                'quantidade': quantidade,
+                'preco_unitario': produto.preco,
+                'subtotal': round(produto.preco * quantidade, 2),
+                'disponivel': produto.estoque >= quantidade,
+            })
+        subtotal = round(sum(item['subtotal'] for item in itens), 2)
+        frete = calcular_frete(subtotal)
+        return {'itens': itens, 'subtotal': subtotal, 'frete': frete, 'total': round(subtotal + frete, 2)}
+
+    def criar_pedido(self, usuario_id: int, corpo: dict) -> dict:
+        """Pedido com os preços atuais do banco; o cliente envia só IDs e quantidades."""
+        endereco = corpo.get('endereco_entrega')
+        if not isinstance(endereco, str) or not endereco.strip():
+            raise ErroApi(HTTPStatus.BAD_REQUEST, "Informe endereco_entrega")
+        cotacao = self.cotar_carrinho(_ler_itens(corpo))
+
+        pedido = Pedido(
+            usuario_id=usuario_id,
+            items=[ItemCarrinho(item['produto_id'], item['quantidade'], item['preco_unitario'])
+                   for item in cotacao['itens']],
+            endereco_entrega=endereco.strip(),
+            valor_frete=cotacao['frete'],
+            status=Pedido.STATUS_PAGAMENTO_CONFIRMADO,
+        )
+        resultado = self.db.finalizar_pedido(pedido)
+        if not resultado.sucesso:
+            raise ErroApi(HTTPStatus.CONFLICT, "Estoque insuficiente",
+                          itens_indisponiveis=resultado.itens_indisponiveis)
+        return {'pedido_id': resultado.pedido_id, 'status': pedido.status,
+                'subtotal': cotacao['subtotal'], 'frete': cotacao['frete'], 'total': cotacao['total']}
+
+
+# ===== HTTP =====
+
+def _etag(corpo: bytes) -> str:
+    return '"' + hashlib.blake2b(corpo, digest_size=16).hexdigest() + '"'
+
+
+def _corresponde(if_none_match: Optional[str], etags: Tuple[str, ...]) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    # Comparação fraca: ignora o prefixo W/ que alguns proxies acrescentam
+    enviadas = {etag.strip().removeprefix('W/') for etag in if_none_match.split(',')}
+    return any(etag in enviadas for etag in etags)
+
+
+class ManipuladorApi(BaseHTTPRequestHandler):
+    """Traduz HTTP para ApiLoja.tratar; o servidor guarda api em self.server.api."""
+
+    protocol_version = 'HTTP/1.1'  # Conexões persistentes (keep-alive)
+    server_version = 'LojaAPI/1.0'
+    # Cabeçalhos e corpo saem em escritas separadas; com Nagle, cada resposta
+    # esperaria o ACK atrasado do cliente (~40 ms)
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._atender('GET')
+
+    def do_POST(self):
+        self._atender('POST')
+
+    def _atender(self, metodo: str):
+        url = urlsplit(self.path)
+        consulta = {nome: valores[-1] for nome, valores in parse_qs(url.query).items()}
+        try:
+            corpo = self._ler_corpo() if metodo == 'POST' else None
+            status, objeto, privado = self.server.api.tratar(
+                metodo, url.path, consulta, corpo, self._usuario_autenticado())
+        except ErroApi as erro:
+            status, objeto, privado = erro.status, {'erro': erro.mensagem, **erro.detalhes}, True
+        except Exception:
+            logger.exception("Erro ao atender %s %s", metodo, self.path)
+            status, objeto, privado = HTTPStatus.INTERNAL_SERVER_ERROR, {'erro': "Erro interno"}, True
+        self._responder(metodo, status, objeto, privado)
+
+    def _ler_corpo(self) -> dict:
+        try:
+            tamanho = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            raise ErroApi(HTTPStatus.BAD_REQUEST, "Content-Length inválido")
+        if tamanho > TAMANHO_MAXIMO_CORPO:
+            self.close_connection = True  # O corpo não será lido
+            raise ErroApi(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Corpo grande demais")
+        if tamanho == 0:
+            return {}
+        try:
+            corpo = json.loads(self.rfile.read(tamanho))
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise ErroApi(HTTPStatus.BAD_REQUEST, "Corpo não é JSON válido")
+        if not isinstance(corpo, dict):
+            raise ErroApi(HTTPStatus.BAD_REQUEST, "O corpo deve ser um objeto JSON")
+        return corpo
+
+    def _usuario_autenticado(self) -> Optional[int]:
+        autorizacao = self.headers.get('Authorization', '')
+        if not autorizacao.startswith('Bearer '):
+            return None
+        usuario_id = validar_token(autorizacao[len('Bearer '):].strip(), self.server.api.segredo)
+        if usuario_id is None:
+            raise ErroApi(HTTPStatus.UNAUTHORIZED, "Token inválido ou expirado")
+        return usuario_id
+
+    def _responder(self, metodo: str, status: int, objeto, privado: bool):
+        corpo = json.dumps(objeto, ensure_ascii=False, separators=(',', ':')).encode()
+        cabecalhos = {'Content-Type': 'application/json; charset=utf-8',
+                      'Cache-Control': 'private, no-cache' if privado else 'no-cache',
+                      'Vary': 'Accept-Encoding, Authorization'}
+
+        comprimir = (len(corpo) >= TAMANHO_MINIMO_GZIP
+                     and 'gzip' in self.headers.get('Accept-Encoding', ''))
+        if metodo == 'GET' and status == HTTPStatus.OK:
+            # A versão comprimida é outra representação: ETag com sufixo próprio
+            etag = _etag(corpo)
+            etag_gzip = etag[:-1] + '-gz"'
+            cabecalhos['ETag'] = etag_gzip if comprimir else etag
+            if _corresponde(self.headers.get('If-None-Match'), (etag, etag_gzip)):
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                for nome, valor in cabecalhos.items():
+                    if nome != 'Content-Type':
+                        self.send_header(nome, valor)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+        if comprimir:
+            corpo = gzip.compress(corpo, compresslevel=5)
+            cabecalhos['Content-Encoding'] = 'gzip'
+        self.send_response(status)
+        for nome, valor in cabecalhos.items():
+            self.send_header(nome, valor)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        logger.debug("%s - " + formato, self.address_string(), *args)
+
+
+class ServidorApi(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, endereco, api: ApiLoja, bind_and_activate: bool = True):
+        super().__init__(endereco, ManipuladorApi, bind_and_activate)
+        self.api = api
+
+
+def criar_api(caminho_db: str, segredo: str, tamanho_pool: Optional[int] = None) -> ApiLoja:
+    """ApiLoja com pool de conexões, cache do catálogo e fila de escritas."""
+    db = BancoDados(caminho_db, usar_pool=True, tamanho_pool=tamanho_pool, cache=CacheCatalogo())
+    return ApiLoja(db, segredo, FilaEscritas(db))
+
+
+def _encerrar(api: ApiLoja):
+    """Grava as escritas pendentes e fecha os pools (nessa ordem)."""
+    if api.escritas is not None:
+        api.escritas.fechar()
+    fechar_pools()
+
+
+def _interromper(*_):
+    raise KeyboardInterrupt
+
+
+def _trabalhar(ouvinte: socket.socket, caminho_db: str, segredo: str):
+    """Processo trabalhador: atende o socket herdado até receber SIGTERM."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # O processo principal coordena o Ctrl+C
+    signal.signal(signal.SIGTERM, _interromper)
+    servidor = ServidorApi(ouvinte.getsockname(), criar_api(caminho_db, segredo), bind_and_activate=False)
+    servidor.socket.close()
+    servidor.socket = ouvinte
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _encerrar(servidor.api)  # O filho sai com os._exit: o atexit não roda
+
+
+def servir(caminho_db: str = "dados/loja.db", endereco: str = "127.0.0.1", porta: int = 8000,
+           trabalhadores: int = 1, segredo: Optional[str] = None, ao_iniciar=print):
+    """Atende a API até Ctrl+C (ou SIGTERM).
+
+    Com trabalhadores > 1 (e fork disponível), o socket é aberto aqui e
+    herdado por processos filhos, e o kernel distribui as conexões entre
+    eles. Sem segredo (nem LOJA_API_SEGREDO), um segredo aleatório é gerado
+    e os tokens deixam de valer ao reiniciar.
+    """
+    segredo = segredo or os.environ.get("LOJA_API_SEGREDO") or secrets.token_urlsafe(32)
+    if trabalhadores <= 1 or not hasattr(os, 'fork'):
+        servidor = ServidorApi((endereco, porta), criar_api(caminho_db, segredo))
+        ao_iniciar(f"API em http://{endereco}:{servidor.server_port}/api (1 processo)")
+        try:
+            servidor.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            servidor.server_close()
+            _encerrar(servidor.api)
+        return
+
+    ouvinte = socket.create_server((endereco, porta), backlog=ServidorApi.request_queue_size)
+    BancoDados(caminho_db)  # Cria tabelas e migra antes, para os filhos não disputarem
+    fechar_pools()  # Conexões SQLite não podem atravessar o fork
+    filhos = []
+    for _ in range(trabalhadores):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _trabalhar(ouvinte, caminho_db, segredo)
+            finally:
+                os._exit(0)
+        filhos.append(pid)
+
+    ao_iniciar(f"API em http://{endereco}:{ouvinte.getsockname()[1]}/api ({trabalhadores} processos)")
+    signal.signal(signal.SIGTERM, _interromper)
+    try:
+        for pid in filhos:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for pid in filhos:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in filhos:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        ouvinte.close()
@@ -2,234 +2,520 @@
 Banco de dados SQLite para a loja online.
 """
 
+import base64
+import json
 import sqlite3
 import os
+import random
+import re
+import time
 from datetime import datetime
-from typing import List, Optional
-from src.modelo import Produto, Usuario, ItemCarrinho, Pedido, Avaliacao
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+from src.modelo import (
+    Produto, PaginaProdutos, PaginaPedidos, Usuario, ItemCarrinho, Pedido, ResultadoCheckout, Avaliacao
+)
+from src.pool_conexoes import TAMANHO_POOL_LEITURA, obter_pool
+from src.mapeamento import (
+    colunas_produto, colunas_usuario, linha_para_produto, linha_para_produto_e_extras,
+    linha_para_usuario
+)
+from src.instrumentacao import Instrumentacao
+from src.migracoes import (
+    aplicar_migracoes, RECALCULAR_AVALIACOES, RECALCULAR_RESUMO_USUARIOS, RECALCULAR_VENDAS
+)
+from src.cache import (
+    CacheCatalogo, em_cache, marcador_produto, MARCADOR_LISTAS, MARCADOR_CATEGORIAS
+)
+
+# Linhas lidas por vez pelos métodos iterar_*
+TAMANHO_LOTE = 500
+
+# Parâmetros por comando em consultas com IN (...); o limite do SQLite
+# antigo é 999
+MAXIMO_PARAMETROS = 500
+
+# Bancos cujo esquema já foi verificado neste processo
+_esquemas_atualizados = set()
+
+
+# Ordenações aceitas por consultar_produtos: (expressão SQL, direção)
+ORDENACOES_PRODUTOS = {
+    'nome': ('p.nome', 'ASC'),
+    'preco': ('p.preco', 'ASC'),
+    'preco_desc': ('p.preco', 'DESC'),
+    'avaliacao': ('p.avaliacao_media', 'DESC'),
+    'recentes': ('p.id', 'DESC'),
+    'relevancia': ('b.relevancia', 'ASC'),  # só com termo de busca
+}
+
+
+def _codificar_cursor(valor, produto_id: int) -> str:
+    dados = json.dumps([valor, produto_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(dados).decode()
+
+
+def _decodificar_cursor(cursor: str) -> tuple:
+    try:
+        valor, produto_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        # O valor vai direto para o SQL: listas e objetos não são parâmetros
+        if valor is not None and not isinstance(valor, (str, int, float)):
+            raise TypeError(f"Valor de cursor não escalar: {valor!r}")
+        return valor, int(produto_id)
+    except (ValueError, TypeError) as erro:
+        raise ValueError("Cursor de paginação inválido") from erro
+
+
+def montar_consulta_fts(termo: str) -> Optional[str]:
+    """Converte o texto digitado numa consulta FTS5 de prefixos.
+    
+    Cada palavra vira um prefixo entre aspas, o que também neutraliza a
+    sintaxe do FTS5 (AND, OR, NEAR, aspas) digitada pelo usuário.
+    """
+    palavras = re.findall(r'\w+', termo)
+    if not palavras:
+        return None
+    return ' '.join(f'"{palavra}"*' for palavra in palavras)
 
 
 class BancoDados:
     """Gerencia conexão e operações com banco de dados SQLite."""
     
-    def __init__(self, caminho_db: str = "dados/loja.db"):
+    def __init__(self, caminho_db: str = "dados/loja.db", usar_pool: bool = False,
+                 tamanho_pool: Optional[int] = None, pragmas: Optional[dict] = None,
+                 cache: Optional[CacheCatalogo] = None,
+                 instrumentacao: Optional[Instrumentacao] = None):
+        """
+        Com usar_pool=True as conexões são reaproveitadas entre chamadas (e
+        entre instâncias que apontam para o mesmo arquivo), o banco passa a
+        usar WAL e os pragmas informados sobrescrevem PRAGMAS_PADRAO. As
+        leituras usam até tamanho_pool conexões somente leitura; as escritas
+        passam por uma única conexão, uma de cada vez, então uma leitura
+        nunca espera um checkout e os checkouts do processo fazem fila no
+        pool em vez de disputar o lock do SQLite. Sem tamanho_pool, vale
+        TAMANHO_POOL_LEITURA (duas conexões por CPU, até 8): leitores além
+        disso tiram CPU do escritor: o checkout cai e o p95 da navegação piora.
+        
+        Com cache, as leituras do catálogo passam pelo CacheCatalogo e as
+        escritas invalidam as entradas afetadas.
+        
+        Com instrumentacao, cada comando SQL tem tempo, linhas e método de
+        origem registrados (ver src/instrumentacao.py).
+        """
         self.caminho_db = caminho_db
-        os.makedirs(os.path.dirname(caminho_db), exist_ok=True)
+        self.cache = cache
+        self.instrumentacao = instrumentacao
+        self.ouvintes_escrita: List[Callable[[Optional[Tuple[str, ...]]], None]] = []
+        diretorio = os.path.dirname(caminho_db)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        self.pool = obter_pool(caminho_db, 1, pragmas) if usar_pool else None
         self.criar_tabelas()
+        # Criado depois das migrações: o arquivo já existe e já está em WAL
+        self.pool_leitura = (obter_pool(caminho_db, tamanho_pool or TAMANHO_POOL_LEITURA, pragmas,
+                                        somente_leitura=True)
+                             if usar_pool else None)
     
     def obter_conexao(self) -> sqlite3.Connection:
-        """Retorna conexão com o banco."""
-        conexao = sqlite3.connect(self.caminho_db)
-        conexao.row_factory = sqlite3.Row
+        """Retorna a conexão de escrita (do pool, quando habilitado).
+        
+        Com pool há uma só conexão de escrita por processo: quem chama
+        espera a anterior ser devolvida, então não a segure enquanto chama
+        outro método de escrita.
+        """
+        if self.pool is not None:
+            conexao = self.pool.obter()
+        else:
+            conexao = sqlite3.connect(self.caminho_db)
+            conexao.row_factory = sqlite3.Row
+        
+        if self.instrumentacao is not None:
+            return self.instrumentacao.envolver(conexao, self)
         return conexao
     
-    def criar_tabelas(self):
-        """Cria as tabelas do banco de dados."""
-        conexao = self.obter_conexao()
-        cursor = conexao.cursor()
+    def obter_conexao_leitura(self) -> sqlite3.Connection:
+        """Retorna uma conexão somente leitura (mode=ro, query_only).
         
-        # Tabela de Produtos
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS produtos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nome TEXT NOT NULL,
-                descricao TEXT,
-                preco REAL NOT NULL,
-                estoque INTEGER DEFAULT 0,
-                categoria TEXT NOT NULL,
-                avaliacao_media REAL DEFAULT 0,
-                total_avaliacoes INTEGER DEFAULT 0,
-                data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        Sem pool é uma conexão comum, como a de obter_conexao.
+        """
+        if self.pool_leitura is None:
+            return self.obter_conexao()
         
-        # Tabela de Usuários
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS usuarios (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nome TEXT NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                senha TEXT NOT NULL,
-                telefone TEXT,
-                endereco TEXT,
-                data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                ativo BOOLEAN DEFAULT 1
-            )
-        ''')
+        conexao = self.pool_leitura.obter()
+        if self.instrumentacao is not None:
+            return self.instrumentacao.envolver(conexao, self)
+        return conexao
+    
+    def metricas_pool(self) -> dict:
+        """Retorna as métricas dos pools de escrita e de leitura (vazio sem pool)."""
+        if self.pool is None:
+            return {}
+        return {'escrita': self.pool.metricas(), 'leitura': self.pool_leitura.metricas()}
+    
+    def fechar_pools(self):
+        """Fecha os pools de escrita e de leitura deste banco."""
+        for pool in (self.pool, self.pool_leitura):
+            if pool is not None:
+                pool.fechar()
+    
+    def _iterar_linhas(self, sql: str, parametros, tamanho_lote: int,
+                       fabrica: Optional[Callable] = None) -> Iterator:
+        """Executa uma consulta e entrega as linhas lendo com fetchmany.
         
-        # Tabela de Pedidos
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS pedidos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                usuario_id INTEGER NOT NULL,
-                endereco_entrega TEXT NOT NULL,
-                valor_subtotal REAL NOT NULL,
-                valor_frete REAL DEFAULT 0,
-                valor_total REAL NOT NULL,
-                status TEXT DEFAULT 'Pendente',
-                data_pedido TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                data_entrega TIMESTAMP,
-                FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
-            )
-        ''')
+        Com fabrica (uma row_factory de src.mapeamento), entrega os modelos.
+        A conexão fica em uso até o gerador terminar (ou ser fechado).
+        """
+        conexao = self.obter_conexao_leitura()
+        try:
+            cursor = conexao.cursor()
+            if fabrica is not None:
+                cursor.row_factory = fabrica
+            cursor.execute(sql, parametros)
+            while True:
+                linhas = cursor.fetchmany(tamanho_lote)
+                if not linhas:
+                    break
+                yield from linhas
+        finally:
+            conexao.close()
+    
+    def registrar_ouvinte_escrita(self, ouvinte: Callable[[Optional[Tuple[str, ...]]], None]):
+        """Avisa ouvinte a cada escrita, com os marcadores alterados.
         
-        # Tabela de Itens do Pedido
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS itens_pedido (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                pedido_id INTEGER NOT NULL,
-                produto_id INTEGER NOT NULL,
-                quantidade INTEGER NOT NULL,
-                preco_unitario REAL NOT NULL,
-                FOREIGN KEY (pedido_id) REFERENCES pedidos (id),
-                FOREIGN KEY (produto_id) REFERENCES produtos (id)
-            )
-        ''')
+        Os marcadores são os mesmos do cache (src/cache.py); None indica que
+        qualquer produto pode ter mudado.
+        """
+        self.ouvintes_escrita.append(ouvinte)
+    
+    def invalidar_cache(self, *marcadores: str):
+        """Invalida as entradas do cache afetadas por uma escrita e avisa os ouvintes.
         
-        # Tabela de Avaliações
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS avaliacoes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                produto_id INTEGER NOT NULL,
-                usuario_id INTEGER NOT NULL,
-                nota INTEGER NOT NULL,
-                comentario TEXT,
-                data_avaliacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (produto_id) REFERENCES produtos (id),
-                FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
-            )
-        ''')
+        Os métodos de escrita já chamam; use depois de escritas feitas fora
+        deles (BancoDadosAsync.executar_em_transacao, FilaEscritas).
+        """
+        if self.cache is not None:
+            self.cache.invalidar(marcadores)
+        for ouvinte in self.ouvintes_escrita:
+            ouvinte(marcadores)
+    
+    def invalidar_tudo(self):
+        """Descarta o cache inteiro depois de escritas em massa (ou desconhecidas)."""
+        if self.cache is not None:
+            self.cache.limpar()
+        for ouvinte in self.ouvintes_escrita:
+            ouvinte(None)
+    
+    def criar_tabelas(self):
+        """Aplica as migrações pendentes do esquema do banco de dados."""
+        chave = os.path.abspath(self.caminho_db)
+        if chave in _esquemas_atualizados and os.path.exists(chave):
+            return
         
-        conexao.commit()
-        conexao.close()
+        conexao = self.obter_conexao()
+        try:
+            aplicar_migracoes(conexao)
+        finally:
+            conexao.close()
+        
+        _esquemas_atualizados.add(chave)
     
     # ===== OPERAÇÕES COM PRODUTOS =====
     
     def criar_produto(self, produto: Produto) -> int:
         """Cria um novo produto."""
         conexao = self.obter_conexao()
-        cursor = conexao.cursor()
+        try:
+            cursor = conexao.cursor()
+            cursor.execute('''
+                INSERT INTO produtos (nome, descricao, preco, estoque, categoria, sku)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (produto.nome, produto.descricao, produto.preco, produto.estoque, produto.categoria,
+                  produto.sku))
+            conexao.commit()
+            produto_id = cursor.lastrowid
+        except Exception:
+            conexao.rollback()
+            raise
+        finally:
+            conexao.close()
         
-        cursor.execute('''
-            INSERT INTO produtos (nome, descricao, preco, estoque, categoria)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (produto.nome, produto.descricao, produto.preco, produto.estoque, produto.categoria))
+        self.invalidar_cache(MARCADOR_LISTAS, MARCADOR_CATEGORIAS, marcador_produto(produto_id))
+        return produto_id
+    
+    def salvar_produtos_em_lote(self, produtos: List[Produto]) -> int:
+        """Insere ou atualiza (pelo SKU) vários produtos numa única transação.
         
-        conexao.commit()
-        produto_id = cursor.lastrowid
-        conexao.close()
+        Produtos cujo SKU já existe com os mesmos dados não são regravados.
+        Retorna quantos produtos foram inseridos ou alterados.
+        """
+        if any(not produto.sku for produto in produtos):
+            raise ValueError("Todos os produtos do lote precisam de SKU")
         
-        return produto_id
+        conexao = self.obter_conexao()
+        try:
+            cursor = conexao.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.executemany('''
+                INSERT INTO produtos (sku, nome, descricao, preco, estoque, categoria)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (sku) DO UPDATE SET
+                    nome = excluded.nome,
+                    descricao = excluded.descricao,
+                    preco = excluded.preco,
+                    estoque = excluded.estoque,
+                    categoria = excluded.categoria
+                WHERE nome IS NOT excluded.nome OR descricao IS NOT excluded.descricao
+                   OR preco IS NOT excluded.preco OR estoque IS NOT excluded.estoque
+                   OR categoria IS NOT excluded.categoria
+            ''', [(produto.sku, produto.nome, produto.descricao, produto.preco,
+                   produto.estoque, produto.categoria) for produto in produtos])
+            alterados = cursor.rowcount
+            conexao.commit()
+        except Exception:
+            # Sem pool, o close() não desfaz a transação se o cursor ainda
+            # estiver vivo (no traceback), e o lock de escrita ficaria preso
+            conexao.rollback()
+            raise
+        finally:
+            conexao.close()
+        
+        if alterados:
+            self.invalidar_tudo()
+        return alterados
     
+    @em_cache('produto')
     def obter_produto(self, produto_id: int) -> Optional[Produto]:
         """Obtém um produto pelo ID."""
-        conexao = self.obter_conexao()
-        cursor = conexao.cursor()
+        conexao = self.obter_conexao_leitura()
+        try:
+            cursor = conexao.cursor()
+            cursor.row_factory = linha_para_produto
+            cursor.execute(f'SELECT {colunas_produto()} FROM produtos WHERE id = ?', (produto_id,))
+            return cursor.fetchone()
+        finally:
+            conexao.close()
+    
+    def obter_produtos_por_ids(self, produto_ids: Iterable[int]) -> List[Produto]:
+        """Obtém vários produtos de uma vez, na ordem dos IDs informados.
         
-        cursor.execute('SELECT * FROM produtos WHERE id = ?', (produto_id,))
-        linha = cursor.fetchone()
-        conexao.close()
-        
-        if linha:
-            return Produto(
-                id=linha['id'],
-                nome=linha['nome'],
-                descricao=linha['descricao'],
-                preco=linha['preco'],
-                estoque=linha['estoque'],
-                categoria=linha['categoria']
-            )
-        return None
+        IDs inexistentes são ignorados.
+        """
+        return self._obter_produtos_por_ids(tuple(produto_ids))
     
+    @em_cache('lista')
+    def _obter_produtos_por_ids(self, produto_ids: Tuple[int, ...]) -> List[Produto]:
+        encontrados = {}
+        unicos = list(dict.fromkeys(produto_ids))
+        conexao = self.obter_conexao_leitura()
+        try:
+            cursor = conexao.cursor()
+            cursor.row_factory = linha_para_produto
+            for inicio in range(0, len(unicos), MAXIMO_PARAMETROS):
+                lote = unicos[inicio:inicio + MAXIMO_PARAMETROS]
+                marcadores = ', '.join('?' * len(lote))
+                cursor.execute(f'SELECT {colunas_produto()} FROM produtos WHERE id IN ({marcadores})', lote)
+                for produto in cursor.fetchall():
+                    encontrados[produto.id] = produto
+        finally:
+            conexao.close()
+        
+        return [encontrados[produto_id] for produto_id in produto_ids if produto_id in encontrados]
+    
+    @em_cache('lista')
     def obter_todos_produtos(self) -> List[Produto]:
         """Obtém todos os produtos."""
-        conexao = self.obter_conexao()
-        cursor = conexao.cursor()
-        
-        cursor.execute('SELECT * FROM produtos ORDER BY nome')
-        linhas = cursor.fetchall()
-        conexao.close()
-        
-        produtos = []
-        for linha in linhas:
-            produto = Produto(
-                id=linha['id'],
-                nome=linha['nome'],
-                descricao=linha['descricao'],
-                preco=linha['preco'],
-                estoque=linha['estoque'],
-                categoria=linha['categoria']
-            )
-            produto.avaliacao_media = linha['avaliacao_media']
-            produto.total_avaliacoes = linha['total_avaliacoes']
-            produtos.append(produto)
-        
-        return produtos
+        return list(self.iterar_produtos())
     
+    def iterar_produtos(self, tamanho_lote: int = TAMANHO_LOTE) -> Iterator[Produto]:
+        """Percorre todos os produtos em lotes, sem carregar a tabela inteira."""
+        yield from self._iterar_linhas(f'SELECT {colunas_produto()} FROM produtos ORDER BY nome', (),
+                                       tamanho_lote, linha_para_produto)
+    
+    @em_cache('lista')
     def obter_produtos_por_categoria(self, categoria: str) -> List[Produto]:
         """Obtém produtos de uma categoria específica."""
-        conexao = self.obter_conexao()
-        cursor = conexao.cursor()
+        conexao = self.obter_conexao_leitura()
+        try:
+            cursor = conexao.cursor()
+            cursor.row_factory = linha_para_produto
+            cursor.execute(f'SELECT {colunas_produto()} FROM produtos WHERE categoria = ? ORDER BY nome',
+                           (categoria,))
+            return cursor.fetchall()
+        finally:
+            conexao.close()
+    
+    @em_cache('lista')
+    def consultar_produtos(self, preco_min: Optional[float] = None,
+                           preco_max: Optional[float] = None,
+                           categoria: Optional[str] = None,
+                           somente_em_estoque: bool = False,
+                           avaliacao_minima: Optional[float] = None,
+                           termo: Optional[str] = None,
+                           ordenar_por: str = 'nome',
+                           cursor: Optional[str] = None,
+                           limite: int = 24) -> PaginaProdutos:
+        """Consulta produtos com filtros, ordenação e paginação feitos no SQL.
         
-        cursor.execute('SELECT * FROM produtos WHERE categoria = ? ORDER BY nome', (categoria,))
-        linhas = cursor.fetchall()
-        conexao.close()
-        
-        produtos = []
-        for linha in linhas:
-            produto = Produto(
-                id=linha['id'],
-                nome=linha['nome'],
-                descricao=linha['descricao'],
-                preco=linha['preco'],
-                estoque=linha['estoque'],
-                categoria=linha['categoria']
-            )
-            produtos.append(produto)
+        A paginação é por keyset: passe o proximo_cursor da página anterior
+        em cursor para obter a seguinte. Com termo, a busca usa o índice FTS5
+        e ordenar_por='relevancia' fica disponível.
+        """
+        if ordenar_por not in ORDENACOES_PRODUTOS:
+            raise ValueError(f"Ordenação inválida: {ordenar_por}")
+        if limite < 1:
+            raise ValueError("O limite deve ser pelo menos 1")
+        
+        consulta_fts = None
+        if termo is not None:
+            consulta_fts = montar_consulta_fts(termo)
+            if consulta_fts is None:
+                return PaginaProdutos([])
+        elif ordenar_por == 'relevancia':
+            raise ValueError("Ordenação por relevância exige um termo de busca")
+        
+        expressao, direcao = ORDENACOES_PRODUTOS[ordenar_por]
+        condicoes = []
+        parametros = []
+        
+        if consulta_fts is not None:
+            origem = '''produtos p JOIN (
+                SELECT rowid AS id, rank AS relevancia,
+                       snippet(produtos_busca, 1, '<mark>', '</mark>', '…', 12) AS trecho
+                FROM produtos_busca WHERE produtos_busca MATCH ?
+            ) b ON b.id = p.id'''
+            trecho = 'b.trecho'
+            parametros.append(consulta_fts)
+        else:
+            origem = 'produtos p'
+            trecho = 'NULL'
+        
+        # Faixas em colunas que não são a da ordenação levam "+" para o SQLite
+        # não usar o índice delas: percorrer o índice da ordenação e parar no
+        # LIMIT mantém o tempo constante, em vez de ordenar a faixa inteira.
+        def coluna_filtro(coluna: str) -> str:
+            return coluna if coluna == expressao else f'+{coluna}'
+        
+        if preco_min is not None:
+            condicoes.append(f"{coluna_filtro('p.preco')} >= ?")
+            parametros.append(preco_min)
+        if preco_max is not None:
+            condicoes.append(f"{coluna_filtro('p.preco')} <= ?")
+            parametros.append(preco_max)
+        if categoria is not None:
+            condicoes.append('p.categoria = ?')
+            parametros.append(categoria)
+        if somente_em_estoque:
+            condicoes.append('p.estoque > 0')
+        if avaliacao_minima is not None:
+            condicoes.append(f"{coluna_filtro('p.avaliacao_media')} >= ?")
+            parametros.append(avaliacao_minima)
+        
+        comparacao = '>' if direcao == 'ASC' else '<'
+        if expressao == 'p.id':
+            ordem = f'p.id {direcao}'
+            if cursor is not None:
+                condicoes.append(f'p.id {comparacao} ?')
+                parametros.append(_decodificar_cursor(cursor)[1])
+        else:
+            ordem = f'{expressao} {direcao}, p.id {direcao}'
+            if cursor is not None:
+                condicoes.append(f'({expressao}, p.id) {comparacao} (?, ?)')
+                parametros.extend(_decodificar_cursor(cursor))
         
-        return produtos
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ''
+        sql = f'''
+            SELECT {colunas_produto('p')}, {trecho}, {expressao} FROM {origem}
+            {where}
+            ORDER BY {ordem}
+            LIMIT ?
+        '''
+        # Uma linha a mais indica se existe próxima página
+        parametros.append(limite + 1)
+        
+        conexao = self.obter_conexao_leitura()
+        try:
+            cursor_db = conexao.cursor()
+            cursor_db.row_factory = linha_para_produto_e_extras
+            cursor_db.execute(sql, parametros)
+            linhas = cursor_db.fetchall()
+        finally:
+            conexao.close()
+        
+        proximo_cursor = None
+        if len(linhas) > limite:
+            linhas = linhas[:limite]
+            ultimo, _trecho, chave_ordem = linhas[-1]
+            proximo_cursor = _codificar_cursor(chave_ordem, ultimo.id)
+        
+        produtos = [produto for produto, _trecho, _chave in linhas]
+        trechos = {}
+        if consulta_fts is not None:
+            trechos = {produto.id: trecho for produto, trecho, _chave in linhas}
+        
+        return PaginaProdutos(produtos, proximo_cursor, trechos)
     
-    def buscar_produtos(self, termo: str) -> List[Produto]:
-        """Busca produtos por nome ou descrição."""
-        conexao = self.obter_conexao()
-        cursor = conexao.cursor()
+    def buscar_produtos(self, termo: str, limite: int = 50) -> List[Produto]:
+        """Busca produtos por nome ou descrição, ordenados por relevância."""
+        return [produto for produto, _ in self.buscar_produtos_com_trecho(termo, limite)]
+    
+    def buscar_produtos_com_trecho(self, termo: str, limite: int = 50) -> List[Tuple[Produto, str]]:
+        """Busca produtos e retorna cada um com o trecho da descrição encontrado.
         
-        termo_busca = f"%{termo}%"
-        cursor.execute('''
-            SELECT * FROM produtos 
-            WHERE nome LIKE ? OR descricao LIKE ? 
-            ORDER BY nome
-        ''', (termo_busca, termo_busca))
-        linhas = cursor.fetchall()
-        conexao.close()
-        
-        produtos = []
-        for linha in linhas:
-            produto = Produto(
-                id=linha['id'],
-                nome=linha['nome'],
-                descricao=linha['descricao'],
-                preco=linha['preco'],
-                estoque=linha['estoque'],
-                categoria=linha['categoria']
-            )
-            produtos.append(produto)
+        Usa o índice FTS5 produtos_busca: ignora acentos, trata cada palavra
+        como prefixo ("tecl mec" encontra "Teclado Mecânico") e ordena por bm25.
+        """
+        consulta = montar_consulta_fts(termo)
+        if consulta is None:
+            return []
         
-        return produtos
+        conexao = self.obter_conexao_leitura()
+        try:
+            cursor = conexao.cursor()
+            cursor.row_factory = linha_para_produto_e_extras
+            cursor.execute(f'''
+                SELECT {colunas_produto('p')},
+                       snippet(produtos_busca, 1, '<mark>', '</mark>', '…', 12)
+                FROM produtos_busca
+                JOIN produtos p ON p.id = produtos_busca.rowid
+                WHERE produtos_busca MATCH ?
+                ORDER BY produtos_busca.rank
+                LIMIT ?
+            ''', (consulta, limite))
+            return cursor.fetchall()
+        finally:
+            conexao.close()
+    
+    def reconstruir_indice_busca(self):
+        """Reconstrói o índice de busca textual a partir da tabela produtos."""
+        conexao = self.obter_conexao()
+        try:
+            cursor = conexao.cursor()
+            cursor.execute("INSERT INTO produtos_busca (produtos_busca) VALUES ('rebuild')")
+            cursor.execute("INSERT INTO produtos_busca (produtos_busca) VALUES ('optimize')")
+            conexao.commit()
+        except Exception:
+            conexao.rollback()
+            raise
+        finally:
+            conexao.close()
     
     def atualizar_estoque(self, produto_id: int, quantidade: int) -> bool:
         """Atualiza o estoque de um produto."""
         conexao = self.obter_conexao()
-        cursor = conexao.cursor()
-        
-        cursor.execute('''
-            UPDATE produtos SET estoque = estoque - ? WHERE id = ?
-        ''', (quantidade, produto_id))
-        
-        conexao.commit()
-        sucesso = cursor.rowcount > 0
-        conexao.close()
+        try:
+            cursor = conexao.cursor()
+            cursor.execute('''
+                UPDATE produtos SET estoque = estoque - ? WHERE id = ?
+            ''', (quantidade, produto_id))
+            conexao.commit()
+            sucesso = cursor.rowcount > 0
+        except Exception:
+            conexao.rollback()
+            raise
+        finally:
+            conexao.close()
         
+        # Com estoque reposto o produto pode entrar em listas que não o tinham
+        self.invalidar_cache(MARCADOR_LISTAS, marcador_produto(produto_id))
         return sucesso
     
     # ===== OPERAÇÕES COM USUÁRIOS =====
@@ -237,9 +523,8 @@ class BancoDados:
     def criar_usuario(self, usuario: Usuario) -> int:
         """Cria um novo usuário."""
         conexao = self.obter_conexao()
-        cursor = conexao.cursor()
-        
         try:
+            cursor = conexao.cursor()
             cursor.execute('''
                 INSERT INTO usuarios (nome, email, senha, telefone, endereco, ativo)
                 VALUES (?, ?, ?, ?, ?, ?)
@@ -250,39 +535,35 @@ class BancoDados:
             usuario_id = cursor.lastrowid
             return usuario_id
         except sqlite3.IntegrityError:
+            conexao.rollback()
             return -1  # Email já existe
+        except Exception:
+            conexao.rollback()
+            raise
         finally:
             conexao.close()
     
     def obter_usuario(self, usuario_id: int) -> Optional[Usuario]:
         """Obtém um usuário pelo ID."""
-        conexao = self.obter_conexao()
-        cursor = conexao.cursor()
-        
-        cursor.execute('SELECT * FROM usuarios WHERE id = ?', (usuario_id,))
-        linha = cursor.fetchone()
-        conexao.close()
-        
-        if linha:
-            return Usuario(
-                id=linha['id'],
-                nome=linha['nome'],
-                email=linha['email'],
-                senha=linha['senha'],
-                telefone=linha['telefone'],
-                endereco=linha['endereco']
-            )
-        return None
+        conexao = self.obter_conexao_leitura()
+        try:
+            cursor = conexao.cursor()
+            cursor.row_factory = linha_para_usuario
+            cursor.execute(f'SELECT {colunas_usuario()} FROM usuarios WHERE id = ?', (usuario_id,))
+            return cursor.fetchone()
+        finally:
+            conexao.close()
     
     def verificar_login(self, email: str, senha: str) -> Optional[int]:
         """Verifica se o login está correto. Retorna o ID do usuário ou None."""
-        conexao = self.obter_conexao()
-        cursor = conexao.cursor()
-        
-        cursor.execute('SELECT id FROM usuarios WHERE email = ? AND senha = ? AND ativo = 1', 
-                      (email, senha))
-        linha = cursor.fetchone()
-        conexao.close()
+        conexao = self.obter_conexao_leitura()
+        try:
+            cursor = conexao.cursor()
+            cursor.execute('SELECT id FROM usuarios WHERE email = ? AND senha = ? AND ativo = 1',
+                           (email, senha))
+            linha = cursor.fetchone()
+        finally:
+            conexao.close()
         
         return linha['id'] if linha else None
     
@@ -290,107 +571,508 @@ class BancoDados:
     
     def criar_pedido(self, pedido: Pedido) -> int:
         """Cria um novo pedido."""
+        subtotal = pedido.obter_subtotal()
+        total = pedido.obter_total()
+        
         conexao = self.obter_conexao()
+        try:
+            cursor = conexao.cursor()
+            cursor.execute('''
+                INSERT INTO pedidos (usuario_id, endereco_entrega, valor_subtotal, valor_frete, valor_total, status)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (pedido.usuario_id, pedido.endereco_entrega, subtotal, pedido.valor_frete, total, pedido.status))
+            pedido_id = cursor.lastrowid
+            
+            # Insere os itens do pedido
+            for item in pedido.items:
+                cursor.execute('''
+                    INSERT INTO itens_pedido (pedido_id, produto_id, quantidade, preco_unitario)
+                    VALUES (?, ?, ?, ?)
+                ''', (pedido_id, item.produto_id, item.quantidade, item.preco_unitario))
+            
+            self._atualizar_resumos(cursor, pedido_id)
+            conexao.commit()
+        except Exception:
+            conexao.rollback()
+            raise
+        finally:
+            conexao.close()
+        
+        return pedido_id
+    
+    def finalizar_pedido(self, pedido: Pedido, tentativas: int = 5,
+                         espera_inicial: float = 0.05) -> ResultadoCheckout:
+        """Grava o pedido e baixa o estoque numa única transação.
+        
+        Cada baixa só acontece se houver estoque (estoque >= quantidade). Se
+        algum item não puder ser atendido nada é gravado e o resultado lista
+        os itens indisponíveis. Se o banco estiver ocupado por outro
+        escritor, a transação é repetida com espera exponencial.
+        """
+        if tentativas < 1:
+            raise ValueError("É preciso pelo menos uma tentativa")
+        for item in pedido.items:
+            if item.quantidade <= 0:
+                raise ValueError(f"Quantidade inválida para o produto {item.produto_id}")
+        
+        for tentativa in range(tentativas):
+            conexao = self.obter_conexao()
+            try:
+                resultado = self._executar_checkout(conexao, pedido)
+                break
+            except sqlite3.OperationalError as erro:
+                if conexao.in_transaction:
+                    conexao.rollback()
+                ocupado = 'locked' in str(erro) or 'busy' in str(erro)
+                if not ocupado or tentativa == tentativas - 1:
+                    raise
+                time.sleep(espera_inicial * (2 ** tentativa) * random.uniform(0.5, 1.5))
+            except Exception:
+                if conexao.in_transaction:
+                    conexao.rollback()
+                raise
+            finally:
+                conexao.close()
+        
+        if resultado.sucesso:
+            pedido.id = resultado.pedido_id
+            # O checkout só baixa estoque: nenhum produto entra numa lista nova
+            self.invalidar_cache(*(marcador_produto(item.produto_id) for item in pedido.items))
+        return resultado
+    
+    def _executar_checkout(self, conexao: sqlite3.Connection, pedido: Pedido) -> ResultadoCheckout:
+        """Executa a transação de checkout (BEGIN IMMEDIATE ... COMMIT)."""
         cursor = conexao.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
         
-        subtotal = pedido.obter_subtotal()
-        total = pedido.obter_total()
+        faltando = []
+        for item in pedido.items:
+            cursor.execute('''
+                UPDATE produtos SET estoque = estoque - ? WHERE id = ? AND estoque >= ?
+            ''', (item.quantidade, item.produto_id, item.quantidade))
+            if cursor.rowcount == 0:
+                faltando.append(item)
+        
+        if faltando:
+            conexao.rollback()
+            ids = [item.produto_id for item in faltando]
+            cursor.execute(
+                f"SELECT id, estoque FROM produtos WHERE id IN ({', '.join('?' * len(ids))})", ids
+            )
+            estoques = {linha['id']: linha['estoque'] for linha in cursor.fetchall()}
+            return ResultadoCheckout(itens_indisponiveis=[
+                {
+                    'produto_id': item.produto_id,
+                    'solicitado': item.quantidade,
+                    'disponivel': max(estoques.get(item.produto_id, 0), 0),
+                }
+                for item in faltando
+            ])
         
         cursor.execute('''
             INSERT INTO pedidos (usuario_id, endereco_entrega, valor_subtotal, valor_frete, valor_total, status)
             VALUES (?, ?, ?, ?, ?, ?)
-        ''', (pedido.usuario_id, pedido.endereco_entrega, subtotal, pedido.valor_frete, total, pedido.status))
-        
+        ''', (pedido.usuario_id, pedido.endereco_entrega, pedido.obter_subtotal(),
+              pedido.valor_frete, pedido.obter_total(), pedido.status))
         pedido_id = cursor.lastrowid
         
-        # Insere os itens do pedido
-        for item in pedido.items:
-            cursor.execute('''
-                INSERT INTO itens_pedido (pedido_id, produto_id, quantidade, preco_unitario)
-                VALUES (?, ?, ?, ?)
-            ''', (pedido_id, item.produto_id, item.quantidade, item.preco_unitario))
+        cursor.executemany('''
+            INSERT INTO itens_pedido (pedido_id, produto_id, quantidade, preco_unitario)
+            VALUES (?, ?, ?, ?)
+        ''', [(pedido_id, item.produto_id, item.quantidade, item.preco_unitario)
+              for item in pedido.items])
         
+        self._atualizar_resumos(cursor, pedido_id)
         conexao.commit()
-        conexao.close()
+        return ResultadoCheckout(pedido_id)
+    
+    def _atualizar_resumos(self, cursor: sqlite3.Cursor, pedido_id: int):
+        """Soma o pedido recém-gravado ao resumo do usuário e aos resumos de
+        vendas, na mesma transação que grava o pedido."""
+        cursor.execute('''
+            INSERT INTO resumo_usuarios (usuario_id, total_pedidos, valor_total,
+                                         ultimo_pedido_id, ultimo_pedido_em)
+            SELECT usuario_id, 1, valor_total, id, data_pedido FROM pedidos WHERE id = ?
+            ON CONFLICT (usuario_id) DO UPDATE SET
+                total_pedidos = total_pedidos + 1,
+                valor_total = valor_total + excluded.valor_total,
+                ultimo_pedido_id = excluded.ultimo_pedido_id,
+                ultimo_pedido_em = excluded.ultimo_pedido_em
+        ''', (pedido_id,))
+        cursor.execute('''
+            INSERT INTO vendas_categoria_dia (dia, categoria, pedidos, unidades, receita)
+            SELECT date(pe.data_pedido), COALESCE(pr.categoria, ''), 1,
+                   SUM(ip.quantidade), SUM(ip.quantidade * ip.preco_unitario)
+            FROM pedidos pe
+            JOIN itens_pedido ip ON ip.pedido_id = pe.id
+            LEFT JOIN produtos pr ON pr.id = ip.produto_id
+            WHERE pe.id = ?
+            GROUP BY 1, 2
+            ON CONFLICT (dia, categoria) DO UPDATE SET
+                pedidos = pedidos + 1,
+                unidades = unidades + excluded.unidades,
+                receita = receita + excluded.receita
+        ''', (pedido_id,))
+        cursor.execute('''
+            INSERT INTO vendas_produto (produto_id, pedidos, unidades, receita)
+            SELECT produto_id, 1, SUM(quantidade), SUM(quantidade * preco_unitario)
+            FROM itens_pedido WHERE pedido_id = ?
+            GROUP BY produto_id
+            ON CONFLICT (produto_id) DO UPDATE SET
+                pedidos = pedidos + 1,
+                unidades = unidades + excluded.unidades,
+                receita = receita + excluded.receita
+        ''', (pedido_id,))
+        cursor.execute('''
+            INSERT INTO pedidos_por_status (status, pedidos, valor_total)
+            SELECT status, 1, valor_total FROM pedidos WHERE id = ?
+            ON CONFLICT (status) DO UPDATE SET
+                pedidos = pedidos + 1,
+                valor_total = valor_total + excluded.valor_total
+        ''', (pedido_id,))
+    
+    def reconstruir_resumos(self) -> int:
+        """Refaz os resumos de usuários e de vendas a partir do histórico.
         
-        return pedido_id
+        Use depois de cargas feitas fora do BancoDados ou para corrigir
+        divergências; retorna quantos pedidos foram considerados.
+        """
+        conexao = self.obter_conexao()
+        try:
+            cursor = conexao.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            for comando in RECALCULAR_RESUMO_USUARIOS + RECALCULAR_VENDAS:
+                cursor.execute(comando)
+            cursor.execute('SELECT COUNT(*) FROM pedidos')
+            total = cursor.fetchone()[0]
+            conexao.commit()
+        except Exception:
+            conexao.rollback()
+            raise
+        finally:
+            conexao.close()
+        
+        return total
     
     def obter_pedidos_usuario(self, usuario_id: int) -> List[dict]:
         """Obtém todos os pedidos de um usuário."""
-        conexao = self.obter_conexao()
-        cursor = conexao.cursor()
-        
-        cursor.execute('''
+        return list(self.iterar_pedidos_usuario(usuario_id))
+    
+    def iterar_pedidos_usuario(self, usuario_id: int,
+                               tamanho_lote: int = TAMANHO_LOTE) -> Iterator[dict]:
+        """Percorre os pedidos de um usuário em lotes."""
+        for linha in self._iterar_linhas('''
             SELECT * FROM pedidos WHERE usuario_id = ? ORDER BY data_pedido DESC
-        ''', (usuario_id,))
-        linhas = cursor.fetchall()
-        conexao.close()
+        ''', (usuario_id,), tamanho_lote):
+            yield dict(linha)
+    
+    def consultar_pedidos_usuario(self, usuario_id: int, cursor: Optional[str] = None,
+                                  limite: int = 10) -> PaginaPedidos:
+        """Uma página do histórico de pedidos, do mais recente ao mais antigo.
         
-        return [dict(linha) for linha in linhas]
+        Os pedidos da página e seus itens (com o nome do produto) vêm numa
+        única consulta. A paginação é por keyset em (data_pedido, id): passe
+        o proximo_cursor da página anterior em cursor.
+        """
+        if limite < 1:
+            raise ValueError("O limite deve ser pelo menos 1")
+        
+        condicao = ''
+        parametros: list = [usuario_id]
+        if cursor:
+            data_pedido, pedido_id = _decodificar_cursor(cursor)
+            condicao = 'AND (data_pedido < ? OR (data_pedido = ? AND id < ?))'
+            parametros += [data_pedido, data_pedido, pedido_id]
+        parametros.append(limite + 1)
+        
+        conexao = self.obter_conexao_leitura()
+        try:
+            cursor_db = conexao.cursor()
+            cursor_db.row_factory = None
+            cursor_db.execute(f'''
+                WITH pagina AS (
+                    SELECT id, data_pedido, status, endereco_entrega,
+                           valor_subtotal, valor_frete, valor_total, data_entrega
+                    FROM pedidos
+                    WHERE usuario_id = ? {condicao}
+                    ORDER BY data_pedido DESC, id DESC
+                    LIMIT ?
+                )
+                SELECT pg.*, ip.produto_id, pr.nome, ip.quantidade, ip.preco_unitario
+                FROM pagina pg
+                LEFT JOIN itens_pedido ip ON ip.pedido_id = pg.id
+                LEFT JOIN produtos pr ON pr.id = ip.produto_id
+                ORDER BY pg.data_pedido DESC, pg.id DESC, ip.id
+            ''', parametros)
+            linhas = cursor_db.fetchall()
+        finally:
+            conexao.close()
+        
+        pedidos: dict = {}
+        for (pedido_id, data_pedido, status, endereco, subtotal, frete, total, data_entrega,
+             produto_id, nome, quantidade, preco_unitario) in linhas:
+            pedido = pedidos.get(pedido_id)
+            if pedido is None:
+                pedido = pedidos[pedido_id] = {
+                    'id': pedido_id, 'usuario_id': usuario_id, 'data_pedido': data_pedido,
+                    'status': status, 'endereco_entrega': endereco, 'valor_subtotal': subtotal,
+                    'valor_frete': frete, 'valor_total': total, 'data_entrega': data_entrega,
+                    'itens': [],
+                }
+            if produto_id is not None:
+                pedido['itens'].append({
+                    'produto_id': produto_id, 'nome': nome,
+                    'quantidade': quantidade, 'preco_unitario': preco_unitario,
+                })
+        
+        lista = list(pedidos.values())
+        proximo_cursor = None
+        if len(lista) > limite:
+            lista = lista[:limite]
+            proximo_cursor = _codificar_cursor(lista[-1]['data_pedido'], lista[-1]['id'])
+        return PaginaPedidos(lista, proximo_cursor)
+    
+    def obter_resumo_usuario(self, usuario_id: int) -> dict:
+        """Total de pedidos, valor gasto e último pedido de um usuário."""
+        conexao = self.obter_conexao_leitura()
+        try:
+            cursor = conexao.cursor()
+            cursor.execute('''
+                SELECT total_pedidos, valor_total, ultimo_pedido_id, ultimo_pedido_em
+                FROM resumo_usuarios WHERE usuario_id = ?
+            ''', (usuario_id,))
+            linha = cursor.fetchone()
+        finally:
+            conexao.close()
+        
+        if linha is None:
+            return {'total_pedidos': 0, 'valor_total': 0.0,
+                    'ultimo_pedido_id': None, 'ultimo_pedido_em': None}
+        resumo = dict(linha)
+        resumo['valor_total'] = round(resumo['valor_total'], 2)
+        return resumo
+    
+    def iterar_itens_pedidos(self, apos_pedido_id: int = 0,
+                             data_inicio: Optional[str] = None,
+                             data_fim: Optional[str] = None,
+                             tamanho_lote: int = TAMANHO_LOTE) -> Iterator[dict]:
+        """Percorre pedidos com seus itens (uma linha por item), em ordem de ID.
+        
+        As datas são 'AAAA-MM-DD' e data_fim é inclusiva. Pedidos sem itens
+        aparecem uma vez, com os campos do item nulos.
+        """
+        condicoes = ['p.id > ?']
+        parametros = [apos_pedido_id]
+        if data_inicio:
+            condicoes.append('p.data_pedido >= ?')
+            parametros.append(data_inicio)
+        if data_fim:
+            condicoes.append("p.data_pedido < date(?, '+1 day')")
+            parametros.append(data_fim)
+        
+        sql = f'''
+            SELECT p.id AS pedido_id, p.usuario_id, p.data_pedido, p.status,
+                   p.endereco_entrega, p.valor_subtotal, p.valor_frete, p.valor_total,
+                   ip.id AS item_id, ip.produto_id, ip.quantidade, ip.preco_unitario
+            FROM pedidos p
+            LEFT JOIN itens_pedido ip ON ip.pedido_id = p.id
+            WHERE {' AND '.join(condicoes)}
+            ORDER BY p.id, ip.id
+        '''
+        for linha in self._iterar_linhas(sql, parametros, tamanho_lote):
+            yield dict(linha)
     
     # ===== OPERAÇÕES COM AVALIAÇÕES =====
     
     def criar_avaliacao(self, avaliacao: Avaliacao) -> int:
-        """Cria uma nova avaliação."""
+        """Cria uma nova avaliação e atualiza os agregados do produto."""
         conexao = self.obter_conexao()
-        cursor = conexao.cursor()
+        try:
+            avaliacao_id = self.inserir_avaliacao(conexao.cursor(), avaliacao)
+            conexao.commit()
+        except Exception:
+            conexao.rollback()
+            raise
+        finally:
+            conexao.close()
+        
+        # A nova média pode pôr o produto em listas filtradas por avaliação
+        self.invalidar_cache(MARCADOR_LISTAS, marcador_produto(avaliacao.produto_id))
+        return avaliacao_id
+    
+    @staticmethod
+    def validar_avaliacao(avaliacao: Avaliacao):
+        """Levanta ValueError se a nota não for de 1 a 5.
+        
+        inserir_avaliacao já valida; quem agenda a gravação para depois (a
+        FilaEscritas) chama antes para recusar na hora.
+        """
+        if avaliacao.nota not in (1, 2, 3, 4, 5):
+            raise ValueError(f"Nota inválida: {avaliacao.nota} (deve ser de 1 a 5)")
+    
+    def inserir_avaliacao(self, cursor: sqlite3.Cursor, avaliacao: Avaliacao) -> int:
+        """Valida e insere a avaliação e soma a nota aos agregados do produto.
+        
+        É o caminho de toda avaliação (criar_avaliacao e FilaEscritas).
+        Levanta ValueError se a nota for inválida ou se o produto ou o
+        usuário não existir; nesse caso quem chamou deve desfazer a
+        transação (ou o savepoint). Não faz commit: a inserção e a
+        atualização dos agregados ficam na transação de quem chamou. O custo
+        não depende de quantas avaliações o produto já tem.
+        """
+        self.validar_avaliacao(avaliacao)
+        if cursor.execute('SELECT 1 FROM usuarios WHERE id = ?', (avaliacao.usuario_id,)).fetchone() is None:
+            raise ValueError(f"Usuário {avaliacao.usuario_id} não encontrado")
         
         cursor.execute('''
             INSERT INTO avaliacoes (produto_id, usuario_id, nota, comentario)
             VALUES (?, ?, ?, ?)
         ''', (avaliacao.produto_id, avaliacao.usuario_id, avaliacao.nota, avaliacao.comentario))
-        
-        conexao.commit()
         avaliacao_id = cursor.lastrowid
         
-        # Atualiza a avaliação média do produto
-        self._atualizar_avaliacao_produto(avaliacao.produto_id)
+        # No UPDATE as colunas à direita têm os valores antigos da linha
+        cursor.execute('''
+            UPDATE produtos SET
+                soma_notas = soma_notas + :nota,
+                total_avaliacoes = total_avaliacoes + 1,
+                avaliacao_media = ROUND(CAST(soma_notas + :nota AS REAL) / (total_avaliacoes + 1), 2),
+                estrelas_1 = estrelas_1 + (:nota = 1),
+                estrelas_2 = estrelas_2 + (:nota = 2),
+                estrelas_3 = estrelas_3 + (:nota = 3),
+                estrelas_4 = estrelas_4 + (:nota = 4),
+                estrelas_5 = estrelas_5 + (:nota = 5)
+            WHERE id = :produto_id
+        ''', {'nota': avaliacao.nota, 'produto_id': avaliacao.produto_id})
+        if cursor.rowcount == 0:
+            raise ValueError(f"Produto {avaliacao.produto_id} não encontrado")
         
-        conexao.close()
         return avaliacao_id
     
     def obter_avaliacoes_produto(self, produto_id: int) -> List[dict]:
         """Obtém todas as avaliações de um produto."""
-        conexao = self.obter_conexao()
-        cursor = conexao.cursor()
-        
-        cursor.execute('''
+        return list(self.iterar_avaliacoes_produto(produto_id))
+    
+    def iterar_avaliacoes_produto(self, produto_id: int,
+                                  tamanho_lote: int = TAMANHO_LOTE) -> Iterator[dict]:
+        """Percorre as avaliações de um produto em lotes."""
+        for linha in self._iterar_linhas('''
             SELECT a.*, u.nome FROM avaliacoes a
             JOIN usuarios u ON a.usuario_id = u.id
             WHERE a.produto_id = ? ORDER BY a.data_avaliacao DESC
-        ''', (produto_id,))
-        linhas = cursor.fetchall()
-        conexao.close()
+        ''', (produto_id,), tamanho_lote):
+            yield dict(linha)
+    
+    def iterar_avaliacoes(self, apos_id: int = 0,
+                          data_inicio: Optional[str] = None,
+                          data_fim: Optional[str] = None,
+                          tamanho_lote: int = TAMANHO_LOTE) -> Iterator[dict]:
+        """Percorre todas as avaliações em ordem de ID (datas como em iterar_itens_pedidos)."""
+        condicoes = ['id > ?']
+        parametros = [apos_id]
+        if data_inicio:
+            condicoes.append('data_avaliacao >= ?')
+            parametros.append(data_inicio)
+        if data_fim:
+            condicoes.append("data_avaliacao < date(?, '+1 day')")
+            parametros.append(data_fim)
         
-        return [dict(linha) for linha in linhas]
+        sql = f'''
+            SELECT id, produto_id, usuario_id, nota, comentario, data_avaliacao
+            FROM avaliacoes WHERE {' AND '.join(condicoes)} ORDER BY id
+        '''
+        for linha in self._iterar_linhas(sql, parametros, tamanho_lote):
+            yield dict(linha)
+    
+    def obter_histograma_avaliacoes(self, produto_id: int) -> dict:
+        """Retorna quantas avaliações o produto tem com cada nota (1 a 5)."""
+        conexao = self.obter_conexao_leitura()
+        try:
+            cursor = conexao.cursor()
+            cursor.execute('''
+                SELECT estrelas_1, estrelas_2, estrelas_3, estrelas_4, estrelas_5
+                FROM produtos WHERE id = ?
+            ''', (produto_id,))
+            linha = cursor.fetchone()
+        finally:
+            conexao.close()
+        
+        if linha is None:
+            return {}
+        return {nota: linha[nota - 1] for nota in range(1, 6)}
     
     def _atualizar_avaliacao_produto(self, produto_id: int):
-        """Atualiza a avaliação média de um produto."""
+        """Recalcula do zero os agregados de avaliação de um produto."""
         conexao = self.obter_conexao()
-        cursor = conexao.cursor()
-        
-        cursor.execute('''
-            SELECT AVG(nota) as media, COUNT(*) as total FROM avaliacoes WHERE produto_id = ?
-        ''', (produto_id,))
-        resultado = cursor.fetchone()
+        try:
+            cursor = conexao.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('''
+                SELECT COUNT(*) AS total, COALESCE(SUM(nota), 0) AS soma,
+                       COALESCE(SUM(nota = 1), 0) AS e1, COALESCE(SUM(nota = 2), 0) AS e2,
+                       COALESCE(SUM(nota = 3), 0) AS e3, COALESCE(SUM(nota = 4), 0) AS e4,
+                       COALESCE(SUM(nota = 5), 0) AS e5
+                FROM avaliacoes WHERE produto_id = ?
+            ''', (produto_id,))
+            resultado = cursor.fetchone()
+            
+            total = resultado['total']
+            media = resultado['soma'] / total if total else 0
+            
+            cursor.execute('''
+                UPDATE produtos SET avaliacao_media = ?, total_avaliacoes = ?, soma_notas = ?,
+                    estrelas_1 = ?, estrelas_2 = ?, estrelas_3 = ?, estrelas_4 = ?, estrelas_5 = ?
+                WHERE id = ?
+            ''', (round(media, 2), total, resultado['soma'], resultado['e1'], resultado['e2'],
+                  resultado['e3'], resultado['e4'], resultado['e5'], produto_id))
+            conexao.commit()
+        except Exception:
+            conexao.rollback()
+            raise
+        finally:
+            conexao.close()
         
-        media = resultado['media'] if resultado['media'] else 0
-        total = resultado['total'] if resultado['total'] else 0
+        self.invalidar_cache(MARCADOR_LISTAS, marcador_produto(produto_id))
+    
+    def reconciliar_avaliacoes(self) -> int:
+        """Recalcula em lote os agregados de avaliação de todos os produtos.
         
-        cursor.execute('''
-            UPDATE produtos SET avaliacao_media = ?, total_avaliacoes = ? WHERE id = ?
-        ''', (round(media, 2), total, produto_id))
+        Corrige divergências entre os agregados incrementais e a tabela
+        avaliacoes; retorna quantos produtos estavam divergentes.
+        """
+        conexao = self.obter_conexao()
+        try:
+            cursor = conexao.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('''
+                SELECT COUNT(*) FROM produtos p
+                LEFT JOIN (
+                    SELECT produto_id, COUNT(*) AS total, SUM(nota) AS soma
+                    FROM avaliacoes GROUP BY produto_id
+                ) a ON a.produto_id = p.id
+                WHERE p.total_avaliacoes != COALESCE(a.total, 0)
+                   OR p.soma_notas != COALESCE(a.soma, 0)
+            ''')
+            divergentes = cursor.fetchone()[0]
+            
+            for comando in RECALCULAR_AVALIACOES:
+                cursor.execute(comando)
+            conexao.commit()
+        except Exception:
+            conexao.rollback()
+            raise
+        finally:
+            conexao.close()
         
-        conexao.commit()
-        conexao.close()
+        self.invalidar_tudo()
+        return divergentes
     
+    @em_cache('categorias')
     def obter_categorias(self) -> List[str]:
         """Obtém todas as categorias de produtos."""
-        conexao = self.obter_conexao()
-        cursor = conexao.cursor()
-        
-        cursor.execute('SELECT DISTINCT categoria FROM produtos ORDER BY categoria')
-        linhas = cursor.fetchall()
-        conexao.close()
+        conexao = self.obter_conexao_leitura()
+        try:
+            linhas = conexao.execute('SELECT DISTINCT categoria FROM produtos ORDER BY categoria').fetchall()
+        finally:
+            conexao.close()
         
         return [linha['categoria'] for linha in linhas]
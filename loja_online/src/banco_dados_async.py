@@ -0,0 +1,160 @@
+"""
+API assíncrona do BancoDados para uso com asyncio.
+
+BancoDadosAsync expõe os mesmos métodos públicos do BancoDados como
+corrotinas (e os iterar_* como geradores assíncronos). Cada chamada roda
+num ThreadPoolExecutor de max_concorrencia threads; as que passarem disso
+esperam na fila do executor. Cada iteração de um iterar_* roda numa thread
+própria, do primeiro lote ao último.
+
+O ganho é não bloquear o event loop: com o BancoDados síncrono, nenhuma
+outra corrotina anda durante uma consulta. Não espere mais consultas por
+segundo que o síncrono em leituras curtas (décimos de milissegundo, dados em
+cache): a ida e volta ao executor custa mais que a consulta. Só há
+paralelismo real com várias CPUs e consultas longas ou esperando disco, em
+que o sqlite3 libera o GIL (ver benchmarks/async_banco.py).
+
+Cancelamento: cada método do BancoDados faz sua transação inteira numa
+única thread. Se a corrotina for cancelada antes de a chamada começar, ela
+não roda; se já começou, termina na thread (commit ou rollback) e só o
+resultado é descartado. Nenhuma transação fica aberta pela metade.
+"""
+
+import asyncio
+import functools
+import inspect
+import itertools
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterable, Optional, TypeVar
+
+from src.banco_dados import BancoDados, TAMANHO_LOTE
+
+T = TypeVar('T')
+
+# Métodos do BancoDados que não viram corrotinas
+_NAO_EXPOSTOS = {'obter_conexao', 'obter_conexao_leitura', 'criar_tabelas', 'registrar_ouvinte_escrita',
+                 'metricas_pool', 'fechar_pools', 'invalidar_cache', 'invalidar_tudo', 'inserir_avaliacao',
+                 'validar_avaliacao'}
+
+
+class BancoDadosAsync:
+    """Versão assíncrona do BancoDados."""
+
+    def __init__(self, caminho_db: str = "dados/loja.db", max_concorrencia: int = 8,
+                 db: Optional[BancoDados] = None, **opcoes):
+        """
+        max_concorrencia é o número de threads do executor e o de chamadas
+        em andamento. Sem db, cria um BancoDados com pool de conexões desse
+        tamanho; opcoes (cache, pragmas, instrumentacao) vão para ele.
+        """
+        if max_concorrencia < 1:
+            raise ValueError("max_concorrencia deve ser pelo menos 1")
+        self.db = db if db is not None else BancoDados(
+            caminho_db, usar_pool=True, tamanho_pool=max_concorrencia, **opcoes)
+        self.max_concorrencia = max_concorrencia
+        self._executor = ThreadPoolExecutor(max_workers=max_concorrencia,
+                                            thread_name_prefix='banco-dados-async')
+
+    async def executar(self, funcao: Callable[..., T], *args, **kwargs) -> T:
+        """Roda funcao(*args, **kwargs) numa thread do executor."""
+        # Cancelar a corrotina cancela o Future do executor, o que só tem
+        # efeito se a chamada ainda estiver na fila
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, functools.partial(funcao, *args, **kwargs))
+
+    async def executar_em_transacao(self, funcao: Callable[[sqlite3.Connection], T],
+                                    marcadores: Optional[Iterable[str]] = None) -> T:
+        """Roda funcao(conexao) numa transação (BEGIN IMMEDIATE) numa thread.
+
+        Commit se funcao retornar, rollback se levantar exceção; um
+        cancelamento durante a execução não interrompe a transação.
+
+        funcao deve usar só a conexao recebida: ela é a conexão de escrita
+        do pool, então um método de escrita do BancoDados chamado dentro de
+        funcao espera por ela até o tempo limite do pool. Depois do commit,
+        o cache e os ouvintes de escrita recebem marcadores (src/cache.py);
+        sem marcadores, tudo é invalidado.
+        """
+        def em_transacao():
+            conexao = self.db.obter_conexao()
+            try:
+                conexao.execute('BEGIN IMMEDIATE')
+                try:
+                    resultado = funcao(conexao)
+                except BaseException:
+                    conexao.rollback()
+                    raise
+                conexao.commit()
+            finally:
+                conexao.close()
+
+            if marcadores is None:
+                self.db.invalidar_tudo()
+            else:
+                marcadores_alterados = tuple(marcadores)
+                if marcadores_alterados:
+                    self.db.invalidar_cache(*marcadores_alterados)
+            return resultado
+
+        return await self.executar(em_transacao)
+
+    async def _iterar(self, gerador_sincrono: Callable[[], object], tamanho_lote: int) -> AsyncIterator:
+        # O gerador usa a mesma conexão do primeiro ao último lote, e sem pool
+        # a conexão só funciona na thread que a abriu: a iteração inteira roda
+        # numa thread só dela
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='banco-dados-async-iterar')
+        loop = asyncio.get_running_loop()
+        try:
+            gerador = await loop.run_in_executor(executor, gerador_sincrono)
+            try:
+                while True:
+                    lote = await loop.run_in_executor(
+                        executor, lambda: list(itertools.islice(gerador, tamanho_lote)))
+                    if not lote:
+                        return
+                    for item in lote:
+                        yield item
+            finally:
+                # Fecha o gerador (e devolve a conexão) na mesma thread
+                await asyncio.shield(loop.run_in_executor(executor, gerador.close))
+        finally:
+            executor.shutdown(wait=False)
+
+    def metricas_pool(self) -> dict:
+        return self.db.metricas_pool()
+
+    async def fechar(self):
+        """Espera as chamadas em andamento e encerra o executor."""
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown, True)
+
+    async def __aenter__(self) -> 'BancoDadosAsync':
+        return self
+
+    async def __aexit__(self, tipo, valor, rastreio):
+        await self.fechar()
+
+
+def _corrotina(nome: str, metodo: Callable):
+    @functools.wraps(metodo)
+    async def chamar(self, *args, **kwargs):
+        return await self.executar(getattr(self.db, nome), *args, **kwargs)
+    return chamar
+
+
+def _gerador_assincrono(nome: str, metodo: Callable):
+    @functools.wraps(metodo)
+    def iterar(self, *args, tamanho_lote: int = TAMANHO_LOTE, **kwargs):
+        # Cada ida ao executor traz tamanho_lote itens do gerador síncrono
+        return self._iterar(lambda: getattr(self.db, nome)(*args, tamanho_lote=tamanho_lote, **kwargs),
+                            tamanho_lote)
+    return iterar
+
+
+for _nome, _metodo in inspect.getmembers(BancoDados, inspect.isfunction):
+    if _nome.startswith('_') or _nome in _NAO_EXPOSTOS:
+        continue
+    if inspect.isgeneratorfunction(_metodo):
+        setattr(BancoDadosAsync, _nome, _gerador_assincrono(_nome, _metodo))
+    else:
+        setattr(BancoDadosAsync, _nome, _corrotina(_nome, _metodo))
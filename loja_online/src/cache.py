@@ -0,0 +1,200 @@
+"""
+Cache em memória das consultas de catálogo do BancoDados.
+
+Cada entrada tem um tempo de vida (TTL) pelo tipo de consulta e marcadores
+que indicam quais dados ela contém; as escritas do BancoDados invalidam só
+as entradas com os marcadores afetados. Quando a soma dos itens guardados
+passa da capacidade, as entradas menos usadas recentemente saem primeiro.
+"""
+
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, Optional, Set
+
+from src.modelo import Produto, PaginaProdutos
+
+
+# Tempo de vida, em segundos, por tipo de consulta. Como o estoque aparece
+# em produtos e listas, o TTL deles é o limite de defasagem do estoque
+# alterado por outros processos.
+TTL_PADRAO = {
+    'produto': 5.0,
+    'lista': 5.0,
+    'categorias': 60.0,
+}
+
+MARCADOR_LISTAS = 'listas'
+MARCADOR_CATEGORIAS = 'categorias'
+
+
+def marcador_produto(produto_id: int) -> str:
+    return f'produto:{produto_id}'
+
+
+def produto_do_marcador(marcador: str) -> Optional[int]:
+    """ID do produto de um marcador criado por marcador_produto (ou None)."""
+    if marcador.startswith('produto:'):
+        return int(marcador[len('produto:'):])
+    return None
+
+
+def _marcadores(valor, tipo: str) -> Set[str]:
+    """Marcadores de invalidação de um resultado de consulta.
+
+    Listas e páginas levam MARCADOR_LISTAS além dos produtos que contêm: um
+    produto que passa a atender um filtro (estoque reposto, nova nota) não
+    está na entrada, então as escritas que podem fazer isso invalidam
+    MARCADOR_LISTAS.
+    """
+    if tipo == 'categorias':
+        return {MARCADOR_CATEGORIAS}
+    if isinstance(valor, Produto):
+        return {marcador_produto(valor.id)}
+    if isinstance(valor, PaginaProdutos):
+        valor = valor.produtos
+    if isinstance(valor, list):
+        return {MARCADOR_LISTAS} | {marcador_produto(produto.id) for produto in valor}
+    return set()
+
+
+def _peso(valor) -> int:
+    if isinstance(valor, PaginaProdutos):
+        return max(1, len(valor.produtos))
+    if isinstance(valor, list):
+        return max(1, len(valor))
+    return 1
+
+
+class _Entrada:
+    __slots__ = ('valor', 'expira_em', 'marcadores', 'peso')
+
+    def __init__(self, valor, expira_em: float, marcadores: Set[str], peso: int):
+        self.valor = valor
+        self.expira_em = expira_em
+        self.marcadores = marcadores
+        self.peso = peso
+
+
+class CacheCatalogo:
+    """Cache LRU com TTL por tipo de consulta e invalidação por marcadores."""
+
+    def __init__(self, capacidade: int = 50000, ttls: Optional[Dict[str, float]] = None,
+                 relogio: Callable[[], float] = time.monotonic):
+        """
+        capacidade é o total de itens guardados: um produto conta 1 e uma
+        lista conta o número de elementos.
+        """
+        self.capacidade = capacidade
+        self.ttls = dict(TTL_PADRAO)
+        self.ttls.update(ttls or {})
+        self._relogio = relogio
+        self._entradas: 'OrderedDict[Hashable, _Entrada]' = OrderedDict()
+        self._por_marcador: Dict[str, Set[Hashable]] = {}
+        self._itens = 0
+        self._geracao = 0
+        self._trava = threading.Lock()
+
+        # Estatísticas
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+        self.expiracoes = 0
+        self.invalidacoes = 0
+
+    def _descartar(self, chave: Hashable):
+        entrada = self._entradas.pop(chave)
+        self._itens -= entrada.peso
+        for marcador in entrada.marcadores:
+            chaves = self._por_marcador.get(marcador)
+            if chaves is not None:
+                chaves.discard(chave)
+                if not chaves:
+                    del self._por_marcador[marcador]
+
+    def obter_ou_calcular(self, chave: Hashable, tipo: str, calcular: Callable[[], object]):
+        """Retorna o valor em cache ou calcula, guarda e retorna.
+
+        Os objetos retornados são compartilhados entre chamadas e não devem
+        ser alterados.
+        """
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                if entrada.expira_em > self._relogio():
+                    self._entradas.move_to_end(chave)
+                    self.acertos += 1
+                    return entrada.valor
+                self._descartar(chave)
+                self.expiracoes += 1
+            self.falhas += 1
+            geracao = self._geracao
+
+        valor = calcular()
+
+        with self._trava:
+            # Uma invalidação durante o cálculo pode ter tornado o valor antigo;
+            # "não encontrado" não é guardado porque nenhuma escrita o invalidaria
+            if valor is None or geracao != self._geracao or chave in self._entradas:
+                return valor
+
+            entrada = _Entrada(valor, self._relogio() + self.ttls[tipo], _marcadores(valor, tipo), _peso(valor))
+            if entrada.peso > self.capacidade:
+                return valor
+
+            self._entradas[chave] = entrada
+            self._itens += entrada.peso
+            for marcador in entrada.marcadores:
+                self._por_marcador.setdefault(marcador, set()).add(chave)
+
+            while self._itens > self.capacidade:
+                self._descartar(next(iter(self._entradas)))
+                self.remocoes += 1
+
+        return valor
+
+    def invalidar(self, marcadores: Iterable[str]):
+        """Remove todas as entradas que contêm algum dos marcadores."""
+        with self._trava:
+            self._geracao += 1
+            for marcador in marcadores:
+                for chave in list(self._por_marcador.get(marcador, ())):
+                    self._descartar(chave)
+                    self.invalidacoes += 1
+
+    def limpar(self):
+        """Remove todas as entradas."""
+        with self._trava:
+            self._geracao += 1
+            self._entradas.clear()
+            self._por_marcador.clear()
+            self._itens = 0
+
+    def estatisticas(self) -> dict:
+        """Retorna acertos, falhas, remoções por LRU, expirações e invalidações."""
+        with self._trava:
+            consultas = self.acertos + self.falhas
+            return {
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'taxa_acertos': self.acertos / consultas if consultas else 0.0,
+                'remocoes': self.remocoes,
+                'expiracoes': self.expiracoes,
+                'invalidacoes': self.invalidacoes,
+                'entradas': len(self._entradas),
+                'itens': self._itens,
+            }
+
+
+def em_cache(tipo: str):
+    """Decora um método de leitura do BancoDados para usar self.cache."""
+    def decorador(metodo):
+        @functools.wraps(metodo)
+        def envoltorio(self, *args, **kwargs):
+            if self.cache is None:
+                return metodo(self, *args, **kwargs)
+            chave = (metodo.__name__, args, tuple(sorted(kwargs.items())))
+            return self.cache.obter_ou_calcular(chave, tipo, lambda: metodo(self, *args, **kwargs))
+        return envoltorio
+    return decorador
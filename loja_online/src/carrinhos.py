@@ -0,0 +1,331 @@
+"""
+Carrinhos guardados no banco, compartilhados entre os processos do app.
+
+Cada carrinho é identificado por uma chave (chave_usuario para quem fez
+login, chave_visitante para quem não fez) e cada item é uma linha de
+itens_carrinho (chave, produto_id, quantidade, preco_unitario). A tabela
+carrinhos guarda só a última alteração de cada carrinho, para a expiração.
+
+As alterações não sobrescrevem o carrinho: são operações (somar uma
+quantidade, remover um item, esvaziar) que ficam pendentes na memória e uma
+thread as aplica em lote, em ordem, numa só transação, a cada
+intervalo_gravacao segundos. Somar vira INSERT ... ON CONFLICT DO UPDATE SET
+quantidade = quantidade + ?, então dois processos que alteram o mesmo
+carrinho somam as quantidades em vez de um apagar o que o outro gravou.
+
+Leituras enxergam as pendentes do próprio processo; o que vem do banco fica
+num cache LRU pequeno por ttl_leitura segundos, então a defasagem entre
+processos é de no máximo intervalo_gravacao + ttl_leitura. Esse cache só
+serve para exibir o carrinho: nenhuma alteração parte dele. Carrinhos sem
+alteração há mais de validade segundos são apagados por expirar().
+"""
+
+import atexit
+import itertools
+import logging
+import operator
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from src.banco_dados import BancoDados
+
+logger = logging.getLogger("loja.carrinhos")
+
+VALIDADE_PADRAO = 30 * 24 * 3600  # segundos
+
+# Carrinho em memória: {produto_id: {'quantidade': int, 'preco_unitario': float}}
+Itens = Dict[int, dict]
+
+# Operações pendentes: (SOMAR, chave, produto_id, quantidade, preco_unitario),
+# (REMOVER, chave, produto_id) e (ESVAZIAR, chave)
+SOMAR, REMOVER, ESVAZIAR = 'somar', 'remover', 'esvaziar'
+
+
+def chave_usuario(usuario_id: int) -> str:
+    return f'u:{usuario_id}'
+
+
+def chave_visitante(token: str) -> str:
+    return f's:{token}'
+
+
+def _aplicar(itens: Itens, operacao: tuple):
+    """Aplica uma operação pendente ao carrinho em memória, como o banco fará."""
+    if operacao[0] == SOMAR:
+        _tipo, _chave, produto_id, quantidade, preco = operacao
+        if produto_id in itens:
+            itens[produto_id]['quantidade'] += quantidade
+        else:
+            itens[produto_id] = {'quantidade': quantidade, 'preco_unitario': preco}
+    elif operacao[0] == REMOVER:
+        itens.pop(operacao[2], None)
+    else:
+        itens.clear()
+
+
+def _descartar_vencidos(cursor: sqlite3.Cursor, chaves: Iterable[str], limite: int):
+    # Um carrinho vencido que expirar() ainda não apagou recomeça vazio
+    vencidos = [(chave,) for chave in chaves if cursor.execute(
+        'SELECT 1 FROM carrinhos WHERE chave = ? AND atualizado_em < ?', (chave, limite)).fetchone()]
+    cursor.executemany('DELETE FROM itens_carrinho WHERE chave = ?', vencidos)
+    cursor.executemany('DELETE FROM carrinhos WHERE chave = ?', vencidos)
+
+
+def _marcar_alterados(cursor: sqlite3.Cursor, chaves: Iterable[str], agora: int):
+    cursor.executemany('''
+        INSERT INTO carrinhos (chave, atualizado_em) VALUES (?, ?)
+        ON CONFLICT (chave) DO UPDATE SET atualizado_em = excluded.atualizado_em
+    ''', [(chave, agora) for chave in chaves])
+
+
+class ArmazemCarrinhos:
+    """Carrinhos persistentes com gravação em lote e expiração."""
+
+    def __init__(self, db: BancoDados, validade: float = VALIDADE_PADRAO,
+                 intervalo_gravacao: float = 1.0, ttl_leitura: float = 2.0,
+                 capacidade_cache: int = 10000, intervalo_expiracao: float = 3600.0):
+        self.db = db
+        self.validade = validade
+        self.intervalo_gravacao = intervalo_gravacao
+        self.ttl_leitura = ttl_leitura
+        self.capacidade_cache = capacidade_cache
+        self.intervalo_expiracao = intervalo_expiracao
+
+        self._trava = threading.Lock()
+        self._pendentes: List[tuple] = []  # Operações ainda não gravadas, em ordem
+        self._lidos: 'OrderedDict[str, tuple]' = OrderedDict()  # chave -> (itens no banco, lido_em)
+        # Ímpar durante um commit (ver _confirmar): uma leitura do banco feita
+        # nesse meio-tempo pode ou não incluir as operações ainda pendentes
+        self._geracao = 0
+        self._confirmado = threading.Condition(self._trava)
+        # Uma gravação por vez: as operações saem de _pendentes só depois do commit
+        self._trava_gravacao = threading.Lock()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._ultima_expiracao = time.monotonic()
+
+        # Métricas
+        self.gravacoes = 0
+        self.lotes = 0
+
+    # ===== LEITURA E ESCRITA =====
+
+    def obter(self, chave: str) -> Itens:
+        """Itens do carrinho (uma cópia), já com as alterações pendentes."""
+        while True:
+            with self._trava:
+                while self._geracao % 2:
+                    self._confirmado.wait()
+                geracao = self._geracao
+                lido = self._lidos.get(chave)
+                if lido is not None and time.monotonic() - lido[1] < self.ttl_leitura:
+                    self._lidos.move_to_end(chave)
+                    return self._com_pendentes(chave, lido[0])
+
+            itens = self._ler(chave)
+            with self._trava:
+                if self._geracao == geracao:  # Nenhum commit durante a leitura
+                    self._guardar_lido(chave, itens)
+                    return self._com_pendentes(chave, itens)
+
+    def adicionar(self, chave: str, produto_id: int, quantidade: int, preco_unitario: float):
+        """Soma quantidade ao item (o preço só vale para um item novo)."""
+        self._agendar((SOMAR, chave, produto_id, quantidade, preco_unitario))
+
+    def remover(self, chave: str, produto_id: int):
+        self._agendar((REMOVER, chave, produto_id))
+
+    def esvaziar(self, chave: str):
+        self._agendar((ESVAZIAR, chave))
+
+    def mesclar(self, origem: str, destino: str):
+        """Soma o carrinho origem ao destino e apaga a origem (ex.: ao fazer login).
+
+        Grava na hora, junto com o que estiver pendente, e soma no banco: os
+        itens que outro processo gravou em qualquer dos dois entram na conta.
+        """
+        with self._trava_gravacao:
+            self._gravar_pendentes()
+            agora = int(time.time())
+            conexao = self.db.obter_conexao()
+            try:
+                cursor = conexao.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+                _descartar_vencidos(cursor, (origem, destino), int(agora - self.validade))
+                cursor.execute('''
+                    INSERT INTO itens_carrinho (chave, produto_id, quantidade, preco_unitario)
+                    SELECT ?, produto_id, quantidade, preco_unitario FROM itens_carrinho WHERE chave = ?
+                    ON CONFLICT (chave, produto_id) DO UPDATE SET quantidade = quantidade + excluded.quantidade
+                ''', (destino, origem))
+                if cursor.rowcount > 0:
+                    _marcar_alterados(cursor, (destino,), agora)
+                cursor.execute('DELETE FROM itens_carrinho WHERE chave = ?', (origem,))
+                cursor.execute('DELETE FROM carrinhos WHERE chave = ?', (origem,))
+                self._confirmar(conexao, (origem, destino))
+            except Exception:
+                conexao.rollback()
+                raise
+            finally:
+                conexao.close()
+
+    def _ler(self, chave: str) -> Itens:
+        conexao = self.db.obter_conexao_leitura()
+        try:
+            cursor = conexao.cursor()
+            cursor.row_factory = None
+            cursor.execute('''
+                SELECT i.produto_id, i.quantidade, i.preco_unitario
+                FROM carrinhos c JOIN itens_carrinho i ON i.chave = c.chave
+                WHERE c.chave = ? AND c.atualizado_em >= ?
+            ''', (chave, int(time.time() - self.validade)))
+            linhas = cursor.fetchall()
+        finally:
+            conexao.close()
+        return {produto_id: {'quantidade': quantidade, 'preco_unitario': preco}
+                for produto_id, quantidade, preco in linhas}
+
+    def _agendar(self, operacao: tuple):
+        with self._trava:
+            self._pendentes.append(operacao)
+        self._iniciar_thread()
+
+    def _com_pendentes(self, chave: str, itens: Itens) -> Itens:
+        # Chamado com _trava
+        itens = {produto_id: dict(item) for produto_id, item in itens.items()}
+        for operacao in self._pendentes:
+            if operacao[1] == chave:
+                _aplicar(itens, operacao)
+        return itens
+
+    def _guardar_lido(self, chave: str, itens: Itens):
+        self._lidos[chave] = (itens, time.monotonic())
+        self._lidos.move_to_end(chave)
+        while len(self._lidos) > self.capacidade_cache:
+            self._lidos.popitem(last=False)
+
+    # ===== GRAVAÇÃO EM LOTE E EXPIRAÇÃO =====
+
+    def descarregar(self) -> int:
+        """Grava agora as alterações pendentes; retorna quantas operações."""
+        with self._trava_gravacao:
+            return self._gravar_pendentes()
+
+    def _gravar_pendentes(self) -> int:
+        # Chamado com _trava_gravacao
+        with self._trava:
+            operacoes = list(self._pendentes)
+        if not operacoes:
+            return 0
+
+        agora = int(time.time())
+        ultima = {operacao[1]: operacao[0] for operacao in operacoes}  # chave -> última operação
+        conexao = self.db.obter_conexao()
+        try:
+            cursor = conexao.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            _descartar_vencidos(cursor, ultima, int(agora - self.validade))
+            # Operações seguidas do mesmo tipo vão num executemany só
+            for tipo, grupo in itertools.groupby(operacoes, key=operator.itemgetter(0)):
+                if tipo == SOMAR:
+                    cursor.executemany('''
+                        INSERT INTO itens_carrinho (chave, produto_id, quantidade, preco_unitario)
+                        VALUES (?, ?, ?, ?)
+                        ON CONFLICT (chave, produto_id) DO UPDATE SET quantidade = quantidade + excluded.quantidade
+                    ''', [operacao[1:] for operacao in grupo])
+                elif tipo == REMOVER:
+                    cursor.executemany('DELETE FROM itens_carrinho WHERE chave = ? AND produto_id = ?',
+                                       [operacao[1:] for operacao in grupo])
+                else:
+                    chaves = [operacao[1:] for operacao in grupo]
+                    cursor.executemany('DELETE FROM itens_carrinho WHERE chave = ?', chaves)
+                    cursor.executemany('DELETE FROM carrinhos WHERE chave = ?', chaves)
+            _marcar_alterados(cursor, [chave for chave, tipo in ultima.items() if tipo != ESVAZIAR], agora)
+            self._confirmar(conexao, ultima, len(operacoes))
+        except Exception:
+            # As operações continuam pendentes e voltam no próximo ciclo
+            conexao.rollback()
+            raise
+        finally:
+            conexao.close()
+
+        with self._trava:
+            self.gravacoes += len(operacoes)
+            self.lotes += 1
+        return len(operacoes)
+
+    def _confirmar(self, conexao: sqlite3.Connection, chaves: Iterable[str], gravadas: int = 0):
+        """Commit e retirada das operações gravadas, vistos juntos por obter()."""
+        with self._trava:
+            self._geracao += 1
+        confirmado = False
+        try:
+            conexao.commit()
+            confirmado = True
+        finally:
+            with self._trava:
+                if confirmado:
+                    del self._pendentes[:gravadas]
+                    for chave in chaves:
+                        self._lidos.pop(chave, None)
+                self._geracao += 1
+                self._confirmado.notify_all()
+
+    def expirar(self, agora: Optional[float] = None) -> int:
+        """Apaga os carrinhos abandonados; retorna quantos."""
+        limite = int((agora if agora is not None else time.time()) - self.validade)
+        conexao = self.db.obter_conexao()
+        try:
+            cursor = conexao.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('DELETE FROM itens_carrinho WHERE chave IN '
+                           '(SELECT chave FROM carrinhos WHERE atualizado_em < ?)', (limite,))
+            cursor.execute('DELETE FROM carrinhos WHERE atualizado_em < ?', (limite,))
+            apagados = cursor.rowcount
+            conexao.commit()
+        except Exception:
+            conexao.rollback()
+            raise
+        finally:
+            conexao.close()
+        return apagados
+
+    def _iniciar_thread(self):
+        if self._thread is not None:
+            return
+        with self._trava:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._gravar_periodicamente,
+                                            name='gravacao-carrinhos', daemon=True)
+            self._thread.start()
+            atexit.register(self.fechar)
+
+    def _gravar_periodicamente(self):
+        while not self._parar.wait(self.intervalo_gravacao):
+            try:
+                self.descarregar()
+                if time.monotonic() - self._ultima_expiracao > self.intervalo_expiracao:
+                    self._ultima_expiracao = time.monotonic()
+                    self.expirar()
+            except Exception:
+                logger.exception("Falha ao gravar carrinhos; nova tentativa no próximo ciclo")
+
+    def fechar(self):
+        """Para a thread e grava o que estiver pendente."""
+        self._parar.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self.descarregar()
+
+    def metricas(self) -> dict:
+        with self._trava:
+            return {
+                'pendentes': len(self._pendentes),
+                'em_cache': len(self._lidos),
+                'gravacoes': self.gravacoes,
+                'lotes': self.lotes,
+                'por_lote': self.gravacoes / self.lotes if self.lotes else 0.0,
+            }
@@ -0,0 +1,304 @@
+"""
+Retrato colunar do catálogo em arrays NumPy, para filtrar e ordenar sem SQL.
+
+CatalogoVetorizado guarda id, preço, estoque, avaliação e código da
+categoria de todos os produtos. Os filtros viram máscaras booleanas e cada
+ordenação é uma permutação pré-calculada: uma consulta é percorrer a
+máscara na ordem da permutação e pegar a página, sem ordenar nada.
+
+Escritas feitas pelo BancoDados chegam por registrar_ouvinte_escrita e são
+aplicadas produto a produto antes da próxima consulta. Escritas de outros
+processos (API, importação, outros servidores do app) aparecem após
+recarregar() ou, com idade_maxima, na primeira consulta depois que o retrato
+passa dessa idade: o PRAGMA data_version diz se o banco mudou e só então o
+catálogo é relido.
+
+NumPy é opcional: sem ele, numpy_disponivel() retorna False e a loja usa
+BancoDados.consultar_produtos.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import quote
+from typing import Dict, Iterable, List, Optional, Set
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depende do ambiente
+    np = None
+
+from src.banco_dados import BancoDados, ORDENACOES_PRODUTOS
+from src.cache import produto_do_marcador
+from src.modelo import PaginaProdutos
+
+# Array e direção de cada ordenação de ORDENACOES_PRODUTOS (menos relevância)
+_ORDENACOES = {
+    'nome': ('nomes', False),
+    'preco': ('precos', False),
+    'preco_desc': ('precos', True),
+    'avaliacao': ('avaliacoes', True),
+    'recentes': ('ids', True),
+}
+
+_COLUNAS = 'id, preco, estoque, avaliacao_media, categoria, nome'
+
+
+def numpy_disponivel() -> bool:
+    return np is not None
+
+
+class CatalogoVetorizado:
+    """Filtros e ordenações do catálogo em arrays NumPy."""
+
+    def __init__(self, db: BancoDados, idade_maxima: Optional[float] = None):
+        """
+        idade_maxima (segundos): com o retrato mais antigo que isso, confere
+        se o banco mudou (escritas de outros processos) e, se mudou, relê
+        tudo. None desativa.
+        """
+        if np is None:
+            raise ImportError("CatalogoVetorizado precisa do NumPy (pip install numpy)")
+        self.db = db
+        self.idade_maxima = idade_maxima
+        self._trava = threading.Lock()
+        self._pendentes: Set[int] = set()
+        self._recarregar_tudo = True
+        self._carregado_em = 0.0
+        self._conexao_versao: Optional[sqlite3.Connection] = None
+        self._versao: Optional[int] = None
+        self._ordens: Dict[str, 'np.ndarray'] = {}
+        db.registrar_ouvinte_escrita(self._ao_escrever)
+
+    # ===== MANUTENÇÃO DO RETRATO =====
+
+    def _ao_escrever(self, marcadores: Optional[Iterable[str]]):
+        with self._trava:
+            if marcadores is None:
+                self._recarregar_tudo = True
+                return
+            for marcador in marcadores:
+                produto_id = produto_do_marcador(marcador)
+                if produto_id is not None:
+                    self._pendentes.add(produto_id)
+
+    def recarregar(self):
+        """Descarta o retrato; a próxima consulta relê o catálogo inteiro."""
+        with self._trava:
+            self._recarregar_tudo = True
+
+    def _versao_dados(self) -> int:
+        """PRAGMA data_version de uma conexão só do catálogo.
+
+        O valor muda quando outra conexão (deste ou de outro processo) faz
+        commit, então comparar duas leituras diz se o banco mudou.
+        """
+        if self._conexao_versao is None:
+            uri = f"file:{quote(os.path.abspath(self.db.caminho_db))}?mode=ro"
+            self._conexao_versao = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        return self._conexao_versao.execute('PRAGMA data_version').fetchone()[0]
+
+    def _carregar(self):
+        # Lida antes do SELECT: um commit no meio vale como mudança na próxima conferência
+        self._versao = self._versao_dados() if self.idade_maxima is not None else None
+        conexao = self.db.obter_conexao_leitura()
+        try:
+            cursor = conexao.cursor()
+            cursor.row_factory = None
+            cursor.execute(f'SELECT {_COLUNAS} FROM produtos ORDER BY id')
+            linhas = cursor.fetchall()
+        finally:
+            conexao.close()
+
+        self.ids = np.array([linha[0] for linha in linhas], dtype=np.int64)
+        self.precos = np.array([linha[1] for linha in linhas], dtype=np.float64)
+        self.estoques = np.array([linha[2] for linha in linhas], dtype=np.int64)
+        self.avaliacoes = np.array([linha[3] or 0.0 for linha in linhas], dtype=np.float64)
+        self.nomes = np.array([linha[5] for linha in linhas], dtype=object)
+        self.nomes_categorias: List[str] = []
+        self._codigo_categoria: Dict[str, int] = {}
+        self.categorias = np.array([self._codificar(linha[4]) for linha in linhas], dtype=np.int32)
+
+        self._ordens.clear()
+        self._pendentes.clear()
+        self._recarregar_tudo = False
+        self._carregado_em = time.monotonic()
+
+    def _codificar(self, categoria: str) -> int:
+        codigo = self._codigo_categoria.get(categoria)
+        if codigo is None:
+            codigo = self._codigo_categoria[categoria] = len(self.nomes_categorias)
+            self.nomes_categorias.append(categoria)
+        return codigo
+
+    def _aplicar_pendentes(self):
+        """Relê só os produtos alterados desde a última consulta."""
+        ids = sorted(self._pendentes)
+        marcadores = ', '.join('?' * len(ids))
+        conexao = self.db.obter_conexao_leitura()
+        try:
+            cursor = conexao.cursor()
+            cursor.row_factory = None
+            cursor.execute(f'SELECT {_COLUNAS} FROM produtos WHERE id IN ({marcadores})', ids)
+            atuais = {linha[0]: linha for linha in cursor.fetchall()}
+        finally:
+            conexao.close()
+        self._pendentes.clear()
+
+        alteradas: Set[str] = set()  # arrays com valores alterados
+        novas = []
+        removidas = []
+        for produto_id in ids:
+            posicao = int(np.searchsorted(self.ids, produto_id))
+            existe = posicao < len(self.ids) and self.ids[posicao] == produto_id
+            linha = atuais.get(produto_id)
+            if linha is None:
+                if existe:
+                    removidas.append(posicao)
+                continue
+            if not existe:
+                novas.append(linha)
+                continue
+
+            _id, preco, estoque, avaliacao, categoria, nome = linha
+            if self.precos[posicao] != preco:
+                self.precos[posicao] = preco
+                alteradas.add('precos')
+            if self.avaliacoes[posicao] != (avaliacao or 0.0):
+                self.avaliacoes[posicao] = avaliacao or 0.0
+                alteradas.add('avaliacoes')
+            if self.nomes[posicao] != nome:
+                self.nomes[posicao] = nome
+                alteradas.add('nomes')
+            self.estoques[posicao] = estoque
+            self.categorias[posicao] = self._codificar(categoria)
+
+        if removidas or novas:
+            self._remover_e_inserir(removidas, novas)
+            self._ordens.clear()
+        else:
+            for ordenacao, (coluna, _decrescente) in _ORDENACOES.items():
+                if coluna in alteradas:
+                    self._ordens.pop(ordenacao, None)
+
+    def _remover_e_inserir(self, removidas: List[int], novas: List[tuple]):
+        if removidas:
+            for nome in ('ids', 'precos', 'estoques', 'avaliacoes', 'nomes', 'categorias'):
+                setattr(self, nome, np.delete(getattr(self, nome), removidas))
+        if novas:
+            posicoes = np.searchsorted(self.ids, [linha[0] for linha in novas])
+            self.ids = np.insert(self.ids, posicoes, [linha[0] for linha in novas])
+            self.precos = np.insert(self.precos, posicoes, [linha[1] for linha in novas])
+            self.estoques = np.insert(self.estoques, posicoes, [linha[2] for linha in novas])
+            self.avaliacoes = np.insert(self.avaliacoes, posicoes, [linha[3] or 0.0 for linha in novas])
+            self.categorias = np.insert(self.categorias, posicoes,
+                                        [self._codificar(linha[4]) for linha in novas])
+            nomes = np.empty(len(novas), dtype=object)
+            nomes[:] = [linha[5] for linha in novas]
+            self.nomes = np.insert(self.nomes, posicoes, nomes)
+
+    def _atualizar(self):
+        if (not self._recarregar_tudo and self.idade_maxima is not None
+                and time.monotonic() - self._carregado_em > self.idade_maxima):
+            # As escritas deste processo também mudam a versão: no pior caso
+            # relê o catálogo uma vez por idade_maxima
+            if self._versao_dados() == self._versao:
+                self._carregado_em = time.monotonic()
+            else:
+                self._recarregar_tudo = True
+        if self._recarregar_tudo:
+            self._carregar()
+        elif self._pendentes:
+            self._aplicar_pendentes()
+
+    def _ordem(self, ordenar_por: str) -> 'np.ndarray':
+        """Permutação das posições na ordem pedida, desempatando pelo id como no SQL."""
+        ordem = self._ordens.get(ordenar_por)
+        if ordem is None:
+            coluna, decrescente = _ORDENACOES[ordenar_por]
+            # As posições estão em ordem de id: a ordenação estável desempata
+            # pelo id crescente, e invertê-la dá valor e id decrescentes
+            ordem = np.argsort(getattr(self, coluna), kind='stable')
+            if decrescente:
+                ordem = ordem[::-1]
+            self._ordens[ordenar_por] = ordem
+        return ordem
+
+    def _mascara(self, preco_min, preco_max, categoria, somente_em_estoque, avaliacao_minima):
+        """Máscara booleana dos filtros (None quando não há filtro)."""
+        condicoes = []
+        if preco_min is not None:
+            condicoes.append(self.precos >= preco_min)
+        if preco_max is not None:
+            condicoes.append(self.precos <= preco_max)
+        if categoria is not None:
+            codigo = self._codigo_categoria.get(categoria, -1)
+            condicoes.append(self.categorias == codigo)
+        if somente_em_estoque:
+            condicoes.append(self.estoques > 0)
+        if avaliacao_minima is not None:
+            condicoes.append(self.avaliacoes >= avaliacao_minima)
+
+        if not condicoes:
+            return None
+        mascara = condicoes[0]
+        for condicao in condicoes[1:]:
+            mascara &= condicao
+        return mascara
+
+    # ===== CONSULTA =====
+
+    def consultar_produtos(self, preco_min: Optional[float] = None,
+                           preco_max: Optional[float] = None,
+                           categoria: Optional[str] = None,
+                           somente_em_estoque: bool = False,
+                           avaliacao_minima: Optional[float] = None,
+                           ordenar_por: str = 'nome',
+                           cursor: Optional[str] = None,
+                           limite: int = 24) -> PaginaProdutos:
+        """Mesmos filtros e ordenações de BancoDados.consultar_produtos (sem busca).
+
+        O cursor aqui é a posição do primeiro item da página.
+        """
+        ids = self.consultar_ids(preco_min, preco_max, categoria, somente_em_estoque,
+                                 avaliacao_minima, ordenar_por, int(cursor or 0), limite + 1)
+        proximo_cursor = str(int(cursor or 0) + limite) if len(ids) > limite else None
+        produtos = self.db.obter_produtos_por_ids(ids[:limite].tolist())
+        return PaginaProdutos(produtos, proximo_cursor)
+
+    def consultar_ids(self, preco_min: Optional[float] = None,
+                      preco_max: Optional[float] = None,
+                      categoria: Optional[str] = None,
+                      somente_em_estoque: bool = False,
+                      avaliacao_minima: Optional[float] = None,
+                      ordenar_por: str = 'nome',
+                      deslocamento: int = 0,
+                      limite: int = 24) -> 'np.ndarray':
+        """IDs dos produtos que passam nos filtros, já ordenados e paginados."""
+        if ordenar_por not in _ORDENACOES:
+            if ordenar_por in ORDENACOES_PRODUTOS:
+                raise ValueError(f"Ordenação não suportada no catálogo vetorizado: {ordenar_por}")
+            raise ValueError(f"Ordenação inválida: {ordenar_por}")
+        if limite < 1 or deslocamento < 0:
+            raise ValueError("limite deve ser pelo menos 1 e deslocamento não negativo")
+
+        with self._trava:
+            self._atualizar()
+            ordem = self._ordem(ordenar_por)
+            mascara = self._mascara(preco_min, preco_max, categoria, somente_em_estoque, avaliacao_minima)
+
+            if mascara is None:
+                selecionadas = ordem[deslocamento:deslocamento + limite]
+            else:
+                selecionadas = ordem[np.flatnonzero(mascara[ordem])[deslocamento:deslocamento + limite]]
+            return self.ids[selecionadas]
+
+    def contar(self, preco_min: Optional[float] = None, preco_max: Optional[float] = None,
+               categoria: Optional[str] = None, somente_em_estoque: bool = False,
+               avaliacao_minima: Optional[float] = None) -> int:
+        """Quantos produtos passam nos filtros."""
+        with self._trava:
+            self._atualizar()
+            mascara = self._mascara(preco_min, preco_max, categoria, somente_em_estoque, avaliacao_minima)
+            return len(self.ids) if mascara is None else int(np.count_nonzero(mascara))
@@ -0,0 +1,266 @@
+"""
+Escritas adiadas: avaliações e outras escritas não críticas gravadas em
+grupo por uma thread, com um só commit para cada grupo.
+
+agendar() põe a escrita numa fila e retorna um Future. A thread junta as
+escritas que chegarem até tamanho_lote, ou até janela segundos depois da
+primeira, e grava todas numa transação (BEGIN IMMEDIATE ... COMMIT). Cada
+escrita roda no próprio SAVEPOINT: a que falhar é desfeita sozinha e só o
+Future dela recebe o erro. Os Futures são resolvidos depois do COMMIT (com o
+ID gerado, em criar_avaliacao), então quem espera o resultado lê o dado já
+gravado; quem não espera volta na hora. Com a fila cheia (capacidade),
+agendar() espera vaga.
+
+Ao fechar (também no atexit), o que estiver na fila é tratado conforme a
+durabilidade:
+
+    'normal'    grava a fila com o synchronous do pool (NORMAL no WAL: não se
+                perde nada se o processo cair, só se a máquina cair)
+    'completa'  grava a fila e faz um checkpoint FULL, que sincroniza o WAL e
+                o banco no disco
+    'nenhuma'   descarta a fila e cancela os Futures pendentes
+
+É por melhor esforço: o que não for gravado em tempo_fechar segundos é
+cancelado e registrado no log.
+"""
+
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+from src.banco_dados import BancoDados
+from src.cache import MARCADOR_LISTAS, marcador_produto
+from src.modelo import Avaliacao
+
+logger = logging.getLogger("loja.escrita_adiada")
+
+T = TypeVar('T')
+
+DURABILIDADES = ('normal', 'completa', 'nenhuma')
+
+_FIM = object()  # Marca, na fila, que a thread deve parar
+
+
+class _Escrita:
+    __slots__ = ('funcao', 'marcadores', 'futuro')
+
+    def __init__(self, funcao: Callable[[sqlite3.Cursor], object], marcadores: Tuple[str, ...]):
+        self.funcao = funcao
+        self.marcadores = marcadores
+        self.futuro: Future = Future()
+
+
+class FilaEscritas:
+    """Fila de escritas gravadas em grupo (group commit) por uma thread."""
+
+    def __init__(self, db: BancoDados, tamanho_lote: int = 256, janela: float = 0.002,
+                 capacidade: int = 10000, durabilidade: str = 'normal', tempo_fechar: float = 10.0):
+        if tamanho_lote < 1:
+            raise ValueError("tamanho_lote deve ser pelo menos 1")
+        if durabilidade not in DURABILIDADES:
+            raise ValueError(f"Durabilidade inválida: {durabilidade} (use {', '.join(DURABILIDADES)})")
+        self.db = db
+        self.tamanho_lote = tamanho_lote
+        self.janela = janela
+        self.durabilidade = durabilidade
+        self.tempo_fechar = tempo_fechar
+
+        self._fila: 'queue.Queue' = queue.Queue(capacidade)
+        self._trava = threading.Lock()  # Métricas
+        # Ordena os put() de agendar() e o _FIM de fechar(): nada entra na
+        # fila depois do _FIM. Separada de _trava porque put() pode esperar
+        # vaga enquanto a thread, que usa _trava, esvazia a fila.
+        self._trava_fila = threading.Lock()
+        self._fechada = False
+        self._prazo: Optional[float] = None  # Limite para gravar a fila ao fechar
+        self._descartar = False
+        self._thread: Optional[threading.Thread] = None
+
+        # Métricas
+        self.escritas = 0
+        self.lotes = 0
+        self.falhas = 0
+        self.canceladas = 0
+
+    # ===== AGENDAMENTO =====
+
+    def agendar(self, funcao: Callable[[sqlite3.Cursor], T], marcadores: Tuple[str, ...] = ()) -> 'Future[T]':
+        """Agenda funcao(cursor) para o próximo grupo; retorna o Future do resultado.
+
+        funcao não deve fazer commit nem rollback. marcadores são os do
+        cache (src/cache.py) invalidados depois do COMMIT.
+        """
+        escrita = _Escrita(funcao, tuple(marcadores))
+        with self._trava_fila:
+            if self._fechada:
+                raise RuntimeError("Fila de escritas fechada")
+            self._iniciar_thread()
+            self._fila.put(escrita)
+        return escrita.futuro
+
+    def criar_avaliacao(self, avaliacao: Avaliacao) -> 'Future[int]':
+        """Agenda a avaliação (como BancoDados.criar_avaliacao); o Future recebe o ID.
+
+        Uma nota inválida é recusada na hora; produto ou usuário inexistente
+        chega como ValueError no Future (BancoDados.inserir_avaliacao).
+        """
+        self.db.validar_avaliacao(avaliacao)
+        return self.agendar(lambda cursor: self.db.inserir_avaliacao(cursor, avaliacao),
+                            (MARCADOR_LISTAS, marcador_produto(avaliacao.produto_id)))
+
+    # ===== GRAVAÇÃO =====
+
+    def _iniciar_thread(self):
+        # Chamado com _trava_fila
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._gravar_continuamente,
+                                            name='escrita-adiada', daemon=True)
+            self._thread.start()
+            atexit.register(self.fechar)
+
+    def _gravar_continuamente(self):
+        fim = False
+        while not fim:
+            escrita = self._fila.get()
+            if escrita is _FIM:
+                break
+            lote = [escrita]
+            prazo = time.monotonic() + self.janela
+            while len(lote) < self.tamanho_lote:
+                restante = prazo - time.monotonic()
+                try:
+                    escrita = self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait()
+                except queue.Empty:
+                    break
+                if escrita is _FIM:
+                    fim = True
+                    break
+                lote.append(escrita)
+
+            if self._descartar or (self._prazo is not None and time.monotonic() > self._prazo):
+                descartadas = lote + self._esvaziar()
+                self._cancelar(descartadas)
+                logger.warning("%d escritas pendentes descartadas ao fechar%s", len(descartadas),
+                               '' if self._descartar else " (tempo esgotado)")
+                break
+            try:
+                self._gravar(lote)
+            except Exception:
+                logger.exception("Falha ao gravar grupo de %d escritas", len(lote))
+
+    def _gravar(self, lote: List[_Escrita]):
+        """Grava o lote numa transação; cada escrita no seu SAVEPOINT."""
+        lote = [escrita for escrita in lote if escrita.futuro.set_running_or_notify_cancel()]
+        if not lote:
+            return
+
+        resultados = []
+        conexao = self.db.obter_conexao()
+        try:
+            cursor = conexao.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            for escrita in lote:
+                cursor.execute('SAVEPOINT escrita')
+                try:
+                    resultados.append((escrita, escrita.funcao(cursor), None))
+                except Exception as erro:
+                    cursor.execute('ROLLBACK TO escrita')
+                    resultados.append((escrita, None, erro))
+                cursor.execute('RELEASE escrita')
+            conexao.commit()
+        except Exception as erro:
+            for escrita in lote:
+                escrita.futuro.set_exception(erro)
+            with self._trava:
+                self.falhas += len(lote)
+            raise
+        finally:
+            conexao.close()
+
+        # Invalida antes de resolver: quem esperou o Future já lê o dado novo
+        marcadores = {marcador for escrita, _resultado, erro in resultados
+                      if erro is None for marcador in escrita.marcadores}
+        if marcadores:
+            self.db.invalidar_cache(*marcadores)
+        falhas = 0
+        for escrita, resultado, erro in resultados:
+            if erro is None:
+                escrita.futuro.set_result(resultado)
+            else:
+                escrita.futuro.set_exception(erro)
+                falhas += 1
+        with self._trava:
+            self.escritas += len(lote) - falhas
+            self.falhas += falhas
+            self.lotes += 1
+
+    def _esvaziar(self) -> List[_Escrita]:
+        escritas = []
+        while True:
+            try:
+                escrita = self._fila.get_nowait()
+            except queue.Empty:
+                return escritas
+            if escrita is not _FIM:
+                escritas.append(escrita)
+
+    def _cancelar(self, escritas: List[_Escrita]):
+        canceladas = sum(escrita.futuro.cancel() for escrita in escritas)
+        with self._trava:
+            self.canceladas += canceladas
+
+    # ===== ENCERRAMENTO =====
+
+    def fechar(self, durabilidade: Optional[str] = None):
+        """Para de aceitar escritas e trata a fila conforme a durabilidade.
+
+        Sem durabilidade, usa a da fila. Espera no máximo tempo_fechar
+        segundos pela gravação.
+        """
+        durabilidade = durabilidade or self.durabilidade
+        if durabilidade not in DURABILIDADES:
+            raise ValueError(f"Durabilidade inválida: {durabilidade} (use {', '.join(DURABILIDADES)})")
+        with self._trava_fila:
+            if self._fechada:
+                return
+            self._fechada = True
+            thread = self._thread
+            if thread is None:
+                return
+            self._descartar = durabilidade == 'nenhuma'
+            self._prazo = time.monotonic() + self.tempo_fechar
+            self._fila.put(_FIM)
+        if thread is not threading.current_thread():
+            thread.join(self.tempo_fechar + 1)
+
+        # Se a thread parou antes do fim da fila, ninguém fica esperando para sempre
+        restantes = [escrita for escrita in self._esvaziar() if not escrita.futuro.done()]
+        for escrita in restantes:
+            escrita.futuro.set_exception(RuntimeError("Fila de escritas fechada antes da gravação"))
+        if restantes:
+            with self._trava:
+                self.falhas += len(restantes)
+            logger.error("%d escritas não gravadas ao fechar a fila", len(restantes))
+
+        if durabilidade == 'completa':
+            conexao = self.db.obter_conexao()
+            try:
+                conexao.execute('PRAGMA wal_checkpoint(FULL)')
+            finally:
+                conexao.close()
+
+    def metricas(self) -> dict:
+        with self._trava:
+            return {
+                'pendentes': self._fila.qsize(),
+                'escritas': self.escritas,
+                'lotes': self.lotes,
+                'por_lote': self.escritas / self.lotes if self.lotes else 0.0,
+                'falhas': self.falhas,
+                'canceladas': self.canceladas,
+            }
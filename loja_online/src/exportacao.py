@@ -0,0 +1,130 @@
+"""
+Exportação de pedidos e avaliações para CSV ou JSONL em memória constante.
+
+As linhas são lidas do banco em lotes (métodos iterar_* do BancoDados) e
+escritas direto no arquivo. Com um arquivo de checkpoint, uma exportação
+interrompida continua de onde parou.
+"""
+
+import csv
+import json
+import os
+from itertools import groupby
+from typing import Callable, Iterator, List, Optional
+
+from src.banco_dados import BancoDados
+
+
+COLUNAS_PEDIDOS = [
+    'pedido_id', 'usuario_id', 'data_pedido', 'status', 'endereco_entrega',
+    'valor_subtotal', 'valor_frete', 'valor_total',
+    'item_id', 'produto_id', 'quantidade', 'preco_unitario',
+]
+COLUNAS_ITEM = ['item_id', 'produto_id', 'quantidade', 'preco_unitario']
+COLUNAS_AVALIACOES = ['id', 'produto_id', 'usuario_id', 'nota', 'comentario', 'data_avaliacao']
+
+# Registros (pedidos ou avaliações) escritos entre dois checkpoints
+REGISTROS_POR_CHECKPOINT = 1000
+
+
+def _ler_checkpoint(caminho: Optional[str]) -> Optional[dict]:
+    if not caminho or not os.path.exists(caminho):
+        return None
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def _salvar_checkpoint(caminho: str, dados: dict):
+    """Grava o checkpoint de forma atômica (arquivo temporário + rename)."""
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(dados, arquivo)
+    os.replace(temporario, caminho)
+
+
+def _exportar(linhas_apos: Callable[[int], Iterator[dict]], chave: str, colunas: List[str],
+              destino: str, formato: str, checkpoint: Optional[str],
+              montar_registro: Callable[[List[dict]], dict]) -> int:
+    """Escreve os registros agrupados por chave e retorna quantos foram escritos."""
+    if formato not in ('csv', 'jsonl'):
+        raise ValueError(f"Formato inválido: {formato}")
+
+    estado = _ler_checkpoint(checkpoint)
+    if estado is not None and estado.get('destino') != os.path.abspath(destino):
+        raise ValueError(f"O checkpoint {checkpoint} pertence a outro arquivo: {estado.get('destino')}")
+
+    ultimo_id = 0
+    if estado is not None and os.path.exists(destino):
+        # Descarta o que foi escrito depois do último checkpoint
+        ultimo_id = estado['ultimo_id']
+        os.truncate(destino, estado['posicao'])
+        modo = 'a'
+    else:
+        modo = 'w'
+
+    escritos = 0
+    with open(destino, modo, newline='', encoding='utf-8') as arquivo:
+        escritor = csv.writer(arquivo) if formato == 'csv' else None
+        if escritor is not None and modo == 'w':
+            escritor.writerow(colunas)
+
+        def registrar_checkpoint():
+            if checkpoint:
+                arquivo.flush()
+                os.fsync(arquivo.fileno())
+                _salvar_checkpoint(checkpoint, {
+                    'destino': os.path.abspath(destino),
+                    'ultimo_id': ultimo_id,
+                    'posicao': os.fstat(arquivo.fileno()).st_size,
+                })
+
+        for valor_chave, grupo in groupby(linhas_apos(ultimo_id), key=lambda linha: linha[chave]):
+            linhas = list(grupo)
+            if escritor is not None:
+                for linha in linhas:
+                    escritor.writerow([linha[coluna] for coluna in colunas])
+            else:
+                arquivo.write(json.dumps(montar_registro(linhas), ensure_ascii=False) + '\n')
+
+            ultimo_id = valor_chave
+            escritos += 1
+            if escritos % REGISTROS_POR_CHECKPOINT == 0:
+                registrar_checkpoint()
+
+        registrar_checkpoint()
+
+    return escritos
+
+
+def _montar_pedido(linhas: List[dict]) -> dict:
+    """Um pedido com a lista de itens, para o formato JSONL."""
+    pedido = {coluna: linhas[0][coluna] for coluna in COLUNAS_PEDIDOS if coluna not in COLUNAS_ITEM}
+    pedido['itens'] = [
+        {coluna: linha[coluna] for coluna in COLUNAS_ITEM}
+        for linha in linhas if linha['item_id'] is not None
+    ]
+    return pedido
+
+
+def exportar_pedidos(db: BancoDados, destino: str, formato: str = 'csv',
+                     data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                     checkpoint: Optional[str] = None, tamanho_lote: int = 1000) -> int:
+    """Exporta pedidos com seus itens e retorna o número de pedidos escritos.
+
+    Em CSV cada linha é um item (com os dados do pedido repetidos); em JSONL
+    cada linha é um pedido com a lista "itens".
+    """
+    return _exportar(
+        lambda apos: db.iterar_itens_pedidos(apos, data_inicio, data_fim, tamanho_lote),
+        'pedido_id', COLUNAS_PEDIDOS, destino, formato, checkpoint, _montar_pedido
+    )
+
+
+def exportar_avaliacoes(db: BancoDados, destino: str, formato: str = 'csv',
+                        data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                        checkpoint: Optional[str] = None, tamanho_lote: int = 1000) -> int:
+    """Exporta avaliações e retorna quantas foram escritas."""
+    return _exportar(
+        lambda apos: db.iterar_avaliacoes(apos, data_inicio, data_fim, tamanho_lote),
+        'id', COLUNAS_AVALIACOES, destino, formato, checkpoint, lambda linhas: linhas[0]
+    )
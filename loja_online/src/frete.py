@@ -0,0 +1,13 @@
+"""
+Regras de frete da loja, sem dependência do Streamlit (usadas pelo app e pela API).
+"""
+
+
+def calcular_frete(valor_pedido: float) -> float:
+    """Calcula o valor do frete baseado no valor do pedido."""
+    if valor_pedido >= 100:
+        return 0.0  # Frete grátis
+    elif valor_pedido >= 50:
+        return 10.0
+    else:
+        return 15.0
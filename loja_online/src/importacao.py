@@ -0,0 +1,180 @@
+"""
+Importação em massa do catálogo de produtos a partir de CSV ou JSONL.
+
+O arquivo é lido linha a linha, cada linha é validada e convertida em
+Produto e os produtos válidos são gravados em lotes, cada lote numa
+transação (BancoDados.salvar_produtos_em_lote). O SKU é a chave natural:
+importar o mesmo arquivo de novo não duplica nem altera nada.
+
+Colunas: sku, nome, descricao, preco, estoque, categoria.
+"""
+
+import csv
+import json
+import math
+import sqlite3
+import time
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from src.banco_dados import BancoDados
+from src.modelo import Produto
+
+
+COLUNAS_OBRIGATORIAS = ['sku', 'nome', 'preco', 'estoque', 'categoria']
+
+# Quantas linhas rejeitadas são guardadas (com o motivo) no relatório
+MAXIMO_REJEICOES_GUARDADAS = 100
+
+
+class RelatorioImportacao:
+    """Resultado de uma importação."""
+
+    def __init__(self):
+        self.lidas = 0
+        self.gravadas = 0  # Inseridas ou alteradas
+        self.rejeitadas = 0
+        self.rejeicoes: List[Tuple[int, str]] = []  # (número da linha, motivo)
+        self.segundos = 0.0
+
+    @property
+    def validas(self) -> int:
+        return self.lidas - self.rejeitadas
+
+    @property
+    def inalteradas(self) -> int:
+        return self.validas - self.gravadas
+
+    @property
+    def linhas_por_segundo(self) -> float:
+        return self.lidas / self.segundos if self.segundos else 0.0
+
+    def __repr__(self):
+        return (f"RelatorioImportacao(lidas={self.lidas}, gravadas={self.gravadas}, "
+                f"rejeitadas={self.rejeitadas})")
+
+
+def _ler_linhas(caminho: str, formato: str) -> Iterator[Tuple[int, object]]:
+    """Gera (número da linha, dados) sem carregar o arquivo inteiro."""
+    with open(caminho, newline='', encoding='utf-8-sig') as arquivo:
+        if formato == 'csv':
+            leitor = csv.DictReader(arquivo)
+            faltando = [coluna for coluna in COLUNAS_OBRIGATORIAS if coluna not in (leitor.fieldnames or [])]
+            if faltando:
+                raise ValueError(f"Colunas obrigatórias ausentes no CSV: {', '.join(faltando)}")
+            for dados in leitor:
+                yield leitor.line_num, dados
+        else:
+            for numero, texto in enumerate(arquivo, start=1):
+                if not texto.strip():
+                    continue
+                try:
+                    yield numero, json.loads(texto)
+                except json.JSONDecodeError as erro:
+                    yield numero, erro
+
+
+def _numero(valor) -> float:
+    """Converte preços como 1299.9, "1299.90" ou "1.299,90"."""
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return float(valor)
+    texto = str(valor).strip().replace('R$', '').strip()
+    if ',' in texto:
+        texto = texto.replace('.', '').replace(',', '.')
+    numero = float(texto)
+    if not math.isfinite(numero):  # "nan" e "inf" passam no float()
+        raise ValueError(f"Número não finito: {valor!r}")
+    return numero
+
+
+def validar_linha(dados) -> Produto:
+    """Converte uma linha do arquivo em Produto ou levanta ValueError."""
+    if isinstance(dados, json.JSONDecodeError):
+        raise ValueError(f"JSON inválido: {dados.msg}")
+    if not isinstance(dados, dict):
+        raise ValueError("A linha deve ser um objeto")
+
+    texto = {chave: str(valor).strip() if valor is not None else ''
+             for chave, valor in dados.items() if chave is not None}
+    for coluna in COLUNAS_OBRIGATORIAS:
+        if not texto.get(coluna):
+            raise ValueError(f"Campo obrigatório vazio: {coluna}")
+
+    try:
+        preco = _numero(dados['preco'])
+    except ValueError:
+        raise ValueError(f"Preço inválido: {dados['preco']!r}")
+    try:
+        estoque = int(texto['estoque'])
+    except ValueError:
+        raise ValueError(f"Estoque inválido: {dados['estoque']!r}")
+
+    if preco < 0:
+        raise ValueError(f"Preço negativo: {preco}")
+    if estoque < 0:
+        raise ValueError(f"Estoque negativo: {estoque}")
+
+    return Produto(
+        nome=texto['nome'],
+        descricao=texto.get('descricao', ''),
+        preco=round(preco, 2),
+        estoque=estoque,
+        categoria=texto['categoria'],
+        sku=texto['sku'],
+    )
+
+
+def importar_produtos(db: BancoDados, caminho: str, formato: Optional[str] = None,
+                      tamanho_lote: int = 1000,
+                      ao_progredir: Optional[Callable[[RelatorioImportacao], None]] = None
+                      ) -> RelatorioImportacao:
+    """Importa produtos de um arquivo CSV ou JSONL (pela extensão, se formato=None).
+
+    ao_progredir é chamado depois de cada lote gravado. Se o banco recusar
+    um lote (IntegrityError), ele é regravado linha a linha e só as linhas
+    recusadas são rejeitadas.
+    """
+    formato = formato or ('jsonl' if caminho.endswith(('.jsonl', '.json')) else 'csv')
+    if formato not in ('csv', 'jsonl'):
+        raise ValueError(f"Formato inválido: {formato}")
+    if tamanho_lote < 1:
+        raise ValueError("tamanho_lote deve ser pelo menos 1")
+
+    relatorio = RelatorioImportacao()
+    inicio = time.perf_counter()
+    lote: List[Tuple[int, Produto]] = []  # (número da linha, produto)
+
+    def rejeitar(numero: int, motivo: str):
+        relatorio.rejeitadas += 1
+        if len(relatorio.rejeicoes) < MAXIMO_REJEICOES_GUARDADAS:
+            relatorio.rejeicoes.append((numero, motivo))
+
+    def gravar_lote():
+        try:
+            relatorio.gravadas += db.salvar_produtos_em_lote([produto for _linha, produto in lote])
+        except sqlite3.IntegrityError:
+            for numero, produto in lote:
+                try:
+                    relatorio.gravadas += db.salvar_produtos_em_lote([produto])
+                except sqlite3.IntegrityError as erro:
+                    rejeitar(numero, f"Recusado pelo banco: {erro}")
+        lote.clear()
+        relatorio.segundos = time.perf_counter() - inicio
+        if ao_progredir is not None:
+            ao_progredir(relatorio)
+
+    for numero, dados in _ler_linhas(caminho, formato):
+        relatorio.lidas += 1
+        try:
+            lote.append((numero, validar_linha(dados)))
+        except ValueError as erro:
+            rejeitar(numero, str(erro))
+            continue
+
+        if len(lote) >= tamanho_lote:
+            gravar_lote()
+
+    if lote:
+        gravar_lote()
+
+    relatorio.segundos = time.perf_counter() - inicio
+    return relatorio
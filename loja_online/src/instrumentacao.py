@@ -0,0 +1,328 @@
+"""
+Instrumentação opcional das consultas SQL do BancoDados.
+
+Com BancoDados(instrumentacao=Instrumentacao()), cada conexão entregue por
+obter_conexao é envolvida para registrar, por comando: o método público do
+BancoDados que o emitiu, o SQL normalizado, as linhas lidas (ou alteradas),
+o tempo total (execução + leitura das linhas) e os passos da máquina virtual
+do SQLite, contados pelo progress handler. Comandos acima do limite vão para
+o log "loja.sql" e para a lista de consultas lentas.
+
+Sem instrumentação o BancoDados não envolve nada: o custo é um teste de None
+por conexão.
+"""
+
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("loja.sql")
+
+# Limites superiores (ms) dos baldes dos histogramas por método
+BALDES_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+_LITERAIS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def normalizar_sql(sql: str) -> str:
+    """SQL sem literais, com espaços compactados e listas IN reduzidas."""
+    sql = ' '.join(sql.split())
+    sql = _LITERAIS.sub('?', sql)
+    return _LISTAS.sub('(?, ...)', sql)
+
+
+class _Estatistica:
+    __slots__ = ('chamadas', 'segundos', 'maximo', 'linhas', 'passos', 'baldes')
+
+    def __init__(self):
+        self.chamadas = 0
+        self.segundos = 0.0
+        self.maximo = 0.0
+        self.linhas = 0
+        self.passos = 0
+        self.baldes = [0] * (len(BALDES_MS) + 1)
+
+    def somar(self, segundos: float, linhas: int, passos: int):
+        self.chamadas += 1
+        self.segundos += segundos
+        self.maximo = max(self.maximo, segundos)
+        self.linhas += linhas
+        self.passos += passos
+        milissegundos = segundos * 1000
+        for posicao, limite in enumerate(BALDES_MS):
+            if milissegundos <= limite:
+                self.baldes[posicao] += 1
+                break
+        else:
+            self.baldes[-1] += 1
+
+    def como_dict(self) -> dict:
+        return {
+            'chamadas': self.chamadas,
+            'total_ms': round(self.segundos * 1000, 3),
+            'media_ms': round(self.segundos * 1000 / self.chamadas, 3) if self.chamadas else 0.0,
+            'max_ms': round(self.maximo * 1000, 3),
+            'linhas': self.linhas,
+            'passos_vm': self.passos,
+        }
+
+
+class Instrumentacao:
+    """Coleta tempos, linhas e passos por método e por consulta."""
+
+    def __init__(self, limite_lento_ms: float = 100.0, passos_progresso: int = 1000,
+                 maximo_lentas: int = 200, maximo_consultas: int = 2000):
+        """
+        passos_progresso é a cada quantas instruções da máquina virtual o
+        progress handler é chamado (a precisão da contagem de passos).
+        maximo_consultas limita quantos SQLs distintos são acompanhados.
+        """
+        self.limite_lento_ms = limite_lento_ms
+        self.passos_progresso = passos_progresso
+        self.maximo_consultas = maximo_consultas
+        self.por_metodo: Dict[str, _Estatistica] = {}
+        self.por_consulta: Dict[Tuple[str, str], _Estatistica] = {}
+        self.lentas = deque(maxlen=maximo_lentas)
+        self._trava = threading.Lock()
+
+    def envolver(self, conexao, db) -> '_ConexaoInstrumentada':
+        return _ConexaoInstrumentada(conexao, self, _metodo_chamador(db))
+
+    def registrar(self, metodo: str, sql: str, linhas: int, segundos: float, passos: int = 0):
+        normalizado = normalizar_sql(sql)
+        with self._trava:
+            self.por_metodo.setdefault(metodo, _Estatistica()).somar(segundos, linhas, passos)
+            chave = (metodo, normalizado)
+            estatistica = self.por_consulta.get(chave)
+            if estatistica is None and len(self.por_consulta) < self.maximo_consultas:
+                estatistica = self.por_consulta[chave] = _Estatistica()
+            if estatistica is not None:
+                estatistica.somar(segundos, linhas, passos)
+
+            lenta = segundos * 1000 >= self.limite_lento_ms
+            if lenta:
+                self.lentas.append({
+                    'metodo': metodo, 'sql': normalizado, 'linhas': linhas,
+                    'ms': round(segundos * 1000, 3), 'passos_vm': passos,
+                    'quando': time.time(),
+                })
+        if lenta:
+            logger.warning("Consulta lenta (%.1f ms, %d linhas) em %s: %s",
+                           segundos * 1000, linhas, metodo, normalizado)
+
+    def limpar(self):
+        with self._trava:
+            self.por_metodo.clear()
+            self.por_consulta.clear()
+            self.lentas.clear()
+
+    def exportar_json(self) -> dict:
+        """Estatísticas por método, por consulta e as consultas lentas."""
+        with self._trava:
+            return {
+                'metodos': {metodo: e.como_dict() for metodo, e in sorted(self.por_metodo.items())},
+                'consultas': [
+                    dict(metodo=metodo, sql=sql, **e.como_dict())
+                    for (metodo, sql), e in sorted(self.por_consulta.items(),
+                                                   key=lambda item: -item[1].segundos)
+                ],
+                'lentas': list(self.lentas),
+            }
+
+    def salvar_json(self, caminho: str):
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            json.dump(self.exportar_json(), arquivo, indent=2, ensure_ascii=False)
+
+    def exportar_prometheus(self) -> str:
+        """Histogramas por método no formato texto do Prometheus."""
+        linhas: List[str] = [
+            '# HELP loja_sql_duracao_segundos Tempo dos comandos SQL por método do BancoDados',
+            '# TYPE loja_sql_duracao_segundos histogram',
+        ]
+        with self._trava:
+            metodos = sorted(self.por_metodo.items())
+            for metodo, e in metodos:
+                acumulado = 0
+                for limite, quantidade in zip(BALDES_MS, e.baldes):
+                    acumulado += quantidade
+                    linhas.append(f'loja_sql_duracao_segundos_bucket{{metodo="{metodo}",le="{limite / 1000:g}"}} {acumulado}')
+                linhas.append(f'loja_sql_duracao_segundos_bucket{{metodo="{metodo}",le="+Inf"}} {e.chamadas}')
+                linhas.append(f'loja_sql_duracao_segundos_sum{{metodo="{metodo}"}} {e.segundos:.6f}')
+                linhas.append(f'loja_sql_duracao_segundos_count{{metodo="{metodo}"}} {e.chamadas}')
+            linhas.append('# HELP loja_sql_linhas_total Linhas lidas ou alteradas por método')
+            linhas.append('# TYPE loja_sql_linhas_total counter')
+            for metodo, e in metodos:
+                linhas.append(f'loja_sql_linhas_total{{metodo="{metodo}"}} {e.linhas}')
+            linhas.append('# HELP loja_sql_passos_vm_total Instruções da máquina virtual do SQLite por método')
+            linhas.append('# TYPE loja_sql_passos_vm_total counter')
+            for metodo, e in metodos:
+                linhas.append(f'loja_sql_passos_vm_total{{metodo="{metodo}"}} {e.passos}')
+            linhas.append('# HELP loja_sql_lentas_total Comandos acima do limite de consulta lenta')
+            linhas.append('# TYPE loja_sql_lentas_total gauge')
+            linhas.append(f'loja_sql_lentas_total {len(self.lentas)}')
+        return '\n'.join(linhas) + '\n'
+
+
+def _metodo_chamador(db) -> str:
+    """Nome do método público mais externo do BancoDados na pilha atual."""
+    encontrado = None
+    classe = type(db)
+    quadro = sys._getframe(2)
+    while quadro is not None:
+        nome = quadro.f_code.co_name
+        if not nome.startswith('_') and hasattr(classe, nome) and quadro.f_locals.get('self') is db:
+            encontrado = nome
+        quadro = quadro.f_back
+    return encontrado or '(desconhecido)'
+
+
+class _ConexaoInstrumentada:
+    """Envolve uma conexão: cursores medidos, commit e rollback cronometrados."""
+
+    def __init__(self, conexao, instrumentacao: Instrumentacao, metodo: str):
+        self._conexao = conexao
+        self._instrumentacao = instrumentacao
+        self._metodo = metodo
+        self._cursores: List[_CursorInstrumentado] = []
+        self.passos = 0
+        conexao.set_progress_handler(self._progresso, instrumentacao.passos_progresso)
+
+    def _progresso(self) -> int:
+        self.passos += self._instrumentacao.passos_progresso
+        return 0
+
+    def registrar(self, sql: str, linhas: int, segundos: float, passos: int):
+        self._instrumentacao.registrar(self._metodo, sql, linhas, segundos, passos)
+
+    def cursor(self) -> '_CursorInstrumentado':
+        cursor = _CursorInstrumentado(self._conexao.cursor(), self)
+        self._cursores.append(cursor)
+        return cursor
+
+    def execute(self, sql: str, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql: str, parametros):
+        return self.cursor().executemany(sql, parametros)
+
+    def _cronometrar(self, comando: str, funcao):
+        inicio = time.perf_counter()
+        try:
+            return funcao()
+        finally:
+            self.registrar(comando, 0, time.perf_counter() - inicio, 0)
+
+    def commit(self):
+        if self._conexao.in_transaction:
+            return self._cronometrar('COMMIT', self._conexao.commit)
+        return self._conexao.commit()
+
+    def rollback(self):
+        if self._conexao.in_transaction:
+            return self._cronometrar('ROLLBACK', self._conexao.rollback)
+        return self._conexao.rollback()
+
+    def close(self):
+        for cursor in self._cursores:
+            cursor._finalizar()
+        self._cursores.clear()
+        self._conexao.set_progress_handler(None, 0)
+        self._conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, rastreio):
+        return self._conexao.__exit__(tipo, valor, rastreio)
+
+    def __getattr__(self, nome):
+        return getattr(self._conexao, nome)
+
+
+class _CursorInstrumentado:
+    """Cursor que acumula tempo e linhas do comando corrente até o próximo."""
+
+    def __init__(self, cursor, conexao: _ConexaoInstrumentada):
+        self._cursor = cursor
+        self._conexao = conexao
+        self._sql: Optional[str] = None
+        self._segundos = 0.0
+        self._linhas = 0
+        self._passos_inicio = 0
+
+    def _finalizar(self):
+        if self._sql is None:
+            return
+        linhas = self._linhas
+        if not linhas and self._cursor.rowcount > 0:
+            linhas = self._cursor.rowcount  # INSERT/UPDATE/DELETE
+        self._conexao.registrar(self._sql, linhas, self._segundos,
+                                self._conexao.passos - self._passos_inicio)
+        self._sql = None
+
+    def _medir(self, funcao, *args):
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args)
+        finally:
+            self._segundos += time.perf_counter() - inicio
+
+    def execute(self, sql: str, parametros=()):
+        self._finalizar()
+        self._sql, self._segundos, self._linhas = sql, 0.0, 0
+        self._passos_inicio = self._conexao.passos
+        self._medir(self._cursor.execute, sql, parametros)
+        return self
+
+    def executemany(self, sql: str, parametros):
+        self._finalizar()
+        self._sql, self._segundos, self._linhas = sql, 0.0, 0
+        self._passos_inicio = self._conexao.passos
+        self._medir(self._cursor.executemany, sql, parametros)
+        return self
+
+    def fetchone(self):
+        linha = self._medir(self._cursor.fetchone)
+        if linha is not None:
+            self._linhas += 1
+        return linha
+
+    def fetchmany(self, tamanho: Optional[int] = None):
+        linhas = self._medir(self._cursor.fetchmany, tamanho or self._cursor.arraysize)
+        self._linhas += len(linhas)
+        return linhas
+
+    def fetchall(self):
+        linhas = self._medir(self._cursor.fetchall)
+        self._linhas += len(linhas)
+        return linhas
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        linha = self.fetchone()
+        if linha is None:
+            raise StopIteration
+        return linha
+
+    def close(self):
+        self._finalizar()
+        self._cursor.close()
+
+    @property
+    def row_factory(self):
+        return self._cursor.row_factory
+
+    @row_factory.setter
+    def row_factory(self, fabrica):
+        self._cursor.row_factory = fabrica
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
@@ -0,0 +1,56 @@
+"""
+Conversão das linhas do SQLite nos modelos.
+
+Cada consulta seleciona as colunas de COLUNAS_PRODUTO (ou COLUNAS_USUARIO)
+na ordem dos parâmetros do construtor e instala a fábrica correspondente
+como row_factory do cursor: o modelo é criado direto da tupla, sem
+sqlite3.Row nem busca de colunas por nome, e todos os campos são
+preenchidos do mesmo jeito em todas as consultas.
+"""
+
+import sqlite3
+from typing import Optional, Sequence
+
+from src.modelo import Produto, Usuario
+
+
+# Na ordem dos parâmetros de Produto.__init__
+COLUNAS_PRODUTO = ('nome', 'descricao', 'preco', 'estoque', 'categoria', 'id', 'sku',
+                   'data_criacao', 'avaliacao_media', 'total_avaliacoes')
+# Na ordem dos parâmetros de Usuario.__init__
+COLUNAS_USUARIO = ('nome', 'email', 'senha', 'telefone', 'endereco', 'id', 'data_cadastro', 'ativo')
+
+_TOTAL_PRODUTO = len(COLUNAS_PRODUTO)
+
+
+def listar_colunas(colunas: Sequence[str], alias: Optional[str] = None) -> str:
+    """Lista de colunas para o SELECT, opcionalmente com o alias da tabela."""
+    prefixo = f'{alias}.' if alias else ''
+    return ', '.join(prefixo + coluna for coluna in colunas)
+
+
+def colunas_produto(alias: Optional[str] = None) -> str:
+    return listar_colunas(COLUNAS_PRODUTO, alias)
+
+
+def colunas_usuario(alias: Optional[str] = None) -> str:
+    return listar_colunas(COLUNAS_USUARIO, alias)
+
+
+def linha_para_produto(_cursor: sqlite3.Cursor, linha: tuple) -> Produto:
+    """row_factory para SELECT {colunas_produto()}."""
+    return Produto(*linha)
+
+
+def linha_para_produto_e_extras(_cursor: sqlite3.Cursor, linha: tuple) -> tuple:
+    """row_factory para SELECT {colunas_produto()}, extra1, extra2...
+
+    Retorna (produto, extra1, extra2, ...).
+    """
+    return (Produto(*linha[:_TOTAL_PRODUTO]),) + linha[_TOTAL_PRODUTO:]
+
+
+def linha_para_usuario(_cursor: sqlite3.Cursor, linha: tuple) -> Usuario:
+    """row_factory para SELECT {colunas_usuario()}."""
+    nome, email, senha, telefone, endereco, id_, data_cadastro, ativo = linha
+    return Usuario(nome, email, senha, telefone, endereco, id_, data_cadastro, bool(ativo))
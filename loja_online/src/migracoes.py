@@ -0,0 +1,339 @@
+"""
+Migrações versionadas do esquema do banco de dados.
+
+A versão do esquema fica em PRAGMA user_version. Cada migração é aplicada
+uma única vez, em ordem, dentro da sua própria transação.
+"""
+
+import json
+import sqlite3
+from typing import Callable, List, Tuple, Union
+
+# Um passo é um comando SQL ou uma função que recebe o cursor
+Passo = Union[str, Callable[[sqlite3.Cursor], None]]
+
+
+# Recalcula soma, total, histograma e média das avaliações de todos os
+# produtos em uma passada agrupada; também usada pela reconciliação
+RECALCULAR_AVALIACOES = [
+    '''
+        UPDATE produtos SET
+            soma_notas = 0, total_avaliacoes = 0, avaliacao_media = 0,
+            estrelas_1 = 0, estrelas_2 = 0, estrelas_3 = 0, estrelas_4 = 0, estrelas_5 = 0
+        WHERE total_avaliacoes != 0 OR soma_notas != 0
+    ''',
+    '''
+        WITH agregados AS (
+            SELECT produto_id, COUNT(*) AS total, SUM(nota) AS soma,
+                   SUM(nota = 1) AS e1, SUM(nota = 2) AS e2, SUM(nota = 3) AS e3,
+                   SUM(nota = 4) AS e4, SUM(nota = 5) AS e5
+            FROM avaliacoes GROUP BY produto_id
+        )
+        UPDATE produtos SET
+            soma_notas = a.soma,
+            total_avaliacoes = a.total,
+            avaliacao_media = ROUND(CAST(a.soma AS REAL) / a.total, 2),
+            estrelas_1 = a.e1, estrelas_2 = a.e2, estrelas_3 = a.e3,
+            estrelas_4 = a.e4, estrelas_5 = a.e5
+        FROM agregados a
+        WHERE produtos.id = a.produto_id
+    ''',
+]
+
+# Refaz o resumo de compras de cada usuário a partir da tabela pedidos; o
+# checkout mantém o resumo em dia incrementalmente
+RECALCULAR_RESUMO_USUARIOS = [
+    'DELETE FROM resumo_usuarios',
+    '''
+        INSERT INTO resumo_usuarios (usuario_id, total_pedidos, valor_total,
+                                     ultimo_pedido_id, ultimo_pedido_em)
+        SELECT usuario_id, COUNT(*), SUM(valor_total), id, MAX(data_pedido)
+        FROM pedidos GROUP BY usuario_id
+    ''',
+]
+
+
+# Refaz os resumos de vendas (receita por categoria e dia, vendas por
+# produto, pedidos por status) a partir do histórico; o checkout os mantém
+# em dia incrementalmente. A categoria é a atual do produto.
+RECALCULAR_VENDAS = [
+    'DELETE FROM vendas_categoria_dia',
+    'DELETE FROM vendas_produto',
+    'DELETE FROM pedidos_por_status',
+    '''
+        INSERT INTO vendas_categoria_dia (dia, categoria, pedidos, unidades, receita)
+        SELECT date(pe.data_pedido), COALESCE(pr.categoria, ''), COUNT(DISTINCT ip.pedido_id),
+               SUM(ip.quantidade), SUM(ip.quantidade * ip.preco_unitario)
+        FROM itens_pedido ip
+        JOIN pedidos pe ON pe.id = ip.pedido_id
+        LEFT JOIN produtos pr ON pr.id = ip.produto_id
+        GROUP BY 1, 2
+    ''',
+    '''
+        INSERT INTO vendas_produto (produto_id, pedidos, unidades, receita)
+        SELECT produto_id, COUNT(DISTINCT pedido_id), SUM(quantidade), SUM(quantidade * preco_unitario)
+        FROM itens_pedido GROUP BY produto_id
+    ''',
+    '''
+        INSERT INTO pedidos_por_status (status, pedidos, valor_total)
+        SELECT status, COUNT(*), SUM(valor_total) FROM pedidos GROUP BY status
+    ''',
+]
+
+
+def _carrinhos_em_linhas(cursor: sqlite3.Cursor):
+    """Copia os carrinhos em JSON ([[produto_id, quantidade, preço], ...]) para itens_carrinho."""
+    linhas = cursor.execute('SELECT chave, itens FROM carrinhos').fetchall()
+    cursor.executemany(
+        'INSERT OR REPLACE INTO itens_carrinho (chave, produto_id, quantidade, preco_unitario) VALUES (?, ?, ?, ?)',
+        [(chave, produto_id, quantidade, preco)
+         for chave, itens in linhas for produto_id, quantidade, preco in json.loads(itens)])
+
+
+MIGRACOES: List[Tuple[int, str, List[Passo]]] = [
+    (1, "Tabelas iniciais", [
+        '''
+            CREATE TABLE IF NOT EXISTS produtos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nome TEXT NOT NULL,
+                descricao TEXT,
+                preco REAL NOT NULL,
+                estoque INTEGER DEFAULT 0,
+                categoria TEXT NOT NULL,
+                avaliacao_media REAL DEFAULT 0,
+                total_avaliacoes INTEGER DEFAULT 0,
+                data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''',
+        '''
+            CREATE TABLE IF NOT EXISTS usuarios (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nome TEXT NOT NULL,
+                email TEXT UNIQUE NOT NULL,
+                senha TEXT NOT NULL,
+                telefone TEXT,
+                endereco TEXT,
+                data_cadastro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                ativo BOOLEAN DEFAULT 1
+            )
+        ''',
+        '''
+            CREATE TABLE IF NOT EXISTS pedidos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                usuario_id INTEGER NOT NULL,
+                endereco_entrega TEXT NOT NULL,
+                valor_subtotal REAL NOT NULL,
+                valor_frete REAL DEFAULT 0,
+                valor_total REAL NOT NULL,
+                status TEXT DEFAULT 'Pendente',
+                data_pedido TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                data_entrega TIMESTAMP,
+                FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
+            )
+        ''',
+        '''
+            CREATE TABLE IF NOT EXISTS itens_pedido (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                pedido_id INTEGER NOT NULL,
+                produto_id INTEGER NOT NULL,
+                quantidade INTEGER NOT NULL,
+                preco_unitario REAL NOT NULL,
+                FOREIGN KEY (pedido_id) REFERENCES pedidos (id),
+                FOREIGN KEY (produto_id) REFERENCES produtos (id)
+            )
+        ''',
+        '''
+            CREATE TABLE IF NOT EXISTS avaliacoes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                produto_id INTEGER NOT NULL,
+                usuario_id INTEGER NOT NULL,
+                nota INTEGER NOT NULL,
+                comentario TEXT,
+                data_avaliacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (produto_id) REFERENCES produtos (id),
+                FOREIGN KEY (usuario_id) REFERENCES usuarios (id)
+            )
+        ''',
+    ]),
+    (2, "Índices para as consultas frequentes", [
+        # obter_produtos_por_categoria (WHERE categoria = ? ORDER BY nome)
+        # e obter_categorias (DISTINCT categoria, coberto pelo índice)
+        'CREATE INDEX IF NOT EXISTS idx_produtos_categoria_nome ON produtos (categoria, nome)',
+        # obter_todos_produtos (ORDER BY nome) sem ordenação temporária
+        'CREATE INDEX IF NOT EXISTS idx_produtos_nome ON produtos (nome)',
+        # obter_pedidos_usuario (WHERE usuario_id = ? ORDER BY data_pedido DESC)
+        'CREATE INDEX IF NOT EXISTS idx_pedidos_usuario_data ON pedidos (usuario_id, data_pedido DESC)',
+        # obter_avaliacoes_produto (ORDER BY data_avaliacao DESC); inclui a nota
+        # para que o AVG(nota) de _atualizar_avaliacao_produto seja coberto
+        'CREATE INDEX IF NOT EXISTS idx_avaliacoes_produto_data '
+        'ON avaliacoes (produto_id, data_avaliacao DESC, nota)',
+        'CREATE INDEX IF NOT EXISTS idx_itens_pedido_pedido ON itens_pedido (pedido_id)',
+    ]),
+    (3, "Índice de busca textual (FTS5) dos produtos", [
+        # Tabela de conteúdo externo: o texto fica só em produtos; remove_diacritics
+        # faz "mecanico" encontrar "Mecânico" e prefix acelera buscas por prefixo
+        '''
+            CREATE VIRTUAL TABLE IF NOT EXISTS produtos_busca USING fts5(
+                nome, descricao,
+                content='produtos', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            )
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS produtos_busca_ai AFTER INSERT ON produtos BEGIN
+                INSERT INTO produtos_busca (rowid, nome, descricao)
+                VALUES (new.id, new.nome, new.descricao);
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS produtos_busca_ad AFTER DELETE ON produtos BEGIN
+                INSERT INTO produtos_busca (produtos_busca, rowid, nome, descricao)
+                VALUES ('delete', old.id, old.nome, old.descricao);
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS produtos_busca_au
+            AFTER UPDATE OF nome, descricao ON produtos BEGIN
+                INSERT INTO produtos_busca (produtos_busca, rowid, nome, descricao)
+                VALUES ('delete', old.id, old.nome, old.descricao);
+                INSERT INTO produtos_busca (rowid, nome, descricao)
+                VALUES (new.id, new.nome, new.descricao);
+            END
+        ''',
+        # O nome pesa mais que a descrição no bm25 usado por ORDER BY rank
+        "INSERT INTO produtos_busca (produtos_busca, rank) VALUES ('rank', 'bm25(10.0, 1.0)')",
+        "INSERT INTO produtos_busca (produtos_busca) VALUES ('rebuild')",
+    ]),
+    (4, "Índices para filtros e ordenações do catálogo", [
+        # consultar_produtos: ordenação por preço/avaliação e faixa de preço
+        'CREATE INDEX IF NOT EXISTS idx_produtos_preco ON produtos (preco)',
+        'CREATE INDEX IF NOT EXISTS idx_produtos_avaliacao ON produtos (avaliacao_media)',
+        'CREATE INDEX IF NOT EXISTS idx_produtos_categoria_preco ON produtos (categoria, preco)',
+    ]),
+    (5, "Agregados incrementais de avaliações (soma e histograma por estrela)", [
+        'ALTER TABLE produtos ADD COLUMN soma_notas INTEGER DEFAULT 0',
+        'ALTER TABLE produtos ADD COLUMN estrelas_1 INTEGER DEFAULT 0',
+        'ALTER TABLE produtos ADD COLUMN estrelas_2 INTEGER DEFAULT 0',
+        'ALTER TABLE produtos ADD COLUMN estrelas_3 INTEGER DEFAULT 0',
+        'ALTER TABLE produtos ADD COLUMN estrelas_4 INTEGER DEFAULT 0',
+        'ALTER TABLE produtos ADD COLUMN estrelas_5 INTEGER DEFAULT 0',
+        *RECALCULAR_AVALIACOES,
+    ]),
+    (6, "SKU dos produtos (chave natural da importação)", [
+        'ALTER TABLE produtos ADD COLUMN sku TEXT',
+        'CREATE UNIQUE INDEX IF NOT EXISTS idx_produtos_sku ON produtos (sku)',
+    ]),
+    (7, "Carrinhos persistentes compartilhados entre processos", [
+        '''
+            CREATE TABLE IF NOT EXISTS carrinhos (
+                chave TEXT PRIMARY KEY,
+                itens TEXT NOT NULL,
+                atualizado_em INTEGER NOT NULL
+            ) WITHOUT ROWID
+        ''',
+        'CREATE INDEX IF NOT EXISTS idx_carrinhos_atualizado ON carrinhos (atualizado_em)',
+    ]),
+    (8, "Resumo de compras por usuário (histórico de pedidos)", [
+        '''
+            CREATE TABLE IF NOT EXISTS resumo_usuarios (
+                usuario_id INTEGER PRIMARY KEY,
+                total_pedidos INTEGER NOT NULL DEFAULT 0,
+                valor_total REAL NOT NULL DEFAULT 0,
+                ultimo_pedido_id INTEGER,
+                ultimo_pedido_em TIMESTAMP
+            )
+        ''',
+        *RECALCULAR_RESUMO_USUARIOS,
+        # consultar_pedidos_usuario (ORDER BY data_pedido DESC, id DESC); o
+        # índice antigo guardava o id em ordem crescente e exigia ordenação
+        'DROP INDEX IF EXISTS idx_pedidos_usuario_data',
+        'CREATE INDEX IF NOT EXISTS idx_pedidos_usuario_historico ON pedidos (usuario_id, data_pedido DESC, id DESC)',
+    ]),
+    (9, "Resumos de vendas para relatórios (src/relatorios.py)", [
+        '''
+            CREATE TABLE IF NOT EXISTS vendas_categoria_dia (
+                dia TEXT NOT NULL,
+                categoria TEXT NOT NULL,
+                pedidos INTEGER NOT NULL DEFAULT 0,
+                unidades INTEGER NOT NULL DEFAULT 0,
+                receita REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (dia, categoria)
+            ) WITHOUT ROWID
+        ''',
+        '''
+            CREATE TABLE IF NOT EXISTS vendas_produto (
+                produto_id INTEGER PRIMARY KEY,
+                pedidos INTEGER NOT NULL DEFAULT 0,
+                unidades INTEGER NOT NULL DEFAULT 0,
+                receita REAL NOT NULL DEFAULT 0
+            )
+        ''',
+        # Relatorios.mais_vendidos (ORDER BY unidades DESC LIMIT ?)
+        'CREATE INDEX IF NOT EXISTS idx_vendas_produto_unidades ON vendas_produto (unidades DESC)',
+        '''
+            CREATE TABLE IF NOT EXISTS pedidos_por_status (
+                status TEXT PRIMARY KEY,
+                pedidos INTEGER NOT NULL DEFAULT 0,
+                valor_total REAL NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        ''',
+        *RECALCULAR_VENDAS,
+    ]),
+    (10, "Itens dos carrinhos em linhas (alterações somadas no banco, não sobrescritas)", [
+        '''
+            CREATE TABLE IF NOT EXISTS itens_carrinho (
+                chave TEXT NOT NULL,
+                produto_id INTEGER NOT NULL,
+                quantidade INTEGER NOT NULL,
+                preco_unitario REAL NOT NULL,
+                PRIMARY KEY (chave, produto_id)
+            ) WITHOUT ROWID
+        ''',
+        _carrinhos_em_linhas,
+        'ALTER TABLE carrinhos DROP COLUMN itens',
+    ]),
+]
+
+VERSAO_MAIS_RECENTE = MIGRACOES[-1][0]
+
+
+def obter_versao(conexao: sqlite3.Connection) -> int:
+    """Retorna a versão atual do esquema."""
+    return conexao.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migracoes_pendentes(conexao: sqlite3.Connection) -> List[Tuple[int, str]]:
+    """Lista (versão, descrição) das migrações ainda não aplicadas."""
+    versao = obter_versao(conexao)
+    return [(numero, descricao) for numero, descricao, _ in MIGRACOES if numero > versao]
+
+
+def aplicar_migracoes(conexao: sqlite3.Connection) -> List[int]:
+    """Aplica as migrações pendentes e retorna as versões aplicadas."""
+    aplicadas = []
+    if obter_versao(conexao) >= VERSAO_MAIS_RECENTE:
+        return aplicadas
+
+    cursor = conexao.cursor()
+    for numero, _descricao, passos in MIGRACOES:
+        # BEGIN IMMEDIATE trava a escrita; a versão é relida dentro da
+        # transação para que dois processos não apliquem a mesma migração.
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            if obter_versao(conexao) >= numero:
+                conexao.rollback()
+                continue
+            for passo in passos:
+                if callable(passo):
+                    passo(cursor)
+                else:
+                    cursor.execute(passo)
+            cursor.execute(f'PRAGMA user_version = {int(numero)}')
+            conexao.commit()
+        except Exception:
+            conexao.rollback()
+            raise
+        aplicadas.append(numero)
+
+    return aplicadas
@@ -1,43 +1,111 @@
 """
 Modelos de dados para a loja online.
+
+As classes usam __slots__ (sem __dict__ por instância), o que reduz a
+memória de listas grandes de produtos. As datas vindas do banco chegam como
+texto e só são convertidas em datetime quando lidas.
 """
 
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Union
+
+Data = Union[datetime, str, None]
+
+
+def _converter_data(valor: Data) -> Optional[datetime]:
+    """Converte o texto de uma coluna TIMESTAMP do SQLite em datetime."""
+    if isinstance(valor, str):
+        return datetime.fromisoformat(valor)
+    return valor
 
 
 class Produto:
     """Representa um produto na loja."""
     
+    __slots__ = ('id', 'sku', 'nome', 'descricao', 'preco', 'estoque', 'categoria',
+                 '_data_criacao', 'avaliacao_media', 'total_avaliacoes')
+    
     def __init__(self, nome: str, descricao: str, preco: float, estoque: int, 
-                 categoria: str, id: Optional[int] = None):
+                 categoria: str, id: Optional[int] = None, sku: Optional[str] = None,
+                 data_criacao: Data = None, avaliacao_media: float = 0.0,
+                 total_avaliacoes: int = 0):
         self.id = id
+        self.sku = sku  # Código do fornecedor, único quando informado
         self.nome = nome
         self.descricao = descricao
         self.preco = preco
         self.estoque = estoque
         self.categoria = categoria
-        self.data_criacao = datetime.now()
-        self.avaliacao_media = 0.0
-        self.total_avaliacoes = 0
+        self._data_criacao = data_criacao if data_criacao is not None else datetime.now()
+        self.avaliacao_media = avaliacao_media
+        self.total_avaliacoes = total_avaliacoes
+    
+    @property
+    def data_criacao(self) -> datetime:
+        self._data_criacao = _converter_data(self._data_criacao)
+        return self._data_criacao
+    
+    @data_criacao.setter
+    def data_criacao(self, valor: Data):
+        self._data_criacao = valor
     
     def __repr__(self):
         return f"Produto(id={self.id}, nome='{self.nome}', preco=R${self.preco})"
 
 
+class PaginaProdutos:
+    """Uma página de resultados de BancoDados.consultar_produtos."""
+    
+    __slots__ = ('produtos', 'proximo_cursor', 'trechos')
+    
+    def __init__(self, produtos: list, proximo_cursor: Optional[str] = None,
+                 trechos: Optional[dict] = None):
+        self.produtos = produtos  # Lista de Produto
+        self.proximo_cursor = proximo_cursor  # None quando é a última página
+        self.trechos = trechos or {}  # produto_id -> trecho encontrado na busca
+    
+    def __repr__(self):
+        return f"PaginaProdutos(produtos={len(self.produtos)}, proximo_cursor={self.proximo_cursor!r})"
+
+
+class PaginaPedidos:
+    """Uma página do histórico de BancoDados.consultar_pedidos_usuario."""
+    
+    __slots__ = ('pedidos', 'proximo_cursor')
+    
+    def __init__(self, pedidos: list, proximo_cursor: Optional[str] = None):
+        self.pedidos = pedidos  # Lista de dict, cada um com a lista 'itens'
+        self.proximo_cursor = proximo_cursor  # None quando é a última página
+    
+    def __repr__(self):
+        return f"PaginaPedidos(pedidos={len(self.pedidos)}, proximo_cursor={self.proximo_cursor!r})"
+
+
 class Usuario:
     """Representa um usuário da loja."""
     
+    __slots__ = ('id', 'nome', 'email', 'senha', 'telefone', 'endereco', '_data_cadastro', 'ativo')
+    
     def __init__(self, nome: str, email: str, senha: str, telefone: str = "", 
-                 endereco: str = "", id: Optional[int] = None):
+                 endereco: str = "", id: Optional[int] = None, data_cadastro: Data = None,
+                 ativo: bool = True):
         self.id = id
         self.nome = nome
         self.email = email
         self.senha = senha
         self.telefone = telefone
         self.endereco = endereco
-        self.data_cadastro = datetime.now()
-        self.ativo = True
+        self._data_cadastro = data_cadastro if data_cadastro is not None else datetime.now()
+        self.ativo = ativo
+    
+    @property
+    def data_cadastro(self) -> datetime:
+        self._data_cadastro = _converter_data(self._data_cadastro)
+        return self._data_cadastro
+    
+    @data_cadastro.setter
+    def data_cadastro(self, valor: Data):
+        self._data_cadastro = valor
     
     def __repr__(self):
         return f"Usuario(id={self.id}, nome='{self.nome}', email='{self.email}')"
@@ -46,6 +114,8 @@ class Usuario:
 class ItemCarrinho:
     """Representa um item no carrinho."""
     
+    __slots__ = ('produto_id', 'quantidade', 'preco_unitario')
+    
     def __init__(self, produto_id: int, quantidade: int, preco_unitario: float):
         self.produto_id = produto_id
         self.quantidade = quantidade
@@ -68,16 +138,39 @@ class Pedido:
     STATUS_ENTREGUE = "Entregue"
     STATUS_CANCELADO = "Cancelado"
     
+    __slots__ = ('id', 'usuario_id', 'items', 'endereco_entrega', 'valor_frete', 'status',
+                 '_data_pedido', '_data_entrega')
+    
     def __init__(self, usuario_id: int, items: list, endereco_entrega: str, 
-                 valor_frete: float = 0.0, id: Optional[int] = None):
+                 valor_frete: float = 0.0, id: Optional[int] = None,
+                 status: str = STATUS_PENDENTE, data_pedido: Data = None,
+                 data_entrega: Data = None):
         self.id = id
         self.usuario_id = usuario_id
         self.items = items  # Lista de ItemCarrinho
         self.endereco_entrega = endereco_entrega
         self.valor_frete = valor_frete
-        self.status = self.STATUS_PENDENTE
-        self.data_pedido = datetime.now()
-        self.data_entrega = None
+        self.status = status
+        self._data_pedido = data_pedido if data_pedido is not None else datetime.now()
+        self._data_entrega = data_entrega
+    
+    @property
+    def data_pedido(self) -> datetime:
+        self._data_pedido = _converter_data(self._data_pedido)
+        return self._data_pedido
+    
+    @data_pedido.setter
+    def data_pedido(self, valor: Data):
+        self._data_pedido = valor
+    
+    @property
+    def data_entrega(self) -> Optional[datetime]:
+        self._data_entrega = _converter_data(self._data_entrega)
+        return self._data_entrega
+    
+    @data_entrega.setter
+    def data_entrega(self, valor: Data):
+        self._data_entrega = valor
     
     def obter_subtotal(self) -> float:
         """Retorna o subtotal dos produtos."""
@@ -91,17 +184,46 @@ class Pedido:
         return f"Pedido(id={self.id}, usuario_id={self.usuario_id}, status='{self.status}')"
 
 
+class ResultadoCheckout:
+    """Resultado de BancoDados.finalizar_pedido."""
+    
+    __slots__ = ('pedido_id', 'itens_indisponiveis')
+    
+    def __init__(self, pedido_id: Optional[int] = None, itens_indisponiveis: Optional[list] = None):
+        self.pedido_id = pedido_id
+        # Dicts com produto_id, solicitado e disponivel de cada item sem estoque
+        self.itens_indisponiveis = itens_indisponiveis or []
+    
+    @property
+    def sucesso(self) -> bool:
+        return self.pedido_id is not None
+    
+    def __repr__(self):
+        return f"ResultadoCheckout(pedido_id={self.pedido_id}, indisponiveis={len(self.itens_indisponiveis)})"
+
+
 class Avaliacao:
     """Representa uma avaliação de produto."""
     
+    __slots__ = ('id', 'produto_id', 'usuario_id', 'nota', 'comentario', '_data_avaliacao')
+    
     def __init__(self, produto_id: int, usuario_id: int, nota: int, comentario: str = "", 
-                 id: Optional[int] = None):
+                 id: Optional[int] = None, data_avaliacao: Data = None):
         self.id = id
         self.produto_id = produto_id
         self.usuario_id = usuario_id
         self.nota = nota  # 1 a 5
         self.comentario = comentario
-        self.data_avaliacao = datetime.now()
+        self._data_avaliacao = data_avaliacao if data_avaliacao is not None else datetime.now()
+    
+    @property
+    def data_avaliacao(self) -> datetime:
+        self._data_avaliacao = _converter_data(self._data_avaliacao)
+        return self._data_avaliacao
+    
+    @data_avaliacao.setter
+    def data_avaliacao(self, valor: Data):
+        self._data_avaliacao = valor
     
     def __repr__(self):
         return f"Avaliacao(produto_id={self.produto_id}, nota={self.nota})"
@@ -0,0 +1,177 @@
+"""
+Verificação dos planos de consulta (EXPLAIN QUERY PLAN) do BancoDados.
+
+Executa todos os métodos públicos de BancoDados num banco temporário,
+captura os comandos SQL emitidos e reprova os que fazem varredura
+completa de tabela ou ordenação temporária.
+"""
+
+import os
+import re
+import tempfile
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.banco_dados import BancoDados, _codificar_cursor
+from src.modelo import Produto, Usuario, ItemCarrinho, Pedido, Avaliacao
+
+
+# Métodos que não emitem consultas a verificar (inserir_avaliacao roda no
+# cursor de quem chama; seus comandos são os de criar_avaliacao)
+METODOS_IGNORADOS = {'obter_conexao', 'obter_conexao_leitura', 'metricas_pool', 'fechar_pools',
+                     'criar_tabelas', 'registrar_ouvinte_escrita', 'invalidar_cache', 'invalidar_tudo',
+                     'inserir_avaliacao', 'validar_avaliacao'}
+
+# Varreduras esperadas: (método, trecho do SQL, passo do plano aceito, motivo).
+# O passo aceito é uma regex: os demais passos da mesma consulta continuam
+# sendo verificados.
+VARREDURAS_PERMITIDAS = [
+    ('consultar_produtos', 'ORDER BY p.id DESC', r'SCAN p$',
+     "percorre a tabela na ordem do id e para no LIMIT"),
+    ('consultar_produtos', 'produtos_busca MATCH', r'USE TEMP B-TREE',
+     "ordena só os produtos encontrados pelo FTS5"),
+    ('consultar_pedidos_usuario', 'FROM pagina pg', r'SCAN pg$|USE TEMP B-TREE',
+     "ordena só os pedidos da página (LIMIT) e seus itens"),
+    ('reconciliar_avaliacoes', 'produtos', r'',
+     "recálculo em lote de todos os produtos (manutenção)"),
+]
+
+# Varredura completa, ordenação temporária ou índice automático (o SQLite
+# monta um índice provisório varrendo a tabela a cada execução)
+_PROBLEMA = re.compile(r"^(SCAN (?!CONSTANT)\w+( |$)(?!USING|VIRTUAL TABLE)|USE TEMP B-TREE"
+                       r"|SEARCH \w+ USING AUTOMATIC)")
+
+
+class BancoDadosRastreado(BancoDados):
+    """BancoDados que registra cada comando SQL executado."""
+
+    def __init__(self, caminho_db: str):
+        self.metodo_atual = None
+        self.comandos: List[Tuple[str, str]] = []
+        super().__init__(caminho_db)
+
+    def obter_conexao(self):
+        conexao = super().obter_conexao()
+        conexao.set_trace_callback(self._registrar)
+        return conexao
+
+    def _registrar(self, sql: str):
+        if self.metodo_atual and not sql.lstrip().startswith('--'):
+            self.comandos.append((self.metodo_atual, sql))
+
+
+def _casos(db: BancoDados) -> Dict[str, Callable[[], object]]:
+    """Chamadas de exemplo para cada método público do BancoDados."""
+    return {
+        'criar_produto': lambda: db.criar_produto(
+            Produto("Teclado", "Teclado mecânico", 200.0, 5, "Periféricos")),
+        'salvar_produtos_em_lote': lambda: db.salvar_produtos_em_lote([
+            Produto("Mouse", "Mouse sem fio", 90.0, 3, "Periféricos", sku="MS-1")]),
+        'obter_produto': lambda: db.obter_produto(1),
+        'obter_produtos_por_ids': lambda: db.obter_produtos_por_ids([1, 2, 3]),
+        'obter_todos_produtos': lambda: db.obter_todos_produtos(),
+        'iterar_produtos': lambda: list(db.iterar_produtos()),
+        'obter_produtos_por_categoria': lambda: db.obter_produtos_por_categoria("Periféricos"),
+        'consultar_produtos': lambda: (
+            db.consultar_produtos(preco_min=10, preco_max=500, somente_em_estoque=True),
+            db.consultar_produtos(categoria="Periféricos", ordenar_por='preco'),
+            db.consultar_produtos(ordenar_por='avaliacao', avaliacao_minima=4,
+                                  cursor=_codificar_cursor(4.5, 1)),
+            db.consultar_produtos(ordenar_por='recentes'),
+            db.consultar_produtos(termo="teclado", ordenar_por='relevancia'),
+        ),
+        'buscar_produtos': lambda: db.buscar_produtos("teclado"),
+        'buscar_produtos_com_trecho': lambda: db.buscar_produtos_com_trecho("mecanico"),
+        'reconstruir_indice_busca': lambda: db.reconstruir_indice_busca(),
+        'atualizar_estoque': lambda: db.atualizar_estoque(1, 1),
+        'criar_usuario': lambda: db.criar_usuario(
+            Usuario("Ana", "ana@exemplo.com", "segredo")),
+        'obter_usuario': lambda: db.obter_usuario(1),
+        'verificar_login': lambda: db.verificar_login("ana@exemplo.com", "segredo"),
+        'criar_pedido': lambda: db.criar_pedido(
+            Pedido(1, [ItemCarrinho(1, 1, 200.0)], "Rua A, 1")),
+        'finalizar_pedido': lambda: (
+            db.finalizar_pedido(Pedido(1, [ItemCarrinho(1, 1, 200.0)], "Rua A, 1")),
+            db.finalizar_pedido(Pedido(1, [ItemCarrinho(1, 999, 200.0)], "Rua A, 1")),
+        ),
+        'obter_pedidos_usuario': lambda: db.obter_pedidos_usuario(1),
+        'iterar_pedidos_usuario': lambda: list(db.iterar_pedidos_usuario(1)),
+        'consultar_pedidos_usuario': lambda: (
+            db.consultar_pedidos_usuario(1, limite=1),
+            db.consultar_pedidos_usuario(1, cursor=_codificar_cursor('2025-01-01 00:00:00', 5)),
+        ),
+        'obter_resumo_usuario': lambda: db.obter_resumo_usuario(1),
+        'iterar_itens_pedidos': lambda: list(db.iterar_itens_pedidos(0, '2025-01-01', '2025-12-31')),
+        'criar_avaliacao': lambda: db.criar_avaliacao(Avaliacao(1, 1, 5, "Ótimo")),
+        'obter_avaliacoes_produto': lambda: db.obter_avaliacoes_produto(1),
+        'iterar_avaliacoes_produto': lambda: list(db.iterar_avaliacoes_produto(1)),
+        'iterar_avaliacoes': lambda: list(db.iterar_avaliacoes(0, '2025-01-01')),
+        'obter_histograma_avaliacoes': lambda: db.obter_histograma_avaliacoes(1),
+        'reconciliar_avaliacoes': lambda: db.reconciliar_avaliacoes(),
+        'reconstruir_resumos': lambda: db.reconstruir_resumos(),
+        'obter_categorias': lambda: db.obter_categorias(),
+    }
+
+
+def metodos_publicos() -> List[str]:
+    return [nome for nome in dir(BancoDados)
+            if not nome.startswith('_') and callable(getattr(BancoDados, nome))
+            and nome not in METODOS_IGNORADOS]
+
+
+def _precisa_plano(sql: str) -> bool:
+    # Comandos internos das tabelas virtuais (FTS5) referenciam 'main'.<tabela>
+    if "'main'." in sql:
+        return False
+    primeira = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ''
+    return primeira in ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+
+
+def _varredura_permitida(metodo: str, sql: str, detalhe: str) -> bool:
+    sql = ' '.join(sql.split())
+    return any(metodo == permitido and trecho in sql and re.match(passo, detalhe)
+               for permitido, trecho, passo, _motivo in VARREDURAS_PERMITIDAS)
+
+
+def verificar_planos(preparar: Optional[Callable[[str], object]] = None) -> Tuple[List[str], List[str]]:
+    """Executa a verificação e retorna (relatório, problemas).
+
+    preparar(caminho_db), se informado, popula o banco antes (ex.: com
+    benchmarks.gerador.gerar_banco), para conferir os planos com as
+    estatísticas de um catálogo grande.
+    """
+    relatorio, problemas = [], []
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho_db = os.path.join(diretorio, "planos.db")
+        if preparar is not None:
+            preparar(caminho_db)
+        db = BancoDadosRastreado(caminho_db)
+        casos = _casos(db)
+
+        for nome in metodos_publicos():
+            if nome not in casos:
+                problemas.append(f"{nome}: método público sem caso de verificação")
+
+        for nome, chamada in casos.items():
+            db.metodo_atual = nome
+            chamada()
+        db.metodo_atual = None
+
+        conexao = db.obter_conexao()
+        try:
+            vistos = set()
+            for metodo, sql in db.comandos:
+                if not _precisa_plano(sql) or (metodo, sql) in vistos:
+                    continue
+                vistos.add((metodo, sql))
+
+                plano = [linha[3] for linha in conexao.execute('EXPLAIN QUERY PLAN ' + sql)]
+                relatorio.append(f"[{metodo}] {' '.join(sql.split())}")
+                for detalhe in plano:
+                    relatorio.append(f"    {detalhe}")
+                    if _PROBLEMA.match(detalhe) and not _varredura_permitida(metodo, sql, detalhe):
+                        problemas.append(f"{metodo}: {detalhe}")
+        finally:
+            conexao.close()
+
+    return relatorio, problemas
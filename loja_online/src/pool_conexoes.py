@@ -0,0 +1,244 @@
+"""
+Pool de conexões SQLite reutilizáveis para a loja online.
+
+Um pool somente_leitura abre o arquivo com mode=ro e PRAGMA query_only:
+em WAL, cada leitura enxerga o último commit sem esperar o escritor.
+"""
+
+import os
+import sqlite3
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+
+# Pragmas aplicados em cada conexão nova do pool
+PRAGMAS_PADRAO = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -16000,       # negativo = KiB (~16 MB por conexão)
+    'mmap_size': 134217728,     # 128 MB
+    'busy_timeout': 5000,       # milissegundos
+}
+
+# Conexões somente leitura por padrão. Com o GIL, cada leitor a mais é mais
+# uma thread disputando a CPU com a única conexão de escrita: numa CPU, com
+# o checkout saturado, 8 leitores derrubam o checkout para ~270/s e 2 o
+# mantêm em ~1.300/s com a navegação em ~800/s (benchmarks/leitura_checkout.py)
+TAMANHO_POOL_LEITURA = min(8, 2 * (os.cpu_count() or 1))
+
+_VALORES_TEXTO = {
+    'journal_mode': {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'},
+    'synchronous': {'OFF', 'NORMAL', 'FULL', 'EXTRA', '0', '1', '2', '3'},
+}
+
+
+def _validar_pragmas(pragmas: dict) -> dict:
+    """Valida nomes e valores dos pragmas antes de montá-los em SQL."""
+    validados = {}
+    for nome, valor in pragmas.items():
+        if nome not in PRAGMAS_PADRAO:
+            raise ValueError(f"Pragma não suportado: {nome}")
+        if nome in _VALORES_TEXTO:
+            valor = str(valor).upper()
+            if valor not in _VALORES_TEXTO[nome]:
+                raise ValueError(f"Valor inválido para {nome}: {valor}")
+        else:
+            valor = int(valor)
+        validados[nome] = valor
+    return validados
+
+
+class ConexaoPool(sqlite3.Connection):
+    """Conexão que volta para o pool em vez de ser fechada."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+
+    def close(self):
+        if self.pool is None:
+            super().close()
+        else:
+            self.pool.devolver(self)
+
+    def fechar_de_verdade(self):
+        """Fecha a conexão SQLite subjacente."""
+        super().close()
+
+
+class PoolConexoes:
+    """Mantém conexões abertas e as reaproveita entre chamadas.
+
+    Cada thread tem preferência pela última conexão que usou; se ela
+    estiver ocupada, qualquer conexão livre é reaproveitada. Quando o
+    limite de conexões abertas é atingido, a chamada espera uma ser
+    devolvida, por ordem de chegada; com tamanho_maximo=1 o pool serializa
+    quem o usa.
+    """
+
+    def __init__(self, caminho_db: str, tamanho_maximo: int = 8,
+                 pragmas: Optional[dict] = None, tempo_espera: float = 30.0,
+                 somente_leitura: bool = False):
+        self.caminho_db = caminho_db
+        self.tamanho_maximo = tamanho_maximo
+        self.tempo_espera = tempo_espera
+        self.somente_leitura = somente_leitura
+        self.pragmas = dict(PRAGMAS_PADRAO)
+        self.pragmas.update(_validar_pragmas(pragmas or {}))
+        if somente_leitura:
+            # O modo do journal é do arquivo: quem define é o pool de escrita
+            del self.pragmas['journal_mode']
+
+        self._livres: List[ConexaoPool] = []
+        self._abertas = 0
+        self._fechado = False
+        self._trava = threading.Lock()
+        self._condicao = threading.Condition(self._trava)
+        # Quem espera uma conexão, em ordem de chegada (uma Condition para cada)
+        self._fila: deque = deque()
+        self._local = threading.local()
+
+        # Métricas
+        self.checkouts = 0
+        self.esperas = 0
+        self.reutilizadas = 0
+        self.criadas = 0
+
+    def _criar_conexao(self) -> ConexaoPool:
+        """Abre uma conexão nova e aplica os pragmas configurados."""
+        if self.somente_leitura:
+            uri = f"file:{quote(os.path.abspath(self.caminho_db))}?mode=ro"
+            conexao = sqlite3.connect(uri, uri=True, factory=ConexaoPool,
+                                      check_same_thread=False)
+        else:
+            conexao = sqlite3.connect(self.caminho_db, factory=ConexaoPool,
+                                      check_same_thread=False)
+        conexao.row_factory = sqlite3.Row
+        for nome, valor in self.pragmas.items():
+            conexao.execute(f"PRAGMA {nome} = {valor}")
+        if self.somente_leitura:
+            conexao.execute("PRAGMA query_only = 1")
+        conexao.pool = self
+        return conexao
+
+    def _retirar_livre(self) -> ConexaoPool:
+        """Retira uma conexão livre, preferindo a da thread atual."""
+        preferida = getattr(self._local, 'conexao', None)
+        for indice, conexao in enumerate(self._livres):
+            if conexao is preferida:
+                return self._livres.pop(indice)
+        return self._livres.pop()
+
+    def obter(self) -> ConexaoPool:
+        """Retira uma conexão do pool, criando ou esperando se necessário."""
+        with self._condicao:
+            if self._fechado:
+                raise sqlite3.ProgrammingError("Pool de conexões fechado")
+            self.checkouts += 1
+
+            # Quem chega não passa à frente de quem já está esperando
+            if self._fila or not self._tem_vaga():
+                self.esperas += 1
+                vez = threading.Condition(self._trava)
+                self._fila.append(vez)
+                chegou = vez.wait_for(lambda: self._fila[0] is vez and self._tem_vaga(),
+                                      self.tempo_espera)
+                self._fila.remove(vez)
+                self._chamar_proximo()
+                if not chegou:
+                    raise sqlite3.OperationalError("Tempo esgotado esperando conexão do pool")
+
+            if self._livres:
+                conexao = self._retirar_livre()
+                self.reutilizadas += 1
+                self._local.conexao = conexao
+                return conexao
+
+            self._abertas += 1
+
+        try:
+            conexao = self._criar_conexao()
+        except Exception:
+            with self._condicao:
+                self._abertas -= 1
+                self._chamar_proximo()
+            raise
+
+        with self._condicao:
+            self.criadas += 1
+        self._local.conexao = conexao
+        return conexao
+
+    def devolver(self, conexao: ConexaoPool):
+        """Devolve uma conexão ao pool, desfazendo transações pendentes."""
+        if conexao.in_transaction:
+            conexao.rollback()
+
+        with self._condicao:
+            if self._fechado:
+                self._abertas -= 1
+                conexao.fechar_de_verdade()
+                return
+            self._livres.append(conexao)
+            self._chamar_proximo()
+
+    def _tem_vaga(self) -> bool:
+        return bool(self._livres) or self._abertas < self.tamanho_maximo
+
+    def _chamar_proximo(self):
+        """Acorda só o primeiro da fila, se houver conexão para ele (com a trava)."""
+        if self._fila and self._tem_vaga():
+            self._fila[0].notify()
+
+    def fechar(self):
+        """Fecha todas as conexões livres; as em uso fecham ao serem devolvidas."""
+        with self._condicao:
+            self._fechado = True
+            for conexao in self._livres:
+                conexao.fechar_de_verdade()
+            self._abertas -= len(self._livres)
+            self._livres.clear()
+
+    def metricas(self) -> dict:
+        """Retorna as métricas de uso do pool."""
+        with self._condicao:
+            return {
+                'checkouts': self.checkouts,
+                'esperas': self.esperas,
+                'reutilizadas': self.reutilizadas,
+                'criadas': self.criadas,
+                'abertas': self._abertas,
+                'livres': len(self._livres),
+                'taxa_reuso': self.reutilizadas / self.checkouts if self.checkouts else 0.0,
+            }
+
+
+_pools: Dict[Tuple[str, bool], PoolConexoes] = {}
+_trava_pools = threading.Lock()
+
+
+def obter_pool(caminho_db: str, tamanho_maximo: int = 8,
+               pragmas: Optional[dict] = None, somente_leitura: bool = False) -> PoolConexoes:
+    """Retorna o pool do banco informado, criando-o na primeira chamada.
+
+    O pool fica guardado no módulo, então sobrevive a novas instâncias de
+    BancoDados (por exemplo, a cada rerun do Streamlit). A configuração
+    usada é a da primeira chamada para cada caminho (e modo de acesso).
+    """
+    chave = (os.path.abspath(caminho_db), somente_leitura)
+    with _trava_pools:
+        pool = _pools.get(chave)
+        if pool is None or pool._fechado:
+            pool = PoolConexoes(caminho_db, tamanho_maximo, pragmas, somente_leitura=somente_leitura)
+            _pools[chave] = pool
+        return pool
+
+
+def fechar_pools():
+    """Fecha todos os pools abertos neste processo."""
+    with _trava_pools:
+        for pool in _pools.values():
+            pool.fechar()
+        _pools.clear()
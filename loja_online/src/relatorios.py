@@ -0,0 +1,97 @@
+"""
+Relatórios de vendas lidos só das tabelas de resumo.
+
+As tabelas vendas_categoria_dia, vendas_produto e pedidos_por_status são
+atualizadas pelo checkout na mesma transação que grava o pedido (ver
+BancoDados._atualizar_resumos), então os relatórios não percorrem pedidos
+nem itens_pedido e o custo não cresce com o histórico. Depois de cargas
+feitas direto no SQLite, refaça os resumos com:
+
+    python gerenciar.py reconstruir-resumos
+
+As datas são 'AAAA-MM-DD' e data_fim é inclusiva. A receita é a soma dos
+itens (quantidade x preço unitário), sem frete.
+"""
+
+from typing import List, Optional
+
+from src.banco_dados import BancoDados
+
+
+def _filtro_periodo(data_inicio: Optional[str], data_fim: Optional[str]) -> tuple:
+    condicoes, parametros = [], []
+    if data_inicio:
+        condicoes.append('dia >= ?')
+        parametros.append(data_inicio)
+    if data_fim:
+        condicoes.append('dia <= ?')
+        parametros.append(data_fim)
+    return condicoes, parametros
+
+
+class Relatorios:
+    """Consultas de vendas sobre os resumos mantidos pelo checkout."""
+
+    def __init__(self, db: BancoDados):
+        self.db = db
+
+    def _consultar(self, sql: str, parametros) -> List[dict]:
+        conexao = self.db.obter_conexao_leitura()
+        try:
+            return [dict(linha) for linha in conexao.execute(sql, parametros)]
+        finally:
+            conexao.close()
+
+    def receita_por_categoria(self, data_inicio: Optional[str] = None,
+                              data_fim: Optional[str] = None) -> List[dict]:
+        """Pedidos, unidades e receita de cada categoria no período, da maior receita para a menor."""
+        condicoes, parametros = _filtro_periodo(data_inicio, data_fim)
+        return self._consultar(f'''
+            SELECT categoria, SUM(pedidos) AS pedidos, SUM(unidades) AS unidades,
+                   ROUND(SUM(receita), 2) AS receita
+            FROM vendas_categoria_dia
+            {'WHERE ' + ' AND '.join(condicoes) if condicoes else ''}
+            GROUP BY categoria
+            ORDER BY receita DESC
+        ''', parametros)
+
+    def receita_diaria(self, data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                       categoria: Optional[str] = None) -> List[dict]:
+        """Unidades e receita por dia (de uma categoria ou de todas), em ordem de data."""
+        condicoes, parametros = _filtro_periodo(data_inicio, data_fim)
+        if categoria is not None:
+            condicoes.append('categoria = ?')
+            parametros.append(categoria)
+        return self._consultar(f'''
+            SELECT dia, SUM(unidades) AS unidades, ROUND(SUM(receita), 2) AS receita
+            FROM vendas_categoria_dia
+            {'WHERE ' + ' AND '.join(condicoes) if condicoes else ''}
+            GROUP BY dia
+            ORDER BY dia
+        ''', parametros)
+
+    def mais_vendidos(self, limite: int = 10, categoria: Optional[str] = None) -> List[dict]:
+        """Produtos com mais unidades vendidas em todo o histórico."""
+        if limite < 1:
+            raise ValueError("O limite deve ser pelo menos 1")
+        condicao, parametros = '', [limite]
+        if categoria is not None:
+            condicao = 'WHERE p.categoria = ?'
+            parametros.insert(0, categoria)
+        return self._consultar(f'''
+            SELECT v.produto_id, p.nome, p.categoria, v.pedidos, v.unidades,
+                   ROUND(v.receita, 2) AS receita
+            FROM vendas_produto v
+            LEFT JOIN produtos p ON p.id = v.produto_id
+            {condicao}
+            ORDER BY v.unidades DESC
+            LIMIT ?
+        ''', parametros)
+
+    def pedidos_por_status(self) -> List[dict]:
+        """Quantidade e valor total (com frete) dos pedidos em cada status."""
+        return self._consultar('''
+            SELECT status, pedidos, ROUND(valor_total, 2) AS valor_total
+            FROM pedidos_por_status
+            ORDER BY pedidos DESC
+        ''', ())
@@ -2,7 +2,15 @@
 Funções utilitárias para a loja online.
 """
 
+import secrets
+import time
+from contextlib import contextmanager
+
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
+from typing import Optional
+from src.carrinhos import ArmazemCarrinhos, chave_usuario, chave_visitante
+from src.frete import calcular_frete
 from src.modelo import Produto
 
 
@@ -11,19 +19,19 @@ def formatar_moeda(valor: float) -> str:
     return f"R$ {valor:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
 
 
-def calcular_frete(valor_pedido: float) -> float:
-    """Calcula o valor do frete baseado no valor do pedido."""
-    if valor_pedido >= 100:
-        return 0.0  # Frete grátis
-    elif valor_pedido >= 50:
-        return 10.0
-    else:
-        return 15.0
+# Armazém dos carrinhos (configurar_carrinhos); sem ele, o carrinho fica na sessão
+_armazem: Optional[ArmazemCarrinhos] = None
+
+
+def configurar_carrinhos(armazem: Optional[ArmazemCarrinhos]):
+    """Passa a guardar os carrinhos no armazém (compartilhado entre processos)."""
+    global _armazem
+    _armazem = armazem
 
 
 def gerar_carrinho_padrao():
     """Gera um carrinho padrão na sessão."""
-    if 'carrinho' not in st.session_state:
+    if 'carrinho' not in st.session_state and _armazem is None:
         st.session_state.carrinho = {}
     if 'usuario_id' not in st.session_state:
         st.session_state.usuario_id = None
@@ -31,14 +39,41 @@ def gerar_carrinho_padrao():
         st.session_state.usuario_nome = None
 
 
+def _chave_carrinho() -> str:
+    """Chave do usuário logado, ou do visitante pelo token ?carrinho= da URL.
+    
+    O token na URL é o que permite a outro processo (ou após reiniciar)
+    encontrar o carrinho de quem não fez login.
+    """
+    if st.session_state.get('usuario_id') is not None:
+        return chave_usuario(st.session_state.usuario_id)
+    token = st.query_params.get('carrinho')
+    if not token or len(token) > 32 or not token.replace('-', '').replace('_', '').isalnum():
+        token = secrets.token_urlsafe(12)
+        st.query_params['carrinho'] = token
+    return chave_visitante(token)
+
+
+def obter_itens_carrinho() -> dict:
+    """Itens do carrinho: {produto_id: {'quantidade', 'preco_unitario'}}."""
+    gerar_carrinho_padrao()
+    if _armazem is None:
+        return st.session_state.carrinho
+    return _armazem.obter(_chave_carrinho())
+
+
 def adicionar_ao_carrinho(produto_id: int, quantidade: int, preco: float):
     """Adiciona um item ao carrinho."""
     gerar_carrinho_padrao()
+    if _armazem is not None:
+        _armazem.adicionar(_chave_carrinho(), produto_id, quantidade, preco)
+        return
+    itens = st.session_state.carrinho
     
-    if produto_id in st.session_state.carrinho:
-        st.session_state.carrinho[produto_id]['quantidade'] += quantidade
+    if produto_id in itens:
+        itens[produto_id]['quantidade'] += quantidade
     else:
-        st.session_state.carrinho[produto_id] = {
+        itens[produto_id] = {
             'quantidade': quantidade,
             'preco_unitario': preco
         }
@@ -46,16 +81,18 @@ def adicionar_ao_carrinho(produto_id: int, quantidade: int, preco: float):
 
 def remover_do_carrinho(produto_id: int):
     """Remove um item do carrinho."""
-    if produto_id in st.session_state.carrinho:
-        del st.session_state.carrinho[produto_id]
+    gerar_carrinho_padrao()
+    if _armazem is not None:
+        _armazem.remover(_chave_carrinho(), produto_id)
+    else:
+        st.session_state.carrinho.pop(produto_id, None)
 
 
 def obter_total_carrinho() -> float:
     """Calcula o total do carrinho."""
-    gerar_carrinho_padrao()
     total = 0
     
-    for item in st.session_state.carrinho.values():
+    for item in obter_itens_carrinho().values():
         total += item['quantidade'] * item['preco_unitario']
     
     return total
@@ -63,13 +100,16 @@ def obter_total_carrinho() -> float:
 
 def obter_quantidade_carrinho() -> int:
     """Retorna a quantidade de itens no carrinho."""
-    gerar_carrinho_padrao()
-    return sum(item['quantidade'] for item in st.session_state.carrinho.values())
+    return sum(item['quantidade'] for item in obter_itens_carrinho().values())
 
 
 def limpar_carrinho():
     """Limpa o carrinho."""
-    st.session_state.carrinho = {}
+    gerar_carrinho_padrao()
+    if _armazem is not None:
+        _armazem.esvaziar(_chave_carrinho())
+    else:
+        st.session_state.carrinho = {}
 
 
 def efetuou_login() -> bool:
@@ -77,8 +117,87 @@ def efetuou_login() -> bool:
     return st.session_state.usuario_id is not None
 
 
+def efetuar_login(usuario_id: int, usuario_nome: str):
+    """Registra o login na sessão e junta o carrinho do visitante ao do usuário."""
+    gerar_carrinho_padrao()
+    visitante = None if _armazem is None else _chave_carrinho()
+    st.session_state.usuario_id = usuario_id
+    st.session_state.usuario_nome = usuario_nome
+    if visitante is not None:
+        _armazem.mesclar(visitante, chave_usuario(usuario_id))
+
+
 def fazer_logout():
-    """Remove o login do usuário."""
+    """Remove o login do usuário.
+    
+    Com o armazém, o carrinho do usuário continua salvo para o próximo
+    login e o visitante recomeça com um carrinho vazio.
+    """
     st.session_state.usuario_id = None
     st.session_state.usuario_nome = None
-    limpar_carrinho()
+    if _armazem is None:
+        limpar_carrinho()
+    else:
+        st.query_params.pop('carrinho', None)
+
+
+def obter_cursor_pagina(chave: str, filtros: tuple) -> Optional[str]:
+    """Retorna o cursor da página atual de uma listagem paginada.
+    
+    A paginação volta para a primeira página quando os filtros mudam.
+    """
+    estado = st.session_state.setdefault(f"paginacao_{chave}", {"filtros": filtros, "cursores": [None]})
+    if estado["filtros"] != filtros:
+        estado["filtros"] = filtros
+        estado["cursores"] = [None]
+    return estado["cursores"][-1]
+
+
+def _reexecutar(escopo: str):
+    try:
+        st.rerun(scope=escopo)
+    except StreamlitAPIException:
+        # O clique chegou numa execução completa do script (não do fragmento)
+        st.rerun()
+
+
+def exibir_paginacao(chave: str, proximo_cursor: Optional[str], escopo: str = "app"):
+    """Mostra os botões de página anterior/próxima de uma listagem.
+    
+    Dentro de um fragmento, use escopo="fragment" para reexecutar só ele.
+    """
+    estado = st.session_state[f"paginacao_{chave}"]
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if len(estado["cursores"]) > 1 and st.button("⬅️ Anterior", key=f"anterior_{chave}"):
+            estado["cursores"].pop()
+            _reexecutar(escopo)
+    with col2:
+        if proximo_cursor and st.button("Próxima ➡️", key=f"proxima_{chave}"):
+            estado["cursores"].append(proximo_cursor)
+            _reexecutar(escopo)
+
+
+MAXIMO_TEMPOS_EXECUCAO = 50
+
+
+@contextmanager
+def medir_execucao(nome: str):
+    """Guarda na sessão quanto tempo levou um trecho (página ou fragmento).
+    
+    Os últimos MAXIMO_TEMPOS_EXECUCAO tempos de cada nome ficam em
+    st.session_state.tempos_execucao.
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar_tempo_execucao(nome, time.perf_counter() - inicio)
+
+
+def registrar_tempo_execucao(nome: str, segundos: float):
+    """Acrescenta um tempo medido às medições da sessão."""
+    tempos = st.session_state.setdefault("tempos_execucao", {}).setdefault(nome, [])
+    tempos.append(segundos)
+    del tempos[:-MAXIMO_TEMPOS_EXECUCAO]
@@ -0,0 +1,44 @@
+"""
+Configuração dos testes: rode `python -m pytest` na pasta loja_online.
+
+Cada teste usa um banco novo numa pasta temporária.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.banco_dados import BancoDados  # noqa: E402
+from src.modelo import Produto, Usuario  # noqa: E402
+
+
+@pytest.fixture
+def caminho_db(tmp_path) -> str:
+    return str(tmp_path / "loja.db")
+
+
+@pytest.fixture
+def db(caminho_db) -> BancoDados:
+    return BancoDados(caminho_db)
+
+
+@pytest.fixture
+def db_pool(caminho_db):
+    db = BancoDados(caminho_db, usar_pool=True)
+    yield db
+    db.fechar_pools()
+
+
+@pytest.fixture
+def catalogo(db) -> dict:
+    """Três produtos e um usuário no banco db; retorna os IDs."""
+    return {
+        'teclado': db.criar_produto(Produto("Teclado Mecânico", "Switches azuis", 200.0, 5,
+                                            "Periféricos", sku="TEC-1")),
+        'mouse': db.criar_produto(Produto("Mouse Óptico", "Sem fio", 90.0, 3, "Periféricos", sku="MOU-1")),
+        'cadeira': db.criar_produto(Produto("Cadeira Gamer", "Reclinável", 900.0, 1, "Móveis", sku="CAD-1")),
+        'usuario': db.criar_usuario(Usuario("Ana", "ana@exemplo.com", "segredo", endereco="Rua A, 1")),
+    }
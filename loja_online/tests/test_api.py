@@ -0,0 +1,88 @@
+"""Rotas da API JSON (ApiLoja.tratar), sem servidor HTTP, e o frete."""
+
+import pytest
+
+from src.api import ApiLoja, ErroApi, gerar_token, validar_token
+from src.frete import calcular_frete
+
+
+@pytest.fixture
+def api(db) -> ApiLoja:
+    return ApiLoja(db, "segredo-teste")
+
+
+def test_frete_por_faixa_de_valor():
+    assert calcular_frete(49.99) == 15.0
+    assert calcular_frete(50) == 10.0
+    assert calcular_frete(100) == 0.0
+
+
+def test_token_assinado_e_com_validade():
+    token = gerar_token(7, "segredo")
+    assert validar_token(token, "segredo") == 7
+    assert validar_token(token, "outro") is None
+    assert validar_token(gerar_token(7, "segredo", validade=-1), "segredo") is None
+
+
+def test_lista_produtos_filtrando_por_categoria(api, catalogo):
+    status, corpo, privado = api.tratar('GET', '/api/produtos', {'categoria': 'Móveis'}, None, None)
+    assert status == 200 and not privado
+    assert [produto['id'] for produto in corpo['produtos']] == [catalogo['cadeira']]
+
+
+def test_limite_fora_da_faixa_e_rota_inexistente(api, catalogo):
+    with pytest.raises(ErroApi) as erro:
+        api.tratar('GET', '/api/produtos', {'limite': '0'}, None, None)
+    assert erro.value.status == 400
+    with pytest.raises(ErroApi) as erro:
+        api.tratar('GET', '/api/nada', {}, None, None)
+    assert erro.value.status == 404
+
+
+def test_login_retorna_token_do_usuario(api, catalogo):
+    _status, corpo, _privado = api.tratar(
+        'POST', '/api/login', {}, {'email': 'ana@exemplo.com', 'senha': 'segredo'}, None)
+    assert validar_token(corpo['token'], api.segredo) == catalogo['usuario']
+
+    with pytest.raises(ErroApi) as erro:
+        api.tratar('POST', '/api/login', {}, {'email': 'ana@exemplo.com', 'senha': 'errada'}, None)
+    assert erro.value.status == 401
+
+
+def test_cotacao_usa_precos_do_banco_e_calcula_frete(api, catalogo):
+    _status, corpo, _privado = api.tratar(
+        'POST', '/api/carrinho', {}, {'itens': [{'produto_id': catalogo['mouse'], 'quantidade': 1}]}, None)
+    assert corpo['subtotal'] == 90.0
+    assert corpo['frete'] == calcular_frete(90.0) == 10.0
+    assert corpo['total'] == 100.0
+
+
+def test_pedido_exige_token_e_baixa_estoque(api, db, catalogo):
+    corpo = {'itens': [{'produto_id': catalogo['teclado'], 'quantidade': 2}], 'endereco_entrega': "Rua A, 1"}
+    with pytest.raises(ErroApi) as erro:
+        api.tratar('POST', '/api/pedidos', {}, corpo, None)
+    assert erro.value.status == 401
+
+    status, pedido, privado = api.tratar('POST', '/api/pedidos', {}, corpo, catalogo['usuario'])
+    assert status == 201 and privado
+    assert pedido['total'] == 400.0 and pedido['frete'] == 0.0
+    assert db.obter_produto(catalogo['teclado']).estoque == 3
+
+
+def test_pedido_sem_estoque_e_conflito(api, catalogo):
+    corpo = {'itens': [{'produto_id': catalogo['cadeira'], 'quantidade': 2}], 'endereco_entrega': "Rua A, 1"}
+    with pytest.raises(ErroApi) as erro:
+        api.tratar('POST', '/api/pedidos', {}, corpo, catalogo['usuario'])
+    assert erro.value.status == 409
+
+
+def test_avaliacao_sem_fila_e_gravada_na_hora(api, db, catalogo):
+    status, corpo, _privado = api.tratar(
+        'POST', f"/api/produtos/{catalogo['mouse']}/avaliacoes", {}, {'nota': 4}, catalogo['usuario'])
+    assert status == 201 and corpo['avaliacao_id'] > 0
+    assert db.obter_produto(catalogo['mouse']).total_avaliacoes == 1
+
+    with pytest.raises(ErroApi) as erro:
+        api.tratar('POST', f"/api/produtos/{catalogo['mouse']}/avaliacoes", {}, {'nota': 6},
+                   catalogo['usuario'])
+    assert erro.value.status == 400
@@ -0,0 +1,48 @@
+import pytest
+
+from src.modelo import Avaliacao
+
+
+def test_agregados_somam_cada_nota(db, catalogo):
+    for nota in (5, 4, 4, 1):
+        db.criar_avaliacao(Avaliacao(catalogo['teclado'], catalogo['usuario'], nota, ""))
+
+    produto = db.obter_produto(catalogo['teclado'])
+    assert produto.total_avaliacoes == 4
+    assert produto.avaliacao_media == 3.5
+    assert db.obter_histograma_avaliacoes(catalogo['teclado']) == {1: 1, 2: 0, 3: 0, 4: 2, 5: 1}
+
+
+@pytest.mark.parametrize('nota', [0, 6, 3.5])
+def test_nota_invalida_nao_grava(db, catalogo, nota):
+    with pytest.raises(ValueError):
+        db.criar_avaliacao(Avaliacao(catalogo['teclado'], catalogo['usuario'], nota, ""))
+
+    assert db.obter_avaliacoes_produto(catalogo['teclado']) == []
+    assert db.obter_produto(catalogo['teclado']).total_avaliacoes == 0
+
+
+def test_reconciliar_corrige_divergencias(db, catalogo):
+    db.criar_avaliacao(Avaliacao(catalogo['teclado'], catalogo['usuario'], 2, ""))
+    conexao = db.obter_conexao()
+    conexao.execute("INSERT INTO avaliacoes (produto_id, usuario_id, nota) VALUES (?, ?, 4)",
+                    (catalogo['teclado'], catalogo['usuario']))
+    conexao.commit()
+    conexao.close()
+
+    assert db.reconciliar_avaliacoes() == 1
+
+    produto = db.obter_produto(catalogo['teclado'])
+    assert (produto.total_avaliacoes, produto.avaliacao_media) == (2, 3.0)
+    assert db.reconciliar_avaliacoes() == 0
+
+
+def test_produto_ou_usuario_inexistente_nao_grava(db, catalogo):
+    with pytest.raises(ValueError, match="Produto 999"):
+        db.criar_avaliacao(Avaliacao(999, catalogo['usuario'], 5, ""))
+    with pytest.raises(ValueError, match="Usuário 999"):
+        db.criar_avaliacao(Avaliacao(catalogo['teclado'], 999, 5, ""))
+
+    conexao = db.obter_conexao()
+    assert conexao.execute('SELECT COUNT(*) FROM avaliacoes').fetchone()[0] == 0
+    conexao.close()
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import pytest
+
+from src.banco_dados import BancoDados
+from src.banco_dados_async import BancoDadosAsync
+from src.cache import CacheCatalogo, marcador_produto
+from src.modelo import Produto
+
+
+def _rodar(corrotina):
+    return asyncio.run(corrotina)
+
+
+@pytest.mark.parametrize('usar_pool', [False, True])
+def test_iterar_em_varios_lotes(caminho_db, usar_pool):
+    db = BancoDados(caminho_db, usar_pool=usar_pool)
+    db.salvar_produtos_em_lote([Produto(f"P{numero}", "", 1.0, 1, "C", sku=f"P{numero}") for numero in range(50)])
+
+    async def listar():
+        async with BancoDadosAsync(db=db, max_concorrencia=4) as banco:
+            # Outras chamadas ocupam as threads do executor entre os lotes
+            produtos = []
+            async for produto in banco.iterar_produtos(tamanho_lote=7):
+                produtos.append(produto.id)
+                await asyncio.gather(*(banco.obter_produto(1) for _ in range(4)))
+            return produtos
+
+    assert sorted(_rodar(listar())) == list(range(1, 51))
+    db.fechar_pools()
+
+
+def test_corrotinas_retornam_o_mesmo_que_o_sincrono(db, catalogo):
+    async def consultar():
+        async with BancoDadosAsync(db=db) as banco:
+            return await banco.consultar_produtos(ordenar_por='preco'), await banco.obter_categorias()
+
+    pagina, categorias = _rodar(consultar())
+
+    assert [p.id for p in pagina.produtos] == [p.id for p in db.consultar_produtos(ordenar_por='preco').produtos]
+    assert categorias == db.obter_categorias()
+
+
+def test_transacao_faz_rollback_e_invalida_so_no_commit(caminho_db):
+    db = BancoDados(caminho_db, cache=CacheCatalogo())
+    produto_id = db.criar_produto(Produto("Teclado", "", 100.0, 5, "Periféricos"))
+
+    def baixar(conexao):
+        conexao.execute('UPDATE produtos SET estoque = 0 WHERE id = ?', (produto_id,))
+
+    def falhar(conexao):
+        baixar(conexao)
+        raise RuntimeError("falhou")
+
+    async def executar():
+        async with BancoDadosAsync(db=db) as banco:
+            with pytest.raises(RuntimeError):
+                await banco.executar_em_transacao(falhar, [marcador_produto(produto_id)])
+            assert db.obter_produto(produto_id).estoque == 5
+            await banco.executar_em_transacao(baixar, [marcador_produto(produto_id)])
+
+    _rodar(executar())
+
+    assert db.obter_produto(produto_id).estoque == 0
+
+
+def test_cancelamento_nao_deixa_transacao_aberta(db_pool):
+    produto_id = db_pool.criar_produto(Produto("Teclado", "", 100.0, 5, "Periféricos"))
+
+    def lento(conexao):
+        conexao.execute('UPDATE produtos SET estoque = 1 WHERE id = ?', (produto_id,))
+        time.sleep(0.05)
+
+    async def cancelar():
+        async with BancoDadosAsync(db=db_pool, max_concorrencia=1) as banco:
+            tarefa = asyncio.ensure_future(banco.executar_em_transacao(lento))
+            await asyncio.sleep(0.01)
+            tarefa.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await tarefa
+
+    _rodar(cancelar())
+
+    # A transação terminou na thread (commit) e a conexão de escrita voltou ao pool
+    assert db_pool.obter_produto(produto_id).estoque == 1
+    assert db_pool.atualizar_estoque(produto_id, 1)
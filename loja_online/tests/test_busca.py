@@ -0,0 +1,45 @@
+from src.banco_dados import montar_consulta_fts
+from src.modelo import Produto
+
+
+def _ids(produtos):
+    return [produto.id for produto in produtos]
+
+
+def test_busca_ignora_acentos_e_aceita_prefixos(db, catalogo):
+    assert _ids(db.buscar_produtos("mecanico")) == [catalogo['teclado']]
+    assert _ids(db.buscar_produtos("tecl mec")) == [catalogo['teclado']]
+    assert _ids(db.buscar_produtos("OPTICO")) == [catalogo['mouse']]
+
+
+def test_nome_pesa_mais_que_descricao(db):
+    na_descricao = db.criar_produto(Produto("Suporte", "Para teclado e mouse", 50.0, 1, "Acessórios"))
+    no_nome = db.criar_produto(Produto("Teclado", "Compacto", 150.0, 1, "Periféricos"))
+
+    assert _ids(db.buscar_produtos("teclado")) == [no_nome, na_descricao]
+
+
+def test_triggers_mantem_o_indice(db, catalogo):
+    conexao = db.obter_conexao()
+    conexao.execute("UPDATE produtos SET nome = 'Mousepad Grande' WHERE id = ?", (catalogo['mouse'],))
+    conexao.execute("DELETE FROM produtos WHERE id = ?", (catalogo['cadeira'],))
+    conexao.commit()
+    conexao.close()
+
+    assert _ids(db.buscar_produtos("mousepad")) == [catalogo['mouse']]
+    assert db.buscar_produtos("cadeira") == []
+    assert db.buscar_produtos("optico") == []
+
+
+def test_sintaxe_do_fts5_digitada_e_neutralizada(db, catalogo):
+    assert montar_consulta_fts('teclado OR "mouse') == '"teclado"* "OR"* "mouse"*'
+    assert montar_consulta_fts('*** ()') is None
+    assert db.buscar_produtos('NEAR(teclado') == []
+    assert db.buscar_produtos('') == []
+
+
+def test_trecho_destaca_o_termo(db, catalogo):
+    [(produto, trecho)] = db.buscar_produtos_com_trecho("switches")
+
+    assert produto.id == catalogo['teclado']
+    assert '<mark>Switches</mark>' in trecho
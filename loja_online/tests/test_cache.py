@@ -0,0 +1,87 @@
+import pytest
+
+from src.banco_dados import BancoDados
+from src.cache import CacheCatalogo
+from src.modelo import Avaliacao, ItemCarrinho, Pedido, Produto
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def relogio():
+    return Relogio()
+
+
+@pytest.fixture
+def db(caminho_db, relogio):
+    return BancoDados(caminho_db, cache=CacheCatalogo(relogio=relogio))
+
+
+def test_leitura_repetida_vem_do_cache(db, catalogo):
+    db.obter_produto(catalogo['teclado'])
+    db.obter_produto(catalogo['teclado'])
+
+    assert db.cache.estatisticas()['acertos'] == 1
+
+
+def test_entrada_expira_pelo_ttl(db, catalogo, relogio):
+    db.obter_produto(catalogo['teclado'])
+    relogio.agora += db.cache.ttls['produto'] + 1
+    db.obter_produto(catalogo['teclado'])
+
+    assert db.cache.estatisticas()['expiracoes'] == 1
+
+
+def test_checkout_invalida_so_os_produtos_comprados(db, catalogo):
+    db.obter_produto(catalogo['teclado'])
+    db.obter_produto(catalogo['cadeira'])
+
+    db.finalizar_pedido(Pedido(catalogo['usuario'], [ItemCarrinho(catalogo['teclado'], 2, 200.0)], "Rua A, 1"))
+
+    assert db.obter_produto(catalogo['teclado']).estoque == 3
+    assert db.cache.estatisticas()['acertos'] == 0
+    db.obter_produto(catalogo['cadeira'])
+    assert db.cache.estatisticas()['acertos'] == 1
+
+
+def test_estoque_reposto_entra_nas_listas(db, catalogo):
+    db.atualizar_estoque(catalogo['cadeira'], 1)
+    assert catalogo['cadeira'] not in [p.id for p in db.consultar_produtos(somente_em_estoque=True).produtos]
+
+    db.atualizar_estoque(catalogo['cadeira'], -4)
+
+    assert catalogo['cadeira'] in [p.id for p in db.consultar_produtos(somente_em_estoque=True).produtos]
+
+
+def test_avaliacao_atualiza_listas_filtradas_por_nota(db, catalogo):
+    assert db.consultar_produtos(avaliacao_minima=4).produtos == []
+
+    db.criar_avaliacao(Avaliacao(catalogo['mouse'], catalogo['usuario'], 5, "Ótimo"))
+
+    assert [p.id for p in db.consultar_produtos(avaliacao_minima=4).produtos] == [catalogo['mouse']]
+
+
+def test_novo_produto_aparece_em_categorias_e_listas(db, catalogo):
+    assert "Escritório" not in db.obter_categorias()
+    db.obter_produtos_por_categoria("Escritório")
+
+    novo = db.criar_produto(Produto("Grampeador", "Metal", 30.0, 2, "Escritório"))
+
+    assert "Escritório" in db.obter_categorias()
+    assert [p.id for p in db.obter_produtos_por_categoria("Escritório")] == [novo]
+
+
+def test_lru_respeita_a_capacidade(caminho_db, catalogo):
+    db = BancoDados(caminho_db, cache=CacheCatalogo(capacidade=2))
+    for produto_id in (catalogo['teclado'], catalogo['mouse'], catalogo['cadeira']):
+        db.obter_produto(produto_id)
+
+    estatisticas = db.cache.estatisticas()
+    assert estatisticas['entradas'] == 2
+    assert estatisticas['remocoes'] == 1
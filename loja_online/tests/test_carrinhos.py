@@ -0,0 +1,101 @@
+import threading
+import time
+
+import pytest
+
+from src.banco_dados import BancoDados
+from src.carrinhos import ArmazemCarrinhos, chave_usuario, chave_visitante
+
+
+@pytest.fixture
+def armazem(db):
+    # Sem gravação periódica: os testes chamam descarregar()
+    armazem = ArmazemCarrinhos(db, intervalo_gravacao=3600)
+    yield armazem
+    armazem.fechar()
+
+
+def test_leitura_inclui_alteracoes_pendentes(armazem, catalogo):
+    chave = chave_visitante("abc")
+    armazem.adicionar(chave, catalogo['mouse'], 1, 90.0)
+    armazem.adicionar(chave, catalogo['mouse'], 2, 90.0)
+    armazem.adicionar(chave, catalogo['teclado'], 1, 200.0)
+    armazem.remover(chave, catalogo['teclado'])
+    assert armazem.obter(chave) == {catalogo['mouse']: {'quantidade': 3, 'preco_unitario': 90.0}}
+
+    assert armazem.descarregar() == 4
+    assert armazem.metricas()['pendentes'] == 0
+    assert armazem.obter(chave) == {catalogo['mouse']: {'quantidade': 3, 'preco_unitario': 90.0}}
+
+
+def test_processos_somam_em_vez_de_sobrescrever(caminho_db, catalogo):
+    # Dois armazéns com bancos próprios fazem o papel de dois processos do app
+    armazens = [ArmazemCarrinhos(BancoDados(caminho_db, usar_pool=True), intervalo_gravacao=3600)
+                for _ in range(2)]
+    chave = chave_usuario(catalogo['usuario'])
+    for armazem in armazens:
+        armazem.obter(chave)  # Os dois já leram o carrinho vazio
+
+    def comprar(armazem):
+        for _ in range(50):
+            armazem.adicionar(chave, catalogo['mouse'], 1, 90.0)
+            armazem.descarregar()
+
+    threads = [threading.Thread(target=comprar, args=(armazem,)) for armazem in armazens]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    novo = ArmazemCarrinhos(BancoDados(caminho_db))
+    assert novo.obter(chave)[catalogo['mouse']]['quantidade'] == 100
+    for armazem in armazens:
+        armazem.fechar()
+        armazem.db.fechar_pools()
+
+
+def test_esvaziar_e_depois_adicionar_no_mesmo_lote(armazem, catalogo):
+    chave = chave_visitante("abc")
+    armazem.adicionar(chave, catalogo['mouse'], 2, 90.0)
+    armazem.descarregar()
+    armazem.esvaziar(chave)
+    armazem.adicionar(chave, catalogo['teclado'], 1, 200.0)
+    armazem.descarregar()
+
+    assert ArmazemCarrinhos(armazem.db).obter(chave) == {
+        catalogo['teclado']: {'quantidade': 1, 'preco_unitario': 200.0}}
+
+
+def test_login_soma_o_carrinho_do_visitante(armazem, catalogo):
+    visitante, usuario = chave_visitante("abc"), chave_usuario(catalogo['usuario'])
+    armazem.adicionar(usuario, catalogo['mouse'], 1, 90.0)
+    armazem.descarregar()
+    armazem.adicionar(visitante, catalogo['mouse'], 2, 90.0)
+    armazem.adicionar(visitante, catalogo['cadeira'], 1, 900.0)
+
+    armazem.mesclar(visitante, usuario)
+
+    assert armazem.obter(visitante) == {}
+    assert armazem.obter(usuario) == {
+        catalogo['mouse']: {'quantidade': 3, 'preco_unitario': 90.0},
+        catalogo['cadeira']: {'quantidade': 1, 'preco_unitario': 900.0},
+    }
+
+
+def test_carrinhos_abandonados_expiram(armazem, catalogo):
+    antigo, recente = chave_visitante("antigo"), chave_visitante("recente")
+    armazem.adicionar(antigo, catalogo['mouse'], 1, 90.0)
+    armazem.adicionar(recente, catalogo['mouse'], 1, 90.0)
+    armazem.descarregar()
+    conexao = armazem.db.obter_conexao()
+    conexao.execute('UPDATE carrinhos SET atualizado_em = atualizado_em - ? WHERE chave = ?',
+                    (armazem.validade + 10, antigo))
+    conexao.commit()
+    conexao.close()
+
+    assert ArmazemCarrinhos(armazem.db, validade=armazem.validade).obter(antigo) == {}
+    assert armazem.expirar(time.time()) == 1
+    conexao = armazem.db.obter_conexao()
+    assert conexao.execute('SELECT COUNT(*) FROM itens_carrinho WHERE chave = ?', (antigo,)).fetchone()[0] == 0
+    conexao.close()
+    assert armazem.obter(recente) != {}
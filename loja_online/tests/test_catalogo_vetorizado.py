@@ -0,0 +1,71 @@
+import pytest
+
+from src.banco_dados import BancoDados
+from src.modelo import ItemCarrinho, Pedido, Produto
+
+np = pytest.importorskip("numpy")
+
+from src.catalogo_vetorizado import CatalogoVetorizado  # noqa: E402
+
+
+@pytest.fixture
+def produtos(db):
+    for numero in range(25):
+        db.criar_produto(Produto(f"Produto {numero:02d}", "", 10.0 * (numero % 6), numero % 3,
+                                 "Casa" if numero % 2 else "Jardim"))
+
+
+def _ids(pagina):
+    return [produto.id for produto in pagina.produtos]
+
+
+@pytest.mark.parametrize('filtros', [
+    {'ordenar_por': 'nome'},
+    {'ordenar_por': 'preco', 'preco_min': 20, 'somente_em_estoque': True},
+    {'ordenar_por': 'preco_desc', 'categoria': "Casa"},
+    {'ordenar_por': 'recentes', 'preco_max': 30},
+])
+def test_mesmo_resultado_do_sql(db, produtos, filtros):
+    catalogo = CatalogoVetorizado(db)
+    esperado = _ids(db.consultar_produtos(limite=100, **filtros))
+
+    assert _ids(catalogo.consultar_produtos(limite=100, **filtros)) == esperado
+
+
+def test_escritas_do_processo_sao_aplicadas(db, produtos):
+    catalogo = CatalogoVetorizado(db)
+    catalogo.consultar_ids(somente_em_estoque=True)
+
+    novo = db.criar_produto(Produto("Novo", "", 5.0, 1, "Casa"))
+    db.finalizar_pedido(Pedido(1, [ItemCarrinho(novo, 1, 5.0)], "Rua A"))
+
+    assert novo in catalogo.consultar_ids(limite=100).tolist()
+    assert novo not in catalogo.consultar_ids(somente_em_estoque=True, limite=100).tolist()
+
+
+def test_enxerga_escritas_de_outro_processo_depois_da_idade_maxima(db, produtos, caminho_db, monkeypatch):
+    catalogo = CatalogoVetorizado(db, idade_maxima=5)
+    catalogo.consultar_ids()
+    agora = [1000.0]
+    monkeypatch.setattr('src.catalogo_vetorizado.time.monotonic', lambda: agora[0])
+    catalogo._carregado_em = agora[0]
+
+    # Outro BancoDados não avisa este catálogo, como um processo da API
+    novo = BancoDados(caminho_db).criar_produto(Produto("De outro processo", "", 5.0, 1, "Casa"))
+    assert novo not in catalogo.consultar_ids(limite=100).tolist()
+
+    agora[0] += 6
+    assert novo in catalogo.consultar_ids(limite=100).tolist()
+
+
+def test_nao_rele_banco_que_nao_mudou(db, produtos, monkeypatch):
+    catalogo = CatalogoVetorizado(db, idade_maxima=0)
+    catalogo.consultar_ids()
+    cargas = []
+    carregar = catalogo._carregar
+    monkeypatch.setattr(catalogo, '_carregar', lambda: (cargas.append(1), carregar()))
+
+    for _ in range(3):
+        catalogo.consultar_ids()
+
+    assert cargas == []
@@ -0,0 +1,92 @@
+import sqlite3
+import threading
+
+import pytest
+
+from src.banco_dados import BancoDados
+from src.carrinhos import ArmazemCarrinhos
+from src.modelo import ItemCarrinho, Pedido, Produto
+
+
+def test_checkout_grava_pedido_e_baixa_estoque(db, catalogo):
+    pedido = Pedido(catalogo['usuario'], [ItemCarrinho(catalogo['teclado'], 2, 200.0),
+                                          ItemCarrinho(catalogo['mouse'], 1, 90.0)], "Rua A, 1")
+
+    resultado = db.finalizar_pedido(pedido)
+
+    assert resultado.sucesso and pedido.id == resultado.pedido_id
+    assert db.obter_produto(catalogo['teclado']).estoque == 3
+    assert db.obter_produto(catalogo['mouse']).estoque == 2
+    [gravado] = db.consultar_pedidos_usuario(catalogo['usuario']).pedidos
+    assert sorted(item['produto_id'] for item in gravado['itens']) == [catalogo['teclado'], catalogo['mouse']]
+
+
+def test_item_sem_estoque_nao_grava_nada(db, catalogo):
+    pedido = Pedido(catalogo['usuario'], [ItemCarrinho(catalogo['teclado'], 1, 200.0),
+                                          ItemCarrinho(catalogo['cadeira'], 2, 900.0)], "Rua A, 1")
+
+    resultado = db.finalizar_pedido(pedido)
+
+    assert not resultado.sucesso
+    assert resultado.itens_indisponiveis == [
+        {'produto_id': catalogo['cadeira'], 'solicitado': 2, 'disponivel': 1}]
+    assert db.obter_produto(catalogo['teclado']).estoque == 5
+    assert db.obter_pedidos_usuario(catalogo['usuario']) == []
+
+
+def test_quantidade_invalida(db, catalogo):
+    with pytest.raises(ValueError):
+        db.finalizar_pedido(Pedido(catalogo['usuario'], [ItemCarrinho(catalogo['teclado'], 0, 200.0)], "Rua A"))
+
+
+@pytest.mark.parametrize('usar_pool', [False, True])
+def test_checkouts_concorrentes_nao_vendem_alem_do_estoque(caminho_db, usar_pool):
+    db = BancoDados(caminho_db, usar_pool=usar_pool)
+    produto_id = db.criar_produto(Produto("Console", "Edição limitada", 3000.0, 10, "Games"))
+    vendidos = []
+
+    def comprar():
+        # Sem pool, cada thread tem o próprio BancoDados e disputa o lock do SQLite
+        banco = db if usar_pool else BancoDados(caminho_db)
+        for _ in range(5):
+            resultado = banco.finalizar_pedido(Pedido(1, [ItemCarrinho(produto_id, 1, 3000.0)], "Rua B"),
+                                               tentativas=50, espera_inicial=0.001)
+            if resultado.sucesso:
+                vendidos.append(resultado.pedido_id)
+
+    threads = [threading.Thread(target=comprar) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(vendidos) == 10
+    assert db.obter_produto(produto_id).estoque == 0
+    db.fechar_pools()
+
+
+def test_erro_numa_escrita_nao_prende_a_conexao_de_escrita(db_pool, catalogo):
+    # Com uma só conexão de escrita, uma conexão não devolvida travaria as
+    # escritas seguintes até o tempo limite do pool
+    db_pool.pool.tempo_espera = 1.0
+    with pytest.raises(sqlite3.IntegrityError):
+        db_pool.criar_produto(Produto("Outro teclado", "", 100.0, 1, "Periféricos", sku="TEC-1"))
+
+    assert db_pool.metricas_pool()['escrita']['livres'] == 1
+    resultado = db_pool.finalizar_pedido(
+        Pedido(catalogo['usuario'], [ItemCarrinho(catalogo['mouse'], 1, 90.0)], "Rua A, 1"))
+    assert resultado.sucesso
+
+
+def test_erro_ao_expirar_carrinhos_nao_prende_a_conexao_de_escrita(db_pool, catalogo):
+    db_pool.pool.tempo_espera = 1.0
+    conexao = db_pool.obter_conexao()
+    conexao.execute('DROP TABLE itens_carrinho')
+    conexao.commit()
+    conexao.close()
+
+    with pytest.raises(sqlite3.OperationalError):
+        ArmazemCarrinhos(db_pool).expirar()
+
+    assert db_pool.metricas_pool()['escrita']['livres'] == 1
+    assert db_pool.criar_produto(Produto("Monitor", "", 800.0, 2, "Monitores", sku="MON-1")) > 0
@@ -0,0 +1,70 @@
+import base64
+import json
+
+import pytest
+
+from src.modelo import Produto
+
+
+@pytest.fixture
+def produtos(db):
+    # Preços e categorias repetidos: a paginação depende do desempate por id
+    for numero in range(30):
+        db.criar_produto(Produto(f"Produto {numero:02d}", "Descrição", 10.0 * (numero % 7), numero % 4,
+                                 "Casa" if numero % 2 else "Jardim"))
+    return db.obter_todos_produtos()
+
+
+def _todas_as_paginas(db, **filtros):
+    ids, cursor = [], None
+    while True:
+        pagina = db.consultar_produtos(cursor=cursor, limite=7, **filtros)
+        ids += [produto.id for produto in pagina.produtos]
+        cursor = pagina.proximo_cursor
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize('ordenar_por, chave', [
+    ('nome', lambda p: (p.nome, p.id)),
+    ('preco', lambda p: (p.preco, p.id)),
+    ('preco_desc', lambda p: (-p.preco, -p.id)),
+    ('recentes', lambda p: -p.id),
+])
+def test_paginas_cobrem_tudo_na_ordem(db, produtos, ordenar_por, chave):
+    esperado = [produto.id for produto in sorted(produtos, key=chave)]
+
+    assert _todas_as_paginas(db, ordenar_por=ordenar_por) == esperado
+
+
+def test_filtros_no_sql(db, produtos):
+    ids = _todas_as_paginas(db, preco_min=20, preco_max=50, categoria="Casa",
+                            somente_em_estoque=True, ordenar_por='preco')
+
+    esperado = sorted((p for p in produtos
+                       if 20 <= p.preco <= 50 and p.categoria == "Casa" and p.estoque > 0),
+                      key=lambda p: (p.preco, p.id))
+    assert ids == [produto.id for produto in esperado]
+
+
+def test_ultima_pagina_sem_cursor(db, produtos):
+    pagina = db.consultar_produtos(limite=30)
+
+    assert len(pagina.produtos) == 30
+    assert pagina.proximo_cursor is None
+
+
+@pytest.mark.parametrize('cursor', [
+    'não é base64',
+    base64.urlsafe_b64encode(b'[1]').decode(),
+    base64.urlsafe_b64encode(json.dumps([[1, 2], 3]).encode()).decode(),
+    base64.urlsafe_b64encode(json.dumps([{'a': 1}, 3]).encode()).decode(),
+])
+def test_cursor_invalido(db, produtos, cursor):
+    with pytest.raises(ValueError):
+        db.consultar_produtos(ordenar_por='preco', cursor=cursor)
+
+
+def test_relevancia_exige_termo(db):
+    with pytest.raises(ValueError):
+        db.consultar_produtos(ordenar_por='relevancia')
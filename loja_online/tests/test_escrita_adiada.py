@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+from src.escrita_adiada import FilaEscritas
+from src.modelo import Avaliacao
+
+
+@pytest.fixture
+def fila(db_pool):
+    fila = FilaEscritas(db_pool, janela=0.05)
+    yield fila
+    fila.fechar()
+
+
+def test_avaliacoes_em_grupo_recebem_ids(fila, db_pool, catalogo):
+    futuros = [fila.criar_avaliacao(Avaliacao(catalogo['teclado'], catalogo['usuario'], nota, ""))
+               for nota in (5, 4, 3)]
+
+    ids = [futuro.result(timeout=5) for futuro in futuros]
+
+    assert len(set(ids)) == 3
+    assert fila.metricas()['lotes'] == 1
+    assert db_pool.obter_produto(catalogo['teclado']).total_avaliacoes == 3
+
+
+def test_escrita_com_erro_e_desfeita_sozinha(fila, db_pool, catalogo):
+    boa = fila.criar_avaliacao(Avaliacao(catalogo['mouse'], catalogo['usuario'], 4, ""))
+    sem_produto = fila.criar_avaliacao(Avaliacao(999, catalogo['usuario'], 4, ""))
+    sem_usuario = fila.criar_avaliacao(Avaliacao(catalogo['mouse'], 999, 4, ""))
+
+    assert boa.result(timeout=5) > 0
+    with pytest.raises(ValueError, match="Produto 999"):
+        sem_produto.result(timeout=5)
+    with pytest.raises(ValueError, match="Usuário 999"):
+        sem_usuario.result(timeout=5)
+    assert db_pool.obter_produto(catalogo['mouse']).total_avaliacoes == 1
+    assert fila.metricas()['falhas'] == 2
+
+
+def test_nota_invalida_e_recusada_antes_da_fila(fila, catalogo):
+    with pytest.raises(ValueError, match="Nota inválida"):
+        fila.criar_avaliacao(Avaliacao(catalogo['mouse'], catalogo['usuario'], 6, ""))
+    assert fila.metricas()['pendentes'] == 0
+
+
+def test_fechar_grava_o_que_esta_na_fila(db_pool, catalogo):
+    fila = FilaEscritas(db_pool, janela=1.0)
+    futuro = fila.criar_avaliacao(Avaliacao(catalogo['cadeira'], catalogo['usuario'], 5, ""))
+
+    fila.fechar('completa')
+
+    assert futuro.result(timeout=0) > 0
+    assert db_pool.obter_produto(catalogo['cadeira']).total_avaliacoes == 1
+    with pytest.raises(RuntimeError):
+        fila.criar_avaliacao(Avaliacao(catalogo['cadeira'], catalogo['usuario'], 5, ""))
+
+
+def test_fechar_sem_durabilidade_descarta_a_fila(db_pool, catalogo):
+    fila = FilaEscritas(db_pool)
+    gravando, liberar = threading.Event(), threading.Event()
+
+    def prender(cursor):
+        gravando.set()
+        return liberar.wait(5)
+
+    # Prende a thread no primeiro grupo para que o segundo fique na fila
+    primeira = fila.agendar(prender)
+    assert gravando.wait(5)
+    pendente = fila.criar_avaliacao(Avaliacao(catalogo['cadeira'], catalogo['usuario'], 5, ""))
+
+    fechamento = threading.Thread(target=fila.fechar, args=('nenhuma',))
+    fechamento.start()
+    liberar.set()
+    fechamento.join()
+
+    assert primeira.result(timeout=0) is True
+    assert pendente.cancelled()
+    assert db_pool.obter_produto(catalogo['cadeira']).total_avaliacoes == 0
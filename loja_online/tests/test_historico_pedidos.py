@@ -0,0 +1,49 @@
+from src.modelo import ItemCarrinho, Pedido
+
+
+def _comprar(db, catalogo, quantidade_itens: int) -> int:
+    itens = [ItemCarrinho(catalogo['teclado'], 1, 10.0)] * quantidade_itens
+    return db.criar_pedido(Pedido(catalogo['usuario'], itens, "Rua A, 1"))
+
+
+def test_paginas_trazem_pedidos_com_itens(db, catalogo):
+    # Pedidos no mesmo segundo: o desempate da paginação é pelo id
+    criados = [_comprar(db, catalogo, 1 + numero % 3) for numero in range(7)]
+
+    vistos, cursor = [], None
+    while True:
+        pagina = db.consultar_pedidos_usuario(catalogo['usuario'], cursor=cursor, limite=3)
+        vistos += pagina.pedidos
+        cursor = pagina.proximo_cursor
+        if cursor is None:
+            break
+
+    assert [pedido['id'] for pedido in vistos] == criados[::-1]
+    assert [len(pedido['itens']) for pedido in vistos] == [1 + numero % 3 for numero in range(7)][::-1]
+    assert vistos[0]['itens'][0]['nome'] == "Teclado Mecânico"
+
+
+def test_resumo_do_usuario(db, catalogo):
+    assert db.obter_resumo_usuario(catalogo['usuario'])['total_pedidos'] == 0
+    _comprar(db, catalogo, 2)
+    ultimo = _comprar(db, catalogo, 1)
+
+    resumo = db.obter_resumo_usuario(catalogo['usuario'])
+
+    assert resumo['total_pedidos'] == 2
+    assert resumo['ultimo_pedido_id'] == ultimo
+    pedidos = db.obter_pedidos_usuario(catalogo['usuario'])
+    assert resumo['valor_total'] == sum(pedido['valor_total'] for pedido in pedidos)
+
+
+def test_reconstruir_resumos_refaz_do_historico(db, catalogo):
+    _comprar(db, catalogo, 2)
+    antes = db.obter_resumo_usuario(catalogo['usuario'])
+    conexao = db.obter_conexao()
+    conexao.execute('DELETE FROM resumo_usuarios')
+    conexao.commit()
+    conexao.close()
+
+    db.reconstruir_resumos()
+
+    assert db.obter_resumo_usuario(catalogo['usuario']) == antes
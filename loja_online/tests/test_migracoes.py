@@ -0,0 +1,86 @@
+import sqlite3
+import time
+
+from src.banco_dados import BancoDados
+from src.carrinhos import ArmazemCarrinhos
+from src.migracoes import MIGRACOES, VERSAO_MAIS_RECENTE, aplicar_migracoes, migracoes_pendentes, obter_versao
+
+
+def test_banco_novo_fica_na_versao_mais_recente(caminho_db):
+    BancoDados(caminho_db)
+
+    conexao = sqlite3.connect(caminho_db)
+    assert obter_versao(conexao) == VERSAO_MAIS_RECENTE
+    assert migracoes_pendentes(conexao) == []
+    conexao.close()
+
+
+def test_banco_atualizado_nao_executa_ddl(caminho_db):
+    BancoDados(caminho_db)
+    conexao = sqlite3.connect(caminho_db)
+    comandos = []
+    conexao.set_trace_callback(comandos.append)
+
+    assert aplicar_migracoes(conexao) == []
+    assert not [sql for sql in comandos if sql.lstrip().upper().startswith(('CREATE', 'ALTER', 'DROP'))]
+    conexao.close()
+
+
+def test_banco_antigo_migra_sem_perder_dados(caminho_db):
+    # Esquema da versão 1, como os bancos criados antes das migrações
+    conexao = sqlite3.connect(caminho_db)
+    for passo in MIGRACOES[0][2]:
+        conexao.execute(passo)
+    conexao.execute("INSERT INTO produtos (nome, descricao, preco, estoque, categoria) "
+                    "VALUES ('Teclado', 'Mecânico', 200, 5, 'Periféricos')")
+    conexao.execute("INSERT INTO usuarios (nome, email, senha) VALUES ('Ana', 'ana@exemplo.com', 'x')")
+    conexao.execute("INSERT INTO avaliacoes (produto_id, usuario_id, nota) VALUES (1, 1, 4)")
+    conexao.commit()
+    conexao.close()
+
+    db = BancoDados(caminho_db)
+
+    produto = db.obter_produto(1)
+    assert produto.nome == "Teclado"
+    assert produto.total_avaliacoes == 1
+    assert db.obter_histograma_avaliacoes(1)[4] == 1
+    assert [p.id for p in db.buscar_produtos("mecanico")] == [1]
+
+
+def test_aplica_so_as_migracoes_pendentes(caminho_db):
+    conexao = sqlite3.connect(caminho_db)
+    conexao.isolation_level = None
+    for numero, _descricao, passos in MIGRACOES[:4]:
+        for passo in passos:
+            if callable(passo):
+                passo(conexao.cursor())
+            else:
+                conexao.execute(passo)
+        conexao.execute(f'PRAGMA user_version = {numero}')
+    conexao.isolation_level = ''
+
+    aplicadas = aplicar_migracoes(conexao)
+
+    assert aplicadas == [numero for numero, _descricao, _passos in MIGRACOES[4:]]
+    assert obter_versao(conexao) == VERSAO_MAIS_RECENTE
+    conexao.close()
+
+
+def test_carrinhos_em_json_viram_linhas(caminho_db):
+    conexao = sqlite3.connect(caminho_db)
+    conexao.isolation_level = None
+    for numero, _descricao, passos in MIGRACOES[:9]:
+        for passo in passos:
+            if callable(passo):
+                passo(conexao.cursor())
+            else:
+                conexao.execute(passo)
+        conexao.execute(f'PRAGMA user_version = {numero}')
+    conexao.execute("INSERT INTO carrinhos (chave, itens, atualizado_em) VALUES ('u:1', '[[1,2,90.0],[3,1,900.0]]', ?)",
+                    (int(time.time()),))
+    conexao.close()
+
+    db = BancoDados(caminho_db)
+
+    assert ArmazemCarrinhos(db).obter('u:1') == {1: {'quantidade': 2, 'preco_unitario': 90.0},
+                                                 3: {'quantidade': 1, 'preco_unitario': 900.0}}
@@ -0,0 +1,49 @@
+import sqlite3
+
+from benchmarks.gerador import gerar_banco
+from src.planos_consulta import _PROBLEMA, _casos, metodos_publicos, verificar_planos
+
+
+def test_nenhuma_consulta_varre_tabela_grande():
+    def preparar(caminho_db):
+        gerar_banco(caminho_db, produtos=3000, usuarios=300, pedidos=3000, avaliacoes=3000,
+                    ao_progredir=lambda _mensagem: None)
+
+    relatorio, problemas = verificar_planos(preparar)
+
+    assert relatorio
+    assert problemas == []
+
+
+def test_nenhuma_consulta_varre_tabela_no_banco_vazio():
+    _relatorio, problemas = verificar_planos()
+
+    assert problemas == []
+
+
+def test_reprova_consulta_sem_indice():
+    def preparar(caminho_db):
+        gerar_banco(caminho_db, produtos=500, usuarios=50, pedidos=500, avaliacoes=500,
+                    ao_progredir=lambda _mensagem: None)
+        conexao = sqlite3.connect(caminho_db)
+        conexao.execute('DROP INDEX idx_itens_pedido_pedido')
+        conexao.close()
+
+    _relatorio, problemas = verificar_planos(preparar)
+
+    # Inclusive na consulta cuja ordenação da página é permitida
+    assert any(problema.startswith('consultar_pedidos_usuario: SCAN ip') for problema in problemas)
+    assert any('AUTOMATIC' in problema for problema in problemas)
+
+
+def test_todo_metodo_publico_tem_caso():
+    assert set(metodos_publicos()) <= set(_casos(None))
+
+
+def test_detecta_planos_degradados():
+    assert _PROBLEMA.match("SCAN produtos")
+    assert _PROBLEMA.match("USE TEMP B-TREE FOR ORDER BY")
+    assert _PROBLEMA.match("SEARCH ip USING AUTOMATIC COVERING INDEX (pedido_id=?)")
+    assert not _PROBLEMA.match("SEARCH produtos USING INDEX idx_produtos_categoria (categoria=?)")
+    assert not _PROBLEMA.match("SCAN produtos_busca VIRTUAL TABLE INDEX 0:M2")
+    assert not _PROBLEMA.match("SCAN produtos USING COVERING INDEX idx_produtos_preco")
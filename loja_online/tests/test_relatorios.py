@@ -0,0 +1,41 @@
+from src.modelo import ItemCarrinho, Pedido
+from src.relatorios import Relatorios
+
+
+def _vender(db, catalogo):
+    db.finalizar_pedido(Pedido(catalogo['usuario'], [ItemCarrinho(catalogo['teclado'], 2, 200.0),
+                                                     ItemCarrinho(catalogo['cadeira'], 1, 900.0)], "Rua A"))
+    db.finalizar_pedido(Pedido(catalogo['usuario'], [ItemCarrinho(catalogo['mouse'], 3, 90.0)], "Rua A"))
+
+
+def test_resumos_acompanham_o_checkout(db, catalogo):
+    _vender(db, catalogo)
+    relatorios = Relatorios(db)
+
+    assert relatorios.receita_por_categoria() == [
+        {'categoria': "Móveis", 'pedidos': 1, 'unidades': 1, 'receita': 900.0},
+        {'categoria': "Periféricos", 'pedidos': 2, 'unidades': 5, 'receita': 670.0},
+    ]
+    assert [(v['produto_id'], v['unidades']) for v in relatorios.mais_vendidos(2)] == [
+        (catalogo['mouse'], 3), (catalogo['teclado'], 2)]
+    [diaria] = relatorios.receita_diaria()
+    assert diaria['receita'] == 1570.0
+    [status] = relatorios.pedidos_por_status()
+    assert status['pedidos'] == 2
+
+
+def test_reconstruir_resumos_bate_com_o_incremental(db, catalogo):
+    _vender(db, catalogo)
+    relatorios = Relatorios(db)
+    antes = (relatorios.receita_por_categoria(), relatorios.mais_vendidos(), relatorios.pedidos_por_status())
+
+    assert db.reconstruir_resumos() == 2
+
+    assert (relatorios.receita_por_categoria(), relatorios.mais_vendidos(),
+            relatorios.pedidos_por_status()) == antes
+
+
+def test_filtro_de_periodo(db, catalogo):
+    _vender(db, catalogo)
+
+    assert Relatorios(db).receita_por_categoria(data_fim='2000-01-01') == []